@@ -0,0 +1,114 @@
+"""Benchmark DesktopEntryReader against the previous ConfigParser implementation.
+
+Run from the repository root:
+
+    python .bench/bench_desktop_reader.py [--entries 2000] [--repeat 5]
+
+Writes a synthetic applications directory, checks that both readers return the
+same catalog, and prints the best and median wall time of each.
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from configparser import ConfigParser
+from pathlib import Path
+from shutil import which
+
+sys.path.append(".")
+
+from GPT.semantic.gpt_semantic_launch_reader import DesktopEntryReader
+
+EXECUTABLES = ["sh", "ls", "cat", "env", "python3", "missing-tool", "/bin/sh"]
+
+
+class ConfigParserReader(DesktopEntryReader):
+    """The reader before the fast path: one ConfigParser and one which() per file"""
+
+    def parse_files(self, file_paths: list[Path]) -> list[tuple[str, str] | None]:
+        return [self.parse_file(path) for path in file_paths]
+
+    def parse_file(self, file_path: Path) -> tuple[str, str] | None:
+        parser = ConfigParser(interpolation=None, strict=False)
+        try:
+            parser.read(file_path, encoding="utf-8")
+        except Exception:
+            return None
+        if parser.get("Desktop Entry", "Type", fallback="") != "Application":
+            return None
+        if parser.get("Desktop Entry", "NoDisplay", fallback="false").lower() == "true":
+            return None
+        values = {
+            "name": parser.get("Desktop Entry", "Name", fallback=""),
+            "exec": parser.get("Desktop Entry", "Exec", fallback=""),
+        }
+        return self._entry_values(values)
+
+    def _resolve_executable(self, command: str) -> str | None:
+        if command.startswith("/") and Path(command).is_file():
+            return command
+        return which(command)
+
+
+def write_entries(directory: Path, count: int) -> None:
+    for i in range(count):
+        executable = EXECUTABLES[i % len(EXECUTABLES)]
+        lines = [
+            "# Synthetic entry",
+            "[Desktop Entry]",
+            "Version=1.0",
+            "Type=Application" if i % 17 else "Type=Link",
+            f"Name=App {i:05d}",
+            f"Name[de]=Anwendung {i}",
+            f"Comment=Synthetic application number {i} for benchmarking",
+            f"Exec={executable} --instance {i} %U",
+            "Icon=application-x-executable",
+            "Categories=Utility;Development;",
+            "MimeType=text/plain;text/x-python;",
+        ]
+        if i % 23 == 0:
+            lines.append("NoDisplay=true")
+        if i % 29 == 0:
+            lines.append(f"Exec=xdg-open https://example.com/{i}")
+        lines += ["", "[Desktop Action new-window]", "Name=New Window", "Exec=sh"]
+        (directory / f"app{i:05d}.desktop").write_text("\n".join(lines) + "\n")
+
+
+def measure(reader: DesktopEntryReader, repeat: int) -> tuple[list[float], tuple]:
+    timings = []
+    entries: tuple = ()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        entries = reader.read_entries()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = Path(temp_dir)
+        write_entries(directory, args.entries)
+        baseline_times, baseline = measure(ConfigParserReader([directory]), args.repeat)
+        fast_times, fast = measure(DesktopEntryReader([directory]), args.repeat)
+
+    if fast != baseline:
+        sys.exit("Readers returned different catalogs")
+    print(f"{args.entries} desktop files, {len(fast)} launchable entries")
+    for label, timings in (("ConfigParser", baseline_times), ("fast path", fast_times)):
+        print(
+            f"{label:>12}: best {min(timings):7.1f} ms, "
+            f"median {statistics.median(timings):7.1f} ms"
+        )
+    speedup = statistics.median(baseline_times) / statistics.median(fast_times)
+    print(f"     speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""End-to-end benchmark of the request pipeline against local stubs.
+
+Run from the repository root:
+
+    python .bench/bench_pipeline.py [--scenario all] [--requests 50] [--concurrency 4]
+        [--endpoint api|llm] [--stream] [--latency-ms 300] [--error-rate 0.05]
+
+Imports the repository as a package on top of the fake talon module in
+.bench/stubs and answers requests with .bench/stub_server.py, or with the fake
+llm executable for --endpoint llm. Each scenario drives a real entry point:
+gpt_apply_prompt, gpt_generate_shell or GptSemanticRuntime.generate. For each
+scenario it prints p50/p95/p99 latency, throughput at the given concurrency,
+failures and memory. Latency, trace and plan files go to a temporary directory
+instead of .cache.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+STUBS = BENCH_DIR / "stubs"
+PACKAGE = "talon_ai_tools"
+
+sys.path.insert(0, str(STUBS))
+sys.path.insert(0, str(BENCH_DIR))
+
+import talon  # noqa: E402  The fake module from .bench/stubs
+from stub_server import StubServer, add_arguments, config_from  # noqa: E402
+
+SCENARIOS = ("apply", "shell", "semantic")
+SOURCE_TEXT = "Voice commands should feel instant. " * 40
+
+_notices = threading.local()
+
+
+@dataclass
+class Result:
+    scenario: str
+    latencies_ms: list[float]
+    failures: int
+    wall_seconds: float
+    rss_mb: float
+    traced_peak_mb: float
+
+
+def load_repository(state_dir: Path) -> dict[str, Any]:
+    """Import the Talon modules of the repository the way Talon would load them"""
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(ROOT)]  # type: ignore
+    sys.modules[PACKAGE] = package
+    modules = {}
+    for name in (
+        "lib.talonSettings",
+        "lib.modelHelpers",
+        "GPT.gpt",
+        "GPT.semantic.gpt_semantic_module",
+        "GPT.semantic.gpt_semantic_runtime",
+    ):
+        modules[name] = importlib.import_module(f"{PACKAGE}.{name}")
+
+    helpers = modules["lib.modelHelpers"]
+    helpers._model_router.path = state_dir / "model_latency.json"
+    helpers.tracer.writer.path = state_dir / "traces.jsonl"
+    modules["GPT.semantic.gpt_semantic_runtime"].plan_cache.path = (
+        state_dir / "semantic_plans.json"
+    )
+    return modules
+
+
+def configure(args: argparse.Namespace, url: str) -> None:
+    values = {
+        "user.model_endpoint": "llm" if args.endpoint == "llm" else url,
+        "user.model_llm_path": str(STUBS / "llm"),
+        "user.model_llm_worker": False,
+        "user.model_default": "bench-model",
+        "user.model_cache_enabled": False,
+        "user.model_async_requests": False,
+        "user.model_stream_responses": args.stream,
+        "user.model_verbose_notifications": False,
+        "user.model_max_concurrent_requests": args.concurrency,
+        "user.model_shell_default": "bash",
+        # Every semantic request should reach the model
+        "user.gpt_semantic_plan_cache_size": 0,
+        "user.gpt_semantic_local_planner": False,
+    }
+    for name, value in values.items():
+        talon.settings.set(name, value)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["BENCH_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["BENCH_LLM_TPS"] = str(args.stream_tps)
+    os.environ["BENCH_LLM_RESPONSE_TOKENS"] = str(args.response_tokens)
+
+    talon.clip.set_text(SOURCE_TEXT)
+    talon.ui.running_apps = ["Firefox", "Terminal", "Code", "Slack"]
+    talon.actions.user.register(
+        "talon_get_active_context", lambda: "App: Code\nTitle: bench.py"
+    )
+    talon.actions.code.register("language", lambda: "python")
+    talon.actions.app.register("notify", _record_notice)
+    talon.actions.user.register("notify", _record_notice)
+
+
+def _record_notice(message: str = "", *args: Any) -> None:
+    _notices.last = message
+
+
+def scenario_calls(modules: dict[str, Any]) -> dict[str, Callable[[int], None]]:
+    user = talon.actions.user
+    runtime = modules["GPT.semantic.gpt_semantic_runtime"].GptSemanticRuntime
+
+    def apply(index: int) -> None:
+        user.gpt_apply_prompt("summarize", "model", "", "clipboard", "paste")
+
+    def shell(index: int) -> None:
+        user.gpt_generate_shell(f"count the lines of python files {index}", "", "")
+
+    def semantic(index: int) -> None:
+        _notices.last = ""
+        runtime.generate(f"open a new tab and search for benchmark {index}", "")
+        # generate reports failures with a notification instead of raising
+        if _notices.last.startswith("Semantic planning failed"):
+            raise RuntimeError(_notices.last)
+
+    return {"apply": apply, "shell": shell, "semantic": semantic}
+
+
+def run_scenario(
+    name: str, call: Callable[[int], None], args: argparse.Namespace
+) -> Result:
+    for index in range(args.warmup):
+        with contextlib.suppress(Exception):
+            call(index)
+
+    def timed(index: int) -> float | None:
+        started = time.perf_counter()
+        try:
+            call(index)
+        except Exception:
+            return None
+        return (time.perf_counter() - started) * 1000
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        timings = list(pool.map(timed, range(args.requests)))
+    wall_seconds = time.perf_counter() - started
+    traced_peak_mb = 0.0
+    if args.trace_memory:
+        traced_peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    latencies = [timing for timing in timings if timing is not None]
+    return Result(
+        scenario=name,
+        latencies_ms=latencies,
+        failures=len(timings) - len(latencies),
+        wall_seconds=wall_seconds,
+        rss_mb=max_rss_mb(),
+        traced_peak_mb=traced_peak_mb,
+    )
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def max_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3
+
+
+def report(results: list[Result], trace_memory: bool) -> None:
+    header = (
+        f"{'scenario':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        f" {'req/s':>7} {'failed':>6} {'max RSS MB':>10}"
+    )
+    print(header + (f" {'traced MB':>9}" if trace_memory else ""))
+    for result in results:
+        latencies = result.latencies_ms
+        completed = len(latencies) / result.wall_seconds
+        line = (
+            f"{result.scenario:>9} {percentile(latencies, 50):9.1f}"
+            f" {percentile(latencies, 95):9.1f} {percentile(latencies, 99):9.1f}"
+            f" {completed:7.2f} {result.failures:6d} {result.rss_mb:10.1f}"
+        )
+        print(line + (f" {result.traced_peak_mb:9.1f}" if trace_memory else ""))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=(*SCENARIOS, "all"), default="all")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--endpoint", choices=("api", "llm"), default="api")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also report the peak of Python allocations. This slows requests down",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show what the pipeline prints"
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    # Importing the helpers creates an empty models.json like Talon does
+    models_path = ROOT / "models.json"
+    created_models = not models_path.exists()
+    server = StubServer(("127.0.0.1", 0), config_from(args)).start()
+    try:
+        with tempfile.TemporaryDirectory() as state_dir:
+            modules = load_repository(Path(state_dir))
+            configure(args, server.url)
+            calls = scenario_calls(modules)
+            names = SCENARIOS if args.scenario == "all" else (args.scenario,)
+            output = contextlib.nullcontext() if args.verbose else _quiet()
+            with output:
+                results = [run_scenario(name, calls[name], args) for name in names]
+            modules["lib.modelHelpers"].tracer.writer.flush()
+    finally:
+        server.shutdown()
+        if created_models:
+            models_path.unlink(missing_ok=True)
+
+    print(
+        f"{args.requests} requests per scenario, concurrency {args.concurrency},"
+        f" endpoint {args.endpoint}{', streaming' if args.stream else ''},"
+        f" latency {args.latency_ms:g} ms, {args.stream_tps:g} tokens/s"
+    )
+    report(results, args.trace_memory)
+
+
+def _quiet() -> contextlib.AbstractContextManager:
+    """Hide the notifications and debug output the pipeline prints"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Local OpenAI-compatible chat completions server for benchmarks.
+
+Run from the repository root to point a real Talon setup at it:
+
+    python .bench/stub_server.py [--port 8000] [--latency-ms 300] [--stream-tps 80]
+
+Then set user.model_endpoint = "http://127.0.0.1:8000/v1/chat/completions".
+
+Each response waits --latency-ms before the first byte and then produces
+--response-tokens tokens at --stream-tps tokens per second, streamed as
+server-sent events if the request asks for it. --error-rate and
+--rate-limit-rate inject 500 and 429 responses. Semantic planning requests get
+a valid plan and shell requests a shell command, so every scenario completes.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+PLAN = {
+    "steps": [
+        {"action": "key", "args": {"combo": "ctrl-t"}},
+        {"action": "insert_text", "args": {"text": "benchmark"}},
+        {"action": "key", "args": {"combo": "enter"}},
+    ],
+    "summary": "Open a tab and search for benchmark",
+}
+SHELL_COMMAND = "find . -name '*.py' | xargs wc -l"
+WORDS = "the quick brown fox jumps over the lazy dog while tokens stream".split()
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 300
+    # Tokens per second after the first byte; 0 sends the whole response at once
+    stream_tps: float = 80
+    response_tokens: int = 60
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    seed: int = 0
+
+
+def reply_for(system_prompt: str, user_prompt: str, response_tokens: int) -> str:
+    """A response that the pipeline accepts for the kind of request it got"""
+    if "semantic" in system_prompt.lower() or "launchable apps" in user_prompt:
+        return json.dumps(PLAN)
+    if "shell command" in user_prompt:
+        return SHELL_COMMAND
+    return " ".join(WORDS[i % len(WORDS)] for i in range(response_tokens))
+
+
+def split_tokens(text: str) -> list[str]:
+    """Split a response into word-sized stream chunks that join back into it"""
+    pieces = text.split(" ")
+    return [piece + " " for piece in pieces[:-1]] + pieces[-1:]
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StubConfig):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.random_lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def roll(self) -> float:
+        with self.random_lock:
+            self.requests += 1
+            return self.random.random()
+
+    def start(self) -> "StubServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        config = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        roll = self.server.roll()
+        time.sleep(config.latency_ms / 1000)
+        if roll < config.error_rate:
+            return self._send_json(500, {"error": {"message": "Injected failure"}})
+        if roll < config.error_rate + config.rate_limit_rate:
+            headers = {"retry-after-ms": "50"}
+            error = {"error": {"message": "Injected rate limit"}}
+            return self._send_json(429, error, headers)
+
+        system_prompt, user_prompt = _prompts(body.get("messages", []))
+        text = reply_for(system_prompt, user_prompt, config.response_tokens)
+        if body.get("stream"):
+            return self._stream(text)
+        if config.stream_tps:
+            time.sleep(len(split_tokens(text)) / config.stream_tps)
+        message = {"role": "assistant", "content": text}
+        self._send_json(200, {"choices": [{"index": 0, "message": message}]})
+
+    def _stream(self, text: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        tokens_per_second = self.server.config.stream_tps
+        delay = 1 / tokens_per_second if tokens_per_second else 0
+        for token in split_tokens(text):
+            chunk = {"choices": [{"index": 0, "delta": {"content": token}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _send_json(
+        self, status: int, payload: dict, headers: dict[str, str] | None = None
+    ) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _prompts(messages: list[dict[str, Any]]) -> tuple[str, str]:
+    texts: dict[str, str] = {"system": "", "user": ""}
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(item.get("text", "") for item in content)
+        role = message.get("role", "user")
+        texts[role] = texts.get(role, "") + content
+    return texts["system"], texts["user"]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Stub behavior options, shared with the pipeline benchmark"""
+    defaults = StubConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--stream-tps", type=float, default=defaults.stream_tps)
+    parser.add_argument("--response-tokens", type=int, default=defaults.response_tokens)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=defaults.rate_limit_rate
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency_ms=args.latency_ms,
+        stream_tps=args.stream_tps,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = StubServer(("127.0.0.1", args.port), config_from(args))
+    print(f"Serving {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
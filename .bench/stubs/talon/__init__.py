@@ -0,0 +1,243 @@
+"""Headless stand-in for the parts of the talon module that talon-ai-tools uses.
+
+Benchmarks put `.bench/stubs` first on sys.path so the real request pipeline can
+be imported and driven outside of Talon. It implements just enough behavior:
+
+- `Module` registers settings with their defaults and action classes on
+  `actions.user`. `Context` overrides are ignored, as if no context matched.
+- `actions` looks up registered actions. Any other action is a no-op that is
+  recorded in `actions.calls`.
+- `settings` returns values given to `settings.set`, or the registered default.
+- `clip` is an in-memory clipboard and `ui.apps` returns `ui.running_apps`.
+- `cron` runs jobs on timer threads, since there is no Talon main thread.
+- `resource.watch` calls the function with the file once, like Talon on load.
+"""
+
+import sys
+import threading
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+
+class _Action:
+    """A namespace of actions that is also callable, so `actions.key(...)` works"""
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def register(self, name: str, function: Callable[..., Any]) -> None:
+        setattr(self, name, function)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        child = _Action(f"{self._path}.{name}" if self._path else name)
+        setattr(self, name, child)
+        return child
+
+    def __call__(self, *args: Any, **kwargs: Any) -> None:
+        actions.calls.append((self._path, args))
+        return None
+
+
+class _Actions(_Action):
+    def __init__(self):
+        super().__init__("")
+        self.calls: list[tuple[str, tuple]] = []
+
+    def reset_calls(self) -> None:
+        self.calls.clear()
+
+
+actions = _Actions()
+
+
+class _Settings:
+    def __init__(self):
+        self.defaults: dict[str, Any] = {}
+        self.values: dict[str, Any] = {}
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name in self.values:
+            return self.values[name]
+        return self.defaults.get(name, default)
+
+    def set(self, name: str, value: Any) -> None:
+        self.values[name] = value
+
+    def register(self, name: str, callback: Callable[..., None]) -> None:
+        pass
+
+
+settings = _Settings()
+
+
+class Module:
+    def setting(
+        self, name: str, type: Any = None, default: Any = None, desc: str = ""
+    ) -> None:
+        settings.defaults[f"user.{name}"] = default
+
+    def action_class(self, cls: type) -> type:
+        for name, function in vars(cls).items():
+            if callable(function) and not name.startswith("_"):
+                actions.user.register(name, function)
+        return cls
+
+    def capture(self, rule: str = "") -> Callable[[Callable], Callable]:
+        return lambda function: function
+
+    def list(self, name: str, desc: str = "") -> None:
+        pass
+
+    def tag(self, name: str, desc: str = "") -> None:
+        pass
+
+
+class Context:
+    def __init__(self):
+        self.matches = ""
+        self.tags: list[str] = []
+        self.lists: dict[str, Any] = {}
+        self.settings: dict[str, Any] = {}
+
+    def action_class(self, path: str) -> Callable[[type], type]:
+        return lambda cls: cls
+
+
+class _Clipboard:
+    def __init__(self):
+        self._text: Optional[str] = None
+
+    def text(self) -> Optional[str]:
+        return self._text
+
+    def set_text(self, text: str) -> None:
+        self._text = text
+
+    def image(self) -> None:
+        return None
+
+
+clip = _Clipboard()
+
+
+class _UI:
+    def __init__(self):
+        self.running_apps: list[str] = []
+
+    def apps(self, background: bool = True) -> list[SimpleNamespace]:
+        return [SimpleNamespace(name=name) for name in self.running_apps]
+
+    def active_app(self) -> SimpleNamespace:
+        name = self.running_apps[0] if self.running_apps else ""
+        return SimpleNamespace(name=name)
+
+    def focused_element(self) -> None:
+        raise RuntimeError("No focused element")
+
+    def register(self, event: str, callback: Callable[..., None]) -> None:
+        pass
+
+
+ui = _UI()
+
+
+class _App:
+    name = "talon"
+    platform = {"darwin": "mac", "win32": "windows"}.get(sys.platform, "linux")
+
+    def __init__(self):
+        self.notifications: list[str] = []
+        self.handlers: dict[str, list[Callable[[], None]]] = {}
+
+    def notify(self, title: str = "", body: str = "", *args: Any, **kwargs: Any):
+        self.notifications.append(f"{title} {body}".strip())
+
+    def register(self, event: str, callback: Callable[[], None]) -> None:
+        self.handlers.setdefault(event, []).append(callback)
+
+
+app = _App()
+
+
+def _seconds(spec: str) -> float:
+    if spec.endswith("ms"):
+        return float(spec[:-2]) / 1000
+    if spec.endswith("s"):
+        return float(spec[:-1])
+    if spec.endswith("m"):
+        return float(spec[:-1]) * 60
+    return float(spec)
+
+
+class _Cron:
+    def after(self, spec: str, callback: Callable[[], None]) -> threading.Timer:
+        timer = threading.Timer(_seconds(spec), callback)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def interval(self, spec: str, callback: Callable[[], None]) -> threading.Event:
+        stopped = threading.Event()
+        seconds = _seconds(spec)
+
+        def repeat() -> None:
+            while not stopped.wait(seconds):
+                callback()
+
+        threading.Thread(target=repeat, daemon=True).start()
+        return stopped
+
+    def cancel(self, job: Any) -> None:
+        if job is not None:
+            (job.cancel if isinstance(job, threading.Timer) else job.set)()
+
+
+cron = _Cron()
+
+
+class _Resource:
+    def watch(self, path: str) -> Callable[[Callable], Callable]:
+        def decorator(function: Callable) -> Callable:
+            with open(path, "r", encoding="utf-8") as f:
+                function(f)
+            return function
+
+        return decorator
+
+
+resource = _Resource()
+
+
+class _FS:
+    def watch(self, path: str, callback: Callable[..., None]) -> None:
+        pass
+
+    def unwatch(self, path: str, callback: Callable[..., None]) -> None:
+        pass
+
+
+fs = _FS()
+
+
+class _GUI:
+    def __init__(self, draw: Callable[..., None]):
+        self.draw = draw
+        self.showing = False
+
+    def show(self) -> None:
+        self.showing = True
+
+    def hide(self) -> None:
+        self.showing = False
+
+
+class _Imgui:
+    GUI = _GUI
+
+    def open(self, **kwargs: Any) -> Callable[[Callable], _GUI]:
+        return lambda draw: _GUI(draw)
+
+
+imgui = _Imgui()
@@ -0,0 +1,57 @@
+"""
+Imports the modules of the repository that depend on Talon, for tests.
+
+Talon cannot be installed with pip, so these modules are imported on top of the
+headless talon stand-in in .bench/stubs, and the repository is imported as a
+package the way Talon loads it, so relative imports across folders work. The
+stand-in is only registered while importing; modules that fall back when Talon
+is missing, like the semantic modules, keep doing so in other tests.
+"""
+
+import importlib
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+STUBS = ROOT / ".bench" / "stubs"
+PACKAGE = "talon_ai_tools"
+
+
+def _load_talon() -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location(
+        "talon", STUBS / "talon" / "__init__.py"
+    )
+    module = importlib.util.module_from_spec(spec)  # type: ignore
+    spec.loader.exec_module(module)  # type: ignore
+    return module
+
+
+# Shared by every module imported here, so tests can change its settings
+talon = _load_talon()
+
+
+def import_talon_module(name: str) -> types.ModuleType:
+    """Import a module such as "lib.modelSession" with the talon stand-in"""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(ROOT)]  # type: ignore
+        sys.modules[PACKAGE] = package
+
+    # Importing the model helpers creates an empty models.json like Talon does
+    models_path = ROOT / "models.json"
+    created_models = not models_path.exists()
+    previous = sys.modules.get("talon")
+    sys.modules["talon"] = talon
+    try:
+        # Registers the defaults of the settings, as Talon does on load
+        importlib.import_module(f"{PACKAGE}.lib.talonSettings")
+        return importlib.import_module(f"{PACKAGE}.{name}")
+    finally:
+        if previous is None:
+            del sys.modules["talon"]
+        else:
+            sys.modules["talon"] = previous
+        if created_models:
+            models_path.unlink(missing_ok=True)
@@ -0,0 +1,51 @@
+"""Planner context tests for GPT semantic commands.
+
+Purpose:
+- Verifies when a plan made with the pruned context is retried with the full one.
+
+Called from:
+- Pytest suite in `user/talon-ai-tools/.test`.
+"""
+
+import sys
+
+import pytest
+
+sys.path.append(".")
+
+from talon_package import import_talon_module
+
+context = import_talon_module("GPT.semantic.gpt_semantic_context")
+semantic_types = import_talon_module("GPT.semantic.gpt_semantic_types")
+
+PRUNED = context.SemanticContext("", ("firefox",), ("Firefox",))
+FULL = context.SemanticContext(
+    "", ("firefox", "code"), ("Firefox", "Slack", "Visual Studio Code")
+)
+
+
+@pytest.fixture(autouse=True)
+def apps(monkeypatch):
+    running = {"firefox", "slack", "visual studio code"}
+    monkeypatch.setattr(context, "is_running_app", lambda name: name.lower() in running)
+    monkeypatch.setattr(context, "exact_launch_command", lambda name: None)
+
+
+def plan(action: str, app_name: str):
+    step = semantic_types.GptSemanticStep(action, {"app_name": app_name})
+    return semantic_types.GptSemanticPlan([step])
+
+
+def test_known_apps_are_covered() -> None:
+    assert PRUNED.covers(plan("switch_app", "Slack"), FULL)
+    assert PRUNED.covers(plan("launch_app", "firefox"), FULL)
+
+
+def test_unknown_app_is_retried_when_the_full_context_lists_more_apps() -> None:
+    assert not PRUNED.covers(plan("switch_app", "Code"), FULL)
+    assert not PRUNED.covers(plan("launch_app", "vscode"), FULL)
+
+
+def test_unknown_app_is_not_retried_when_the_full_context_adds_nothing() -> None:
+    assert PRUNED.covers(plan("switch_app", "Spotify"), PRUNED)
+    assert PRUNED.covers(plan("launch_app", "spotify"), PRUNED)
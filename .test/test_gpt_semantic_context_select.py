@@ -0,0 +1,64 @@
+"""Context selection tests for GPT semantic commands.
+
+Purpose:
+- Verifies running app ranking, adaptive item counts, and token savings stats.
+
+Called from:
+- Pytest suite in `user/talon-ai-tools/.test`.
+"""
+
+import sys
+
+sys.path.append(".")
+
+from GPT.semantic.gpt_semantic_context_select import (
+    ContextStats,
+    adaptive_k,
+    rank_running_apps,
+    select_running_apps,
+)
+
+RUNNING = ["Firefox", "Slack", "Visual Studio Code", "Terminal", "Files", "Zoom"]
+
+
+def test_adaptive_k_keeps_near_best_matches():
+    assert adaptive_k([10, 6, 1, 1], 1, 20) == 2
+    assert adaptive_k([10, 6, 1, 1], 3, 20) == 3
+    assert adaptive_k([2] * 30, 1, 20) == 20
+
+
+def test_adaptive_k_uses_maximum_when_nothing_matches():
+    assert adaptive_k([], 1, 20) == 20
+    assert adaptive_k([0, 0], 1, 20) == 20
+
+
+def test_rank_running_apps_prefers_named_app():
+    ranked = rank_running_apps("switch to studio code and save", RUNNING)
+    assert ranked[0] == ("Visual Studio Code", 2)
+    assert rank_running_apps("open firefox", RUNNING)[0] == ("Firefox", 6)
+
+
+def test_rank_running_apps_matches_partial_words():
+    assert rank_running_apps("go to the term", RUNNING)[0][0] == "Terminal"
+
+
+def test_select_running_apps_pads_to_minimum():
+    assert select_running_apps("open slack", RUNNING, 3, 10) == [
+        "Slack",
+        "Files",
+        "Firefox",
+    ]
+
+
+def test_select_running_apps_keeps_all_when_nothing_matches():
+    assert len(select_running_apps("write a note", RUNNING, 2, 10)) == len(RUNNING)
+
+
+def test_context_stats_reports_savings():
+    stats = ContextStats()
+    stats.record(300, 1000)
+    stats.record(100, 1000)
+    stats.record_retry()
+    assert stats.saved_percent() == 80
+    assert stats.requests == 2
+    assert stats.wide_retries == 1
@@ -0,0 +1,70 @@
+import os
+import shutil
+import sys
+from configparser import ConfigParser
+
+import pytest
+
+sys.path.append(".")
+
+from GPT.semantic.gpt_semantic_desktop_entry import ExecutableIndex, parse_desktop_entry
+from GPT.semantic.gpt_semantic_launch_reader import split_command
+
+SAMPLES = [
+    "[Desktop Entry]\nType=Application\nName=Editor\nExec=gedit %U\n",
+    "# comment\n[Desktop Entry]\nname = Spaced : value\nEXEC: run --x=1\n",
+    "[DEFAULT]\nType=Application\n[Desktop Entry]\nName=From default\n",
+    "[Desktop Entry]\nName=First\nName=Second\n",
+    "[Desktop Entry]\nExec=one\n  two\n\n  three\n\n",
+    "[Desktop Entry]\nName=A\n[Other]\nName=B\n[Desktop Entry]\nType=Application\n",
+    "[Desktop Entry]\n; comment\nName=Comment lines\n#Exec=hidden\n",
+    "[Other]\nName=No desktop group\n",
+    "Name=Missing header\n",
+    "[Desktop Entry]\nline without delimiter\nName=Broken\n",
+    "[Desktop Entry]\n=no key\n",
+]
+
+
+def config_parser_values(text: str) -> dict[str, str] | None:
+    parser = ConfigParser(interpolation=None, strict=False)
+    try:
+        parser.read_string(text)
+    except Exception:
+        return None
+    if not parser.has_section("Desktop Entry"):
+        return {}
+    return dict(parser.items("Desktop Entry"))
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_parser_matches_config_parser(text: str) -> None:
+    assert parse_desktop_entry(text) == config_parser_values(text)
+
+
+@pytest.mark.parametrize(
+    "command",
+    ["gedit %U", "sh -c 'echo hi'", 'env "A B" c', "a\\ b", "tab\tseparated  cmd"],
+)
+def test_split_command_matches_shlex(command: str) -> None:
+    import shlex
+
+    assert split_command(command) == shlex.split(command)
+
+
+def test_executable_index_matches_which(tmp_path) -> None:
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    for directory, name, mode in [
+        (first, "tool", 0o644),
+        (second, "tool", 0o755),
+        (second, "other", 0o755),
+    ]:
+        path = directory / name
+        path.write_text("#!/bin/sh\n")
+        path.chmod(mode)
+    path = os.pathsep.join([str(first), str(second)])
+    index = ExecutableIndex(path)
+    for command in ["tool", "other", "missing", str(second / "tool")]:
+        assert index.which(command) == shutil.which(command, path=path)
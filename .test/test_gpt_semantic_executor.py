@@ -14,6 +14,7 @@ sys.path.append(".")
 from GPT.semantic import gpt_semantic_executor_helpers as helpers
 from GPT.semantic import gpt_semantic_step_executor as step_executor
 from GPT.semantic.gpt_semantic_executor import GptSemanticExecutionError, execute_plan
+from GPT.semantic.gpt_semantic_prepare import prepare_plan
 from GPT.semantic.gpt_semantic_types import GptSemanticPlan, GptSemanticStep
 
 
@@ -143,3 +144,138 @@ def test_switch_app_falls_back_to_launch_if_not_running(monkeypatch) -> None:
     execute_plan(plan, runner=runner)
     assert runner.calls[0] == ("user.switcher_launch", ("google-chrome",))
     assert waits == [("Google Chrome", "google-chrome")]
+
+
+def _prepared(plan: GptSemanticPlan, running: bool, candidates: list[str]):
+    return prepare_plan(
+        plan,
+        ["Google Chrome"] if running else [],
+        None,
+        lambda _name: running,
+        lambda _name: candidates,
+        lambda _plan: "fingerprint",
+    )
+
+
+def test_prepared_results_skip_live_lookups(monkeypatch) -> None:
+    def live(_name):
+        raise AssertionError("prepared results should be used")
+
+    monkeypatch.setattr(step_executor, "is_running_app", live)
+    monkeypatch.setattr(step_executor, "validate_running_app", live)
+    monkeypatch.setattr(step_executor, "launch_candidates", live)
+    monkeypatch.setattr(step_executor, "wait_for_app_focus", lambda *_args: None)
+    plan = GptSemanticPlan(
+        [
+            GptSemanticStep("launch_app", {"app_name": "gedit"}),
+            GptSemanticStep("new_tab", {}),
+        ]
+    )
+    runner = FakeRunner()
+    execute_plan(plan, runner=runner, prepared=_prepared(plan, False, ["gedit-2"]))
+    assert runner.calls[0] == ("user.switcher_launch", ("gedit-2",))
+
+
+def test_prepared_running_state_expires_after_app_steps(monkeypatch) -> None:
+    checks: list[str] = []
+    monkeypatch.setattr(
+        step_executor, "is_running_app", lambda name: checks.append(name) or True
+    )
+    monkeypatch.setattr(step_executor, "wait_for_app_focus", lambda *_args: None)
+    plan = GptSemanticPlan(
+        [
+            GptSemanticStep("switch_app", {"app_name": "Google Chrome"}),
+            GptSemanticStep("switch_app", {"app_name": "Google Chrome"}),
+        ]
+    )
+    runner = FakeRunner()
+    execute_plan(plan, runner=runner, prepared=_prepared(plan, False, ["chrome"]))
+    # The first step launches as prepared, only the second checks the live state
+    assert runner.calls[0] == ("user.switcher_launch", ("chrome",))
+    assert runner.calls[1] == ("user.switcher_focus", ("Google Chrome",))
+    assert checks == ["Google Chrome"]
+
+
+def test_adjacent_keys_inserts_and_sleeps_are_coalesced() -> None:
+    plan = GptSemanticPlan(
+        [
+            GptSemanticStep("key", {"combo": "ctrl-a"}),
+            GptSemanticStep("key", {"combo": "ctrl-c"}),
+            GptSemanticStep("insert_text", {"text": "hello "}),
+            GptSemanticStep("insert_text", {"text": "world"}),
+            GptSemanticStep("sleep", {"ms": 100}),
+            GptSemanticStep("sleep", {"ms": 50}),
+            GptSemanticStep("line_end", {}),
+            GptSemanticStep("line_end", {}),
+            GptSemanticStep("key", {"combo": "enter"}),
+        ]
+    )
+    runner = FakeRunner()
+    timings = execute_plan(plan, runner=runner)
+    assert runner.calls == [
+        ("key", ("ctrl-a ctrl-c",)),
+        ("insert", ("hello world",)),
+        ("sleep", ("150ms",)),
+        ("edit.line_end", ()),
+        ("edit.line_end", ()),
+        ("key", ("enter",)),
+    ]
+    assert [(t.index, t.action, t.count) for t in timings] == [
+        (1, "key", 2),
+        (3, "insert_text", 2),
+        (5, "sleep", 2),
+        (7, "line_end", 1),
+        (8, "line_end", 1),
+        (9, "key", 1),
+    ]
+    assert all(t.ms >= 0 for t in timings)
+
+
+def test_coalesced_failure_reports_first_step() -> None:
+    plan = GptSemanticPlan(
+        [
+            GptSemanticStep("new_tab", {}),
+            GptSemanticStep("key", {"combo": "ctrl-a"}),
+            GptSemanticStep("key", {"combo": "ctrl-c"}),
+        ]
+    )
+    runner = FakeRunner(fail_call="key")
+    try:
+        execute_plan(plan, runner=runner)
+        assert False
+    except GptSemanticExecutionError as exc:
+        assert "Step 2 (key)" in str(exc)
+
+
+def test_settle_runs_for_each_coalesced_step(monkeypatch) -> None:
+    settled: list[str] = []
+    monkeypatch.setattr(
+        step_executor, "settle_after_step", lambda action, _r: settled.append(action)
+    )
+    plan = GptSemanticPlan(
+        [
+            GptSemanticStep("insert_text", {"text": "a"}),
+            GptSemanticStep("insert_text", {"text": "b"}),
+            GptSemanticStep("new_tab", {}),
+        ]
+    )
+    execute_plan(plan, runner=FakeRunner())
+    assert settled == ["insert_text", "insert_text", "new_tab"]
+
+
+def test_unresolvable_action_reports_its_step_before_running() -> None:
+    class NoEditRunner(FakeRunner):
+        def __init__(self):
+            super().__init__()
+            del self.edit
+
+    plan = GptSemanticPlan(
+        [GptSemanticStep("new_tab", {}), GptSemanticStep("copy", {})]
+    )
+    runner = NoEditRunner()
+    try:
+        execute_plan(plan, runner=runner)
+        assert False
+    except GptSemanticExecutionError as exc:
+        assert "Step 2 (copy)" in str(exc)
+    assert runner.calls == []
@@ -17,3 +17,27 @@ def test_launch_context_text(monkeypatch) -> None:
     text = catalog.launch_context_text()
     assert "Launchable apps for launch_app" in text
     assert "Text Editor => gnome-text-editor" in text
+
+
+def test_exact_launch_command_requires_single_exact_match(monkeypatch) -> None:
+    rows = (
+        ("Text Editor", "gnome-text-editor"),
+        ("Terminal", "gnome-terminal"),
+        ("Terminal", "xterm"),
+    )
+    monkeypatch.setattr(catalog, "launch_entries", lambda: rows)
+    assert catalog.exact_launch_command("text editor") == "gnome-text-editor"
+    assert catalog.exact_launch_command("xterm") == "xterm"
+    assert catalog.exact_launch_command("terminal") is None
+    assert catalog.exact_launch_command("text") is None
+
+
+def test_relevant_launch_entries_keeps_only_close_matches(monkeypatch) -> None:
+    rows = tuple((f"App {i}", f"app{i}") for i in range(50)) + (
+        ("Text Editor", "gnome-text-editor"),
+    )
+    monkeypatch.setattr(catalog, "launch_entries", lambda: rows)
+    entries = catalog.relevant_launch_entries("open text editor", 2, 20)
+    assert entries[0] == ("Text Editor", "gnome-text-editor")
+    assert len(entries) == 2
+    assert len(catalog.relevant_launch_entries("something to write with", 2, 20)) == 20
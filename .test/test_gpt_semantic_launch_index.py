@@ -0,0 +1,45 @@
+import sys
+
+sys.path.append(".")
+
+from GPT.semantic import gpt_semantic_launch_catalog as catalog
+from GPT.semantic.gpt_semantic_launch_index import LaunchIndex
+from GPT.semantic.gpt_semantic_launch_matcher import LaunchMatcher
+
+ROWS = (
+    ("Terminal", "gnome-terminal"),
+    ("Text Editor", "gnome-text-editor --new-window"),
+    ("Firefox", "firefox %u"),
+    ("Visual Studio Code", "code --unity-launch"),
+)
+
+
+def test_matches_substrings_of_names_and_commands() -> None:
+    index = LaunchIndex(ROWS)
+    assert index.matches("fox") == {2}
+    assert index.matches("te") == {0, 1}
+    assert index.matches("gnome text") == {1}
+    assert index.exact("code") == {3}
+
+
+def test_rank_entries_scores_matches_first_then_sorts_by_name() -> None:
+    matcher = LaunchMatcher(catalog.STOP_WORDS)
+    ranked = matcher.rank_entries("open text editor", LaunchIndex(ROWS), 3)
+    assert ranked == [ROWS[1], ROWS[2], ROWS[0]]
+
+
+def test_resolve_prefers_name_then_command() -> None:
+    matcher = LaunchMatcher(catalog.STOP_WORDS)
+    index = LaunchIndex(ROWS)
+    assert matcher.resolve("studio", index) == "code --unity-launch"
+    assert matcher.resolve("gnome terminal", index) == "gnome-terminal"
+    assert matcher.resolve("missing", index) is None
+
+
+def test_catalog_rebuilds_the_index_only_when_entries_change(monkeypatch) -> None:
+    rows = ROWS
+    monkeypatch.setattr(catalog, "launch_entries", lambda: rows)
+    first = catalog._index()
+    assert catalog._index() is first
+    rows = ROWS[:1]
+    assert catalog._index() is not first
@@ -0,0 +1,77 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(".")
+
+from GPT.semantic.gpt_semantic_launch_service import LaunchCatalogService
+
+
+def write_entry(directory: Path, file_name: str, name: str) -> Path:
+    path = directory / file_name
+    path.write_text(
+        f"[Desktop Entry]\nType=Application\nName={name}\nExec=/bin/sh -c true\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+def service(tmp_path: Path, monkeypatch) -> LaunchCatalogService:
+    catalog_service = LaunchCatalogService([tmp_path / "apps"], tmp_path / "cache.json")
+    monkeypatch.setattr(catalog_service.provider, "_community_entries", lambda: ())
+    return catalog_service
+
+
+def test_refresh_only_reparses_changed_files(tmp_path, monkeypatch) -> None:
+    apps = tmp_path / "apps"
+    apps.mkdir()
+    write_entry(apps, "one.desktop", "One")
+    second = write_entry(apps, "two.desktop", "Two")
+    catalog_service = service(tmp_path, monkeypatch)
+    assert [name for name, _ in catalog_service.entries()] == ["One", "Two"]
+
+    parsed: list[str] = []
+    parse_files = catalog_service.reader.parse_files
+    monkeypatch.setattr(
+        catalog_service.reader,
+        "parse_files",
+        lambda paths: parsed.extend(path.name for path in paths) or parse_files(paths),
+    )
+    write_entry(apps, "two.desktop", "Second")
+    os.utime(second, ns=(1, 1))
+    assert catalog_service.refresh()
+    assert parsed == ["two.desktop"]
+    assert [name for name, _ in catalog_service.entries()] == ["One", "Second"]
+
+
+def test_entries_keep_their_identity_when_unchanged(tmp_path, monkeypatch) -> None:
+    (tmp_path / "apps").mkdir()
+    write_entry(tmp_path / "apps", "one.desktop", "One")
+    catalog_service = service(tmp_path, monkeypatch)
+    entries = catalog_service.entries()
+    assert not catalog_service.refresh()
+    assert catalog_service.entries() is entries
+
+
+def test_poll_picks_up_new_files(tmp_path, monkeypatch) -> None:
+    apps = tmp_path / "apps"
+    apps.mkdir()
+    catalog_service = service(tmp_path, monkeypatch)
+    assert catalog_service.entries() == ()
+    write_entry(apps, "new.desktop", "New")
+    os.utime(apps, ns=(2, 2))
+    assert catalog_service.poll()
+    assert [name for name, _ in catalog_service.entries()] == ["New"]
+
+
+def test_startup_uses_the_persisted_cache(tmp_path, monkeypatch) -> None:
+    apps = tmp_path / "apps"
+    apps.mkdir()
+    write_entry(apps, "one.desktop", "One")
+    service(tmp_path, monkeypatch).entries()
+
+    restarted = service(tmp_path, monkeypatch)
+    monkeypatch.setattr(
+        restarted.reader, "parse_files", lambda paths: (_ for _ in ()).throw(OSError())
+    )
+    assert [name for name, _ in restarted.entries()] == ["One"]
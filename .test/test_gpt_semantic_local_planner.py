@@ -0,0 +1,81 @@
+"""Local planner tests for GPT semantic commands.
+
+Purpose:
+- Verifies trivial requests are planned locally and ambiguous ones fall through.
+
+Called from:
+- Pytest suite in `user/talon-ai-tools/.test`.
+"""
+
+import sys
+
+sys.path.append(".")
+
+from GPT.semantic.gpt_semantic_local_planner import LocalPlanner
+from GPT.semantic.gpt_semantic_types import GptSemanticStep
+
+RUNNING = ["Firefox", "Slack", "Visual Studio Code", "Code - Insiders"]
+COMMANDS = {"gedit": "gedit", "text editor": "gnome-text-editor"}
+
+
+def _planner() -> LocalPlanner:
+    return LocalPlanner(lambda: RUNNING, COMMANDS.get)
+
+
+def _step(request: str) -> GptSemanticStep | None:
+    plan = _planner().plan(request)
+    return plan.steps[0] if plan else None
+
+
+def test_phrases_map_to_actions_without_arguments():
+    assert _step("New tab") == GptSemanticStep("new_tab", {})
+    assert _step("undo that please") == GptSemanticStep("undo", {})
+    assert _step("select all.") == GptSemanticStep("select_all", {})
+    assert _step("go to line end") == GptSemanticStep("line_end", {})
+
+
+def test_go_to_domain_opens_url():
+    assert _step("go to example.com") == GptSemanticStep(
+        "go_url", {"url": "https://example.com"}
+    )
+    assert _step("visit example dot com slash docs") is None
+    assert _step("open news dot ycombinator dot com") == GptSemanticStep(
+        "go_url", {"url": "https://news.ycombinator.com"}
+    )
+    assert _step("go to http://localhost.dev/a") == GptSemanticStep(
+        "go_url", {"url": "http://localhost.dev/a"}
+    )
+
+
+def test_switch_to_running_app():
+    assert _step("switch to slack") == GptSemanticStep(
+        "switch_app", {"app_name": "Slack"}
+    )
+    assert _step("focus studio code") == GptSemanticStep(
+        "switch_app", {"app_name": "Visual Studio Code"}
+    )
+
+
+def test_ambiguous_running_app_falls_through():
+    assert _step("switch to code") is None
+
+
+def test_launch_uses_exact_catalog_command():
+    assert _step("open text editor") == GptSemanticStep(
+        "launch_app", {"app_name": "gnome-text-editor"}
+    )
+    assert _step("launch gedit") == GptSemanticStep("launch_app", {"app_name": "gedit"})
+    assert _step("launch some editor") is None
+
+
+def test_compound_requests_fall_through():
+    assert _step("open firefox and go to github") is None
+    assert _step("write an email to bob") is None
+
+
+def test_stats_count_hits_and_misses():
+    planner = _planner()
+    planner.plan("undo")
+    planner.plan("switch to slack")
+    planner.plan("summarize this page")
+    assert planner.stats == {"hits": 2, "misses": 1}
@@ -2,7 +2,11 @@ import sys
 
 sys.path.append(".")
 
-from GPT.semantic.gpt_semantic_parser import GptSemanticParseError, parse_plan
+from GPT.semantic.gpt_semantic_parser import (
+    GptSemanticParseError,
+    clean_json_text,
+    parse_plan,
+)
 
 
 def test_parse_valid_plan() -> None:
@@ -48,3 +52,30 @@ def test_parse_rejects_extra_fields() -> None:
         assert False
     except GptSemanticParseError as exc:
         assert "unsupported" in str(exc)
+
+
+def test_parse_plan_in_code_fence_with_prose() -> None:
+    raw = (
+        "Here is the plan:\n```json\n"
+        '{"steps":[{"action":"new_tab","args":{}}],"summary":"Open a tab"}\n'
+        "```\nLet me know if you need anything else."
+    )
+    plan = parse_plan(raw)
+    assert plan.steps[0].action == "new_tab"
+    assert plan.summary == "Open a tab"
+
+
+def test_parse_plan_with_trailing_commas() -> None:
+    raw = '{"steps":[{"action":"key","args":{"combo":"ctrl-t",},},],}'
+    assert parse_plan(raw).steps[0].args == {"combo": "ctrl-t"}
+
+
+def test_clean_json_text_keeps_string_contents() -> None:
+    raw = 'Sure {"steps":[{"action":"insert_text","args":{"text":"a \\" },]"}}]} ok {'
+    assert clean_json_text(raw) == (
+        '{"steps":[{"action":"insert_text","args":{"text":"a \\" },]"}}]}'
+    )
+
+
+def test_clean_json_text_without_object_is_unchanged() -> None:
+    assert clean_json_text("no plan here") == "no plan here"
@@ -0,0 +1,153 @@
+"""Plan cache tests for GPT semantic commands.
+
+Purpose:
+- Verifies cache hits, context checks, learned templates, eviction, and persistence.
+
+Called from:
+- Pytest suite in `user/talon-ai-tools/.test`.
+"""
+
+import sys
+
+sys.path.append(".")
+
+from GPT.semantic.gpt_semantic_plan_cache import PlanCache, normalize_request
+from GPT.semantic.gpt_semantic_types import GptSemanticPlan, GptSemanticStep
+
+
+def _browse_plan(app: str, site: str) -> GptSemanticPlan:
+    return GptSemanticPlan(
+        steps=[
+            GptSemanticStep("switch_app", {"app_name": app}),
+            GptSemanticStep("go_url", {"url": f"https://{site}.com"}),
+        ]
+    )
+
+
+def _no_context(_plan: GptSemanticPlan) -> str:
+    return ""
+
+
+def test_normalize_request_ignores_case_and_punctuation():
+    assert normalize_request("  Open Firefox, and go to GitHub! ") == (
+        "open firefox and go to github"
+    )
+
+
+def test_lookup_returns_stored_plan_for_same_request(tmp_path):
+    cache = PlanCache(tmp_path / "plans.json")
+    plan = _browse_plan("firefox", "github")
+    cache.store("open firefox and go to github", plan, "")
+
+    assert cache.lookup("Open Firefox and go to GitHub.", _no_context) == plan
+    assert cache.stats["hits"] == 1
+
+
+def test_lookup_misses_when_context_fingerprint_changed(tmp_path):
+    cache = PlanCache(tmp_path / "plans.json")
+    plan = GptSemanticPlan(steps=[GptSemanticStep("launch_app", {"app_name": "gedit"})])
+    cache.store("launch gedit", plan, "gedit|False|gedit")
+
+    assert cache.lookup("launch gedit", lambda _plan: "gedit|True|gedit") is None
+    assert cache.stats["misses"] == 1
+
+
+def test_template_reuses_plan_shape_for_new_values(tmp_path):
+    cache = PlanCache(tmp_path / "plans.json")
+    cache.store("open firefox and go to github", _browse_plan("firefox", "github"), "")
+
+    plan = cache.lookup("open chrome and go to gitlab", _no_context)
+
+    assert plan == _browse_plan("chrome", "gitlab")
+    assert cache.stats["template_hits"] == 1
+
+
+def test_template_requires_same_fixed_words(tmp_path):
+    cache = PlanCache(tmp_path / "plans.json")
+    cache.store("open firefox and go to github", _browse_plan("firefox", "github"), "")
+
+    assert cache.lookup("open firefox and search github", _no_context) is None
+    assert cache.lookup("open firefox and go to hacker news", _no_context) is None
+
+
+def test_no_template_when_request_words_are_not_in_arguments(tmp_path):
+    cache = PlanCache(tmp_path / "plans.json")
+    plan = GptSemanticPlan(steps=[GptSemanticStep("key", {"combo": "ctrl-t"})])
+    cache.store("open a tab", plan, "")
+
+    assert cache.lookup("open a window", _no_context) is None
+
+
+def test_template_only_replaces_whole_words(tmp_path):
+    cache = PlanCache(tmp_path / "plans.json")
+    plan = GptSemanticPlan(
+        steps=[
+            GptSemanticStep("switch_app", {"app_name": "vscode"}),
+            GptSemanticStep("insert", {"text": "todo"}),
+        ]
+    )
+    cache.store("switch to vscode and write todo code", plan, "")
+
+    assert cache.lookup("switch to vscode and write fixme code", _no_context) == (
+        GptSemanticPlan(
+            steps=[
+                GptSemanticStep("switch_app", {"app_name": "vscode"}),
+                GptSemanticStep("insert", {"text": "fixme"}),
+            ]
+        )
+    )
+    # "code" only occurs inside "vscode", so it stays a fixed word
+    assert cache.lookup("switch to vscode and write todo notes", _no_context) is None
+
+
+def test_no_template_when_a_word_appears_in_arguments_twice(tmp_path):
+    cache = PlanCache(tmp_path / "plans.json")
+    plan = GptSemanticPlan(
+        steps=[
+            GptSemanticStep("switch_app", {"app_name": "firefox"}),
+            GptSemanticStep("go_url", {"url": "https://search.example/?q=news"}),
+            GptSemanticStep("insert", {"text": "news"}),
+        ]
+    )
+    cache.store("open firefox and find news", plan, "")
+
+    assert cache.lookup("open chrome and find sports", _no_context) is None
+
+
+def test_least_recently_used_plan_is_evicted(tmp_path):
+    cache = PlanCache(tmp_path / "plans.json", capacity=2)
+    for name in ("first", "second"):
+        cache.store(f"press {name}", GptSemanticPlan(steps=[]), "")
+    cache.lookup("press first", _no_context)
+    cache.store("press third", GptSemanticPlan(steps=[]), "")
+
+    assert cache.lookup("press first", _no_context) is not None
+    assert cache.lookup("press second", _no_context) is None
+
+
+def test_plans_persist_across_instances(tmp_path):
+    path = tmp_path / "plans.json"
+    PlanCache(path).store("go to github", _browse_plan("firefox", "github"), "")
+
+    reloaded = PlanCache(path)
+
+    assert reloaded.lookup("go to github", _no_context) == _browse_plan(
+        "firefox", "github"
+    )
+    assert reloaded.lookup("go to gitlab", _no_context) is not None
+
+
+def test_clear_forgets_plans_and_templates(tmp_path):
+    path = tmp_path / "plans.json"
+    cache = PlanCache(path)
+    cache.store("go to github", _browse_plan("firefox", "github"), "")
+    cache.clear()
+
+    assert PlanCache(path).lookup("go to github", _no_context) is None
+
+
+def test_corrupt_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "plans.json"
+    path.write_text("{not json", encoding="utf-8")
+
+    assert PlanCache(path).lookup("go to github", _no_context) is None
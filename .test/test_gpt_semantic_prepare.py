@@ -0,0 +1,57 @@
+"""Preparation tests for GPT semantic commands.
+
+Purpose:
+- Verifies prepared app checks and that they are only current for unchanged state.
+
+Called from:
+- Pytest suite in `user/talon-ai-tools/.test`.
+"""
+
+import sys
+
+sys.path.append(".")
+
+from GPT.semantic.gpt_semantic_prepare import prepare_plan
+from GPT.semantic.gpt_semantic_types import GptSemanticPlan, GptSemanticStep
+
+PLAN = GptSemanticPlan(
+    [
+        GptSemanticStep("switch_app", {"app_name": "Slack"}),
+        GptSemanticStep("launch_app", {"app_name": "gedit"}),
+        GptSemanticStep("switch_app", {"app_name": "Slack"}),
+        GptSemanticStep("new_tab", {}),
+    ]
+)
+CATALOG = (("Text Editor", "gedit"),)
+
+
+def _prepare(calls: list[str]):
+    def is_running(name: str) -> bool:
+        calls.append(f"running:{name}")
+        return name == "Slack"
+
+    def candidates(name: str) -> list[str]:
+        calls.append(f"candidates:{name}")
+        return [name]
+
+    return prepare_plan(
+        PLAN, ["Firefox", "Slack"], CATALOG, is_running, candidates, lambda _p: "fp"
+    )
+
+
+def test_prepare_resolves_each_app_once():
+    calls: list[str] = []
+    prepared = _prepare(calls)
+    assert prepared.running == {"Slack": True, "gedit": False}
+    assert prepared.candidates == {"Slack": ["Slack"], "gedit": ["gedit"]}
+    assert prepared.fingerprint == "fp"
+    assert len(calls) == 4
+
+
+def test_prepared_plan_is_current_only_for_same_state():
+    prepared = _prepare([])
+    assert prepared.is_current(PLAN, ["Firefox", "Slack"], CATALOG)
+    assert not prepared.is_current(PLAN, ["Slack"], CATALOG)
+    assert not prepared.is_current(PLAN, ["Firefox", "Slack"], tuple(list(CATALOG)))
+    other = GptSemanticPlan(list(PLAN.steps))
+    assert not prepared.is_current(other, ["Firefox", "Slack"], CATALOG)
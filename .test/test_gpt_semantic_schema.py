@@ -0,0 +1,54 @@
+"""Schema tests for GPT semantic structured output.
+
+Purpose:
+- Verifies the plan JSON schema follows the action specs and response format fallbacks.
+
+Called from:
+- Pytest suite in `user/talon-ai-tools/.test`.
+"""
+
+import sys
+
+sys.path.append(".")
+
+from GPT.semantic.gpt_semantic_schema import (
+    fallback_format,
+    plan_json_schema,
+    response_format,
+)
+from GPT.semantic.gpt_semantic_types import ACTION_ARG_SPECS
+
+
+def _step_schemas() -> dict:
+    steps = plan_json_schema()["properties"]["steps"]["items"]["anyOf"]
+    return {step["properties"]["action"]["enum"][0]: step for step in steps}
+
+
+def test_schema_has_one_step_per_action():
+    assert list(_step_schemas()) == list(ACTION_ARG_SPECS)
+
+
+def test_step_args_follow_action_specs():
+    steps = _step_schemas()
+    sleep_args = steps["sleep"]["properties"]["args"]
+    assert sleep_args["properties"] == {"ms": {"type": "integer"}}
+    assert sleep_args["required"] == ["ms"]
+    assert steps["copy"]["properties"]["args"]["properties"] == {}
+
+
+def test_schema_objects_are_strict():
+    schema = plan_json_schema()
+    assert schema["required"] == ["steps", "summary"]
+    assert schema["additionalProperties"] is False
+    step = _step_schemas()["go_url"]
+    assert step["additionalProperties"] is False
+    assert step["properties"]["args"]["additionalProperties"] is False
+
+
+def test_response_formats_fall_back_in_order():
+    fmt = response_format("json_schema")
+    assert fmt["json_schema"]["strict"] is True
+    assert fallback_format(fmt) == {"type": "json_object"}
+    assert fallback_format({"type": "json_object"}) is None
+    assert fallback_format(None) is None
+    assert response_format("off") is None
@@ -0,0 +1,130 @@
+"""Synchronization tests for GPT semantic commands.
+
+Purpose:
+- Verifies event-driven focus waiting, the polling fallback, and learned settle delays.
+
+Called from:
+- Pytest suite in `user/talon-ai-tools/.test`.
+"""
+
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(".")
+
+from GPT.semantic import gpt_semantic_sync as sync
+
+
+class FakeUi:
+    def __init__(self, app_name: str):
+        self.app_name = app_name
+        self.callbacks: dict[str, list] = {}
+
+    def active_app(self):
+        return SimpleNamespace(name=self.app_name)
+
+    def register(self, name: str, callback) -> None:
+        self.callbacks.setdefault(name, []).append(callback)
+
+    def focus(self, app_name: str) -> None:
+        self.app_name = app_name
+        for callback in self.callbacks.get("app_activate", []):
+            callback(None)
+
+
+class SleepRecorder:
+    def __init__(self, ui: FakeUi | None = None, focus_after: int = 0):
+        self.sleeps: list[str] = []
+        self.ui = ui
+        self.focus_after = focus_after
+
+    def sleep(self, value: str) -> None:
+        self.sleeps.append(value)
+        if self.ui is not None and len(self.sleeps) == self.focus_after:
+            self.ui.app_name = "Firefox"
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    values = {
+        "user.gpt_semantic_app_focus_timeout_ms": 2000,
+        "user.gpt_semantic_step_settle_ms": 180,
+    }
+    monkeypatch.setattr(sync, "_int_setting", lambda name, default: values[name])
+    monkeypatch.setattr(sync, "settle_learner", sync.SettleLearner())
+    return values
+
+
+def test_focus_event_wakes_the_waiter_without_polling(monkeypatch, settings) -> None:
+    ui = FakeUi("Terminal")
+    signal = sync.FocusSignal()
+    signal.subscribe(ui)
+    monkeypatch.setattr(sync, "talon_ui", ui)
+    monkeypatch.setattr(sync, "focus_signal", signal)
+    threading.Timer(0.05, ui.focus, args=("Firefox",)).start()
+
+    runner = SleepRecorder()
+    started = time.monotonic()
+    sync.wait_for_app_focus(runner, "firefox")
+    assert time.monotonic() - started < sync.EVENT_RECHECK_MS / 1000
+    assert runner.sleeps == []
+
+
+def test_events_that_do_not_wake_the_waiter_are_detected_quickly(
+    monkeypatch, settings
+) -> None:
+    ui = FakeUi("Terminal")
+    signal = sync.FocusSignal()
+    signal.subscribe(ui)
+    monkeypatch.setattr(sync, "talon_ui", ui)
+    monkeypatch.setattr(sync, "focus_signal", signal)
+    # Focus changes, but the event is not delivered while the waiter blocks
+    threading.Timer(0.01, setattr, args=(ui, "app_name", "Firefox")).start()
+
+    started = time.monotonic()
+    sync.wait_for_app_focus(SleepRecorder(), "firefox")
+    assert time.monotonic() - started < sync.EVENT_RECHECK_MS / 1000
+    assert not signal.wakes_waiters
+
+
+def test_polls_with_growing_intervals_without_events(monkeypatch, settings) -> None:
+    ui = FakeUi("Terminal")
+    monkeypatch.setattr(sync, "talon_ui", ui)
+    monkeypatch.setattr(sync, "focus_signal", sync.FocusSignal())
+    runner = SleepRecorder(ui, focus_after=6)
+    sync.wait_for_app_focus(runner, "firefox")
+    assert runner.sleeps == ["10ms", "20ms", "40ms", "80ms", "160ms", "160ms"]
+
+
+def test_times_out_when_the_app_never_focuses(monkeypatch, settings) -> None:
+    settings["user.gpt_semantic_app_focus_timeout_ms"] = 50
+    monkeypatch.setattr(sync, "talon_ui", FakeUi("Terminal"))
+    monkeypatch.setattr(sync, "focus_signal", sync.FocusSignal())
+    runner = SimpleNamespace(sleep=lambda value: time.sleep(int(value[:-2]) / 1000))
+    with pytest.raises(RuntimeError, match="did not become active"):
+        sync.wait_for_app_focus(runner, "firefox")
+
+
+def test_settle_delay_is_learned_per_app(settings) -> None:
+    learner = sync.settle_learner
+    runner = SleepRecorder()
+    sync.settle_after_step("switch_app", runner)
+    learner.observe("firefox", 100)
+    sync.settle_after_step("switch_app", runner)
+    learner.observe("slow app", 1000)
+    sync.settle_after_step("launch_app", runner)
+    sync.settle_after_step("new_tab", runner)
+    assert runner.sleeps == ["180ms", "50ms", "180ms", "180ms"]
+
+
+def test_settle_learner_smooths_latency() -> None:
+    learner = sync.SettleLearner()
+    learner.observe("app", 100)
+    learner.observe("app", 200)
+    assert learner.latency_ms["app"] == pytest.approx(130)
+    assert learner.settle_ms("app", 180) == 65
+    assert learner.settle_ms("unknown", 180) == 180
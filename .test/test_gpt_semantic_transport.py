@@ -3,6 +3,7 @@ import sys
 sys.path.append(".")
 
 from GPT.semantic import gpt_semantic_transport as transport
+from GPT.semantic.gpt_semantic_schema import response_format
 
 
 def test_routes_to_api(monkeypatch) -> None:
@@ -61,3 +62,55 @@ def test_routes_to_llm(monkeypatch) -> None:
     result = transport.request_completion("sys", "user", "m", debug=False)
     assert result == "ok-llm"
     assert calls[0].startswith("llm:resolved-m:sys:user")
+
+
+class FakeFormatError(Exception):
+    pass
+
+
+def _api_helpers(fake_api) -> dict:
+    return {
+        "ResponseFormatError": FakeFormatError,
+        "resolve_model_name": lambda m: m,
+        "format_message": lambda text: {"type": "text", "text": text},
+        "extract_message": lambda resp: resp["text"],
+        "send_request_to_api": fake_api,
+        "send_request_to_llm_cli": None,
+    }
+
+
+def test_passes_response_format_to_api(monkeypatch) -> None:
+    formats: list = []
+
+    def fake_api(_request, _system, _model, response_format=None):
+        formats.append(response_format)
+        return {"type": "text", "text": "{}"}
+
+    monkeypatch.setattr(transport, "_model_endpoint", lambda: "https://example.com")
+    monkeypatch.setattr(transport, "_helpers", lambda: _api_helpers(fake_api))
+
+    transport.request_completion("sys", "user", "m1", False, {"type": "json_object"})
+    assert formats == [{"type": "json_object"}]
+
+
+def test_falls_back_when_response_format_is_rejected(monkeypatch) -> None:
+    formats: list = []
+
+    def fake_api(_request, _system, _model, response_format=None):
+        formats.append(response_format["type"] if response_format else None)
+        if response_format is not None:
+            raise FakeFormatError("unsupported")
+        return {"type": "text", "text": "{}"}
+
+    monkeypatch.setattr(transport, "_model_endpoint", lambda: "https://example.com")
+    monkeypatch.setattr(transport, "_helpers", lambda: _api_helpers(fake_api))
+    monkeypatch.setattr(transport, "_rejected_formats", {})
+
+    fmt = response_format("json_schema")
+    assert transport.request_completion("sys", "user", "m2", False, fmt) == "{}"
+    assert formats == ["json_schema", "json_object", None]
+
+    # Rejected formats are remembered for the model
+    formats.clear()
+    transport.request_completion("sys", "user", "m2", False, fmt)
+    assert formats == [None]
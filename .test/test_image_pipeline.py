@@ -0,0 +1,143 @@
+import base64
+import io
+import random
+import sys
+
+import pytest
+
+sys.path.append(".")
+
+import lib.imagePipeline as imagePipeline
+from lib.imagePipeline import (
+    ImageOptions,
+    ImagePipeline,
+    data_url,
+    encode_image,
+    image_mime,
+    upload_seconds,
+)
+
+needs_pillow = pytest.mark.skipif(
+    imagePipeline.Image is None, reason="Pillow is not installed"
+)
+
+
+def screenshot(width: int, height: int, mode: str = "RGB") -> bytes:
+    """A PNG of noise, which compresses poorly like a photo"""
+    from PIL import Image
+
+    noise = random.Random(0).randbytes(width * height * len(mode))
+    image = Image.frombytes(mode, (width, height), noise)
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def decoded(url: str) -> bytes:
+    return base64.b64decode(url.split(",", 1)[1])
+
+
+def test_mime_is_detected_from_the_data() -> None:
+    assert image_mime(b"\x89PNG\r\n\x1a\n...") == "image/png"
+    assert image_mime(b"\xff\xd8\xff\xe0...") == "image/jpeg"
+    assert image_mime(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert data_url(b"\xff\xd8\xff").startswith("data:image/jpeg;base64,")
+
+
+def test_without_pillow_the_image_is_sent_unchanged(monkeypatch) -> None:
+    monkeypatch.setattr(imagePipeline, "Image", None)
+    data = b"\x89PNG\r\n\x1a\n" + b"pixels" * 100
+    image = encode_image(data, ImageOptions())
+    assert decoded(image.url) == data
+    assert image.mime == "image/png"
+    assert image.bytes == image.original_bytes == len(data)
+
+
+@needs_pillow
+def test_large_screenshot_is_downscaled_and_recompressed() -> None:
+    from PIL import Image
+
+    data = screenshot(400, 200)
+    image = encode_image(data, ImageOptions(max_dimension=100, quality=70))
+    assert image.url.startswith("data:image/jpeg;base64,")
+    assert image.size == (100, 50)
+    assert image.bytes < image.original_bytes == len(data)
+    assert Image.open(io.BytesIO(decoded(image.url))).size == (100, 50)
+
+
+@needs_pillow
+def test_transparent_image_is_flattened_for_jpeg() -> None:
+    image = encode_image(screenshot(80, 40, "RGBA"), ImageOptions(max_dimension=40))
+    assert image.mime == "image/jpeg"
+    assert image.size == (40, 20)
+
+
+@needs_pillow
+def test_webp_output() -> None:
+    image = encode_image(screenshot(300, 300), ImageOptions(format="webp"))
+    assert image.mime == "image/webp"
+    assert image_mime(decoded(image.url)) == "image/webp"
+
+
+@needs_pillow
+def test_original_is_kept_when_recompressing_does_not_help() -> None:
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.new("RGB", (64, 64), "white").save(output, format="PNG")
+    data = output.getvalue()
+    image = encode_image(data, ImageOptions())
+    assert decoded(image.url) == data
+    assert image.mime == "image/png"
+
+
+@needs_pillow
+def test_unreadable_data_is_sent_unchanged() -> None:
+    data = b"\x89PNG\r\n\x1a\nnot really a png"
+    assert decoded(encode_image(data, ImageOptions()).url) == data
+
+
+def test_pipeline_reuses_processed_images(monkeypatch) -> None:
+    monkeypatch.setattr(imagePipeline, "Image", None)
+    pipeline = ImagePipeline(max_entries=2)
+    first, second, third = (data_url(b"\x89PNG\r\n\x1a\n" + bytes([n])) for n in b"123")
+    options = ImageOptions()
+    other_options = ImageOptions(quality=50)
+
+    assert not pipeline.prepare(first, options).cached  # type: ignore
+    assert pipeline.prepare(first, options).cached  # type: ignore
+    # Different options are processed separately
+    assert not pipeline.prepare(first, other_options).cached  # type: ignore
+    pipeline.prepare(second, options)
+    pipeline.prepare(third, options)
+    # The least recently used entries were evicted
+    assert not pipeline.prepare(first, options).cached  # type: ignore
+
+    stats = pipeline.stats.snapshot()
+    assert stats["images"] == 6
+    assert stats["cache_hits"] == 1
+
+
+def test_pipeline_ignores_urls_that_are_not_data() -> None:
+    pipeline = ImagePipeline()
+    assert pipeline.prepare("https://example.com/cat.png", ImageOptions()) is None
+    assert pipeline.stats.snapshot()["images"] == 0
+
+
+@needs_pillow
+def test_pipeline_records_savings() -> None:
+    pipeline = ImagePipeline()
+    url = data_url(screenshot(400, 200))
+    options = ImageOptions(max_dimension=100)
+    image = pipeline.prepare(url, options)
+    pipeline.prepare(url, options)
+    stats = pipeline.stats.snapshot()
+    saved = image.original_bytes - image.bytes  # type: ignore
+    assert stats["saved_bytes"] == 2 * saved
+    assert stats["saved_bytes"] > 0
+    assert stats["encode_ms"] > 0
+
+
+def test_upload_seconds_counts_base64_overhead() -> None:
+    assert upload_seconds(3_000_000, 8.0) == pytest.approx(4.0)
+    assert upload_seconds(3_000_000, 0) == 0.0
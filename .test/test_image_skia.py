@@ -0,0 +1,118 @@
+import struct
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(".")
+
+from talon_package import import_talon_module, talon
+
+imageSkia = import_talon_module("lib.imageSkia")
+imagePipeline = import_talon_module("lib.imagePipeline")
+ImageOptions = imagePipeline.ImageOptions
+
+PNG = b"\x89PNG\r\n\x1a\n"
+JPEG = b"\xff\xd8\xff"
+
+
+def fake_png(width: int, height: int) -> bytes:
+    """Data the fake skia decodes, about one byte per 10 pixels like a screenshot"""
+    return PNG + struct.pack(">II", width, height) + bytes(width * height // 10)
+
+
+class FakeImage:
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FakeImage":
+        return cls(*struct.unpack(">II", data[8:16]))
+
+    def encode(self, format: str, quality: int) -> SimpleNamespace:
+        if format == "jpeg":
+            return SimpleNamespace(
+                data=lambda: JPEG + bytes(self.width * self.height // 40)
+            )
+        return SimpleNamespace(data=lambda: fake_png(self.width, self.height) + b"\0")
+
+
+class FakeSurface:
+    def __init__(self, width: int, height: int):
+        self.size = (width, height)
+        self.drawn: list = []
+
+    def canvas(self) -> "FakeSurface":
+        return self
+
+    def clear(self, color: str) -> None:
+        pass
+
+    def draw_image_rect(self, image, source, destination) -> None:
+        self.drawn.append(image)
+
+    def snapshot(self) -> FakeImage:
+        return FakeImage(*self.size)
+
+
+@pytest.fixture
+def notifications(monkeypatch):
+    sent: list[str] = []
+    monkeypatch.setattr(talon.app, "notify", sent.append, raising=False)
+    monkeypatch.setattr(imageSkia, "_warned_unavailable", False)
+    return sent
+
+
+@pytest.fixture
+def skia(monkeypatch):
+    fake = SimpleNamespace(
+        Image=FakeImage, Surface=FakeSurface, Rect=lambda *args: args
+    )
+    monkeypatch.setattr(imageSkia, "skia", fake)
+    return fake
+
+
+def test_skia_downscales_and_recompresses(skia, notifications) -> None:
+    data = fake_png(4000, 2000)
+    image = imageSkia.encode_talon_image(data, ImageOptions(max_dimension=1000))
+    assert image.size == (1000, 500)
+    assert image.mime == "image/jpeg"
+    assert image.url.startswith("data:image/jpeg;base64,")
+    assert image.bytes < image.original_bytes == len(data)
+    assert notifications == []
+
+
+def test_original_is_kept_when_skia_does_not_help(skia, notifications) -> None:
+    data = fake_png(100, 50)
+    image = imageSkia.encode_talon_image(data, ImageOptions(format="png"))
+    assert image.url == imagePipeline.data_url(data)
+    assert image.size == (100, 50)
+
+
+def test_failing_skia_falls_back_to_pillow(skia, monkeypatch, notifications) -> None:
+    skia.Image = SimpleNamespace()
+    pillow: list[bytes] = []
+
+    def encode_image(data, options):
+        pillow.append(data)
+        return imagePipeline.unchanged(data)
+
+    monkeypatch.setattr(imagePipeline, "Image", object())
+    monkeypatch.setattr(imageSkia, "encode_image", encode_image)
+    data = fake_png(100, 50)
+    imageSkia.encode_talon_image(data, ImageOptions())
+    assert pillow == [data]
+    assert notifications == []
+
+
+def test_without_skia_or_pillow_the_user_is_told_once(
+    monkeypatch, notifications
+) -> None:
+    monkeypatch.setattr(imageSkia, "skia", None)
+    monkeypatch.setattr(imagePipeline, "Image", None)
+    data = fake_png(100, 50)
+    for _ in range(2):
+        image = imageSkia.encode_talon_image(data, ImageOptions())
+        assert image.url == imagePipeline.data_url(data)
+    assert len(notifications) == 1
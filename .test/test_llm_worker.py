@@ -0,0 +1,119 @@
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(".")
+
+from talon_package import import_talon_module, talon
+
+llmWorker = import_talon_module("lib.llmWorker")
+LLMWorker = llmWorker.LLMWorker
+
+# Stands in for the llm package, which the worker imports its CLI from
+FAKE_LLM_CLI = """
+import sys
+
+import click
+
+print("A plugin that prints while it is imported")
+
+
+@click.command()
+@click.argument("prompt")
+@click.option("--fail", is_flag=True)
+@click.option("--corrupt", is_flag=True)
+def cli(prompt, fail, corrupt):
+    if fail:
+        raise click.ClickException("Unknown model")
+    if corrupt:
+        sys.__stdout__.write("Not a reply\\n")
+        sys.__stdout__.flush()
+    for word in prompt.split():
+        click.echo(word + " ", nl=False)
+    click.echo(sys.stdin.read(), nl=False)
+"""
+
+
+@pytest.fixture
+def worker(monkeypatch, tmp_path):
+    package = tmp_path / "llm"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "cli.py").write_text(FAKE_LLM_CLI)
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    monkeypatch.setitem(talon.settings.values, "user.model_llm_python", sys.executable)
+    LLMWorker._stop()
+    yield LLMWorker
+    LLMWorker._stop()
+
+
+def test_run_returns_the_output(worker) -> None:
+    assert worker.run(["Hello world"], b"input") == "Hello world input"
+
+
+def test_run_streams_chunks(worker) -> None:
+    chunks: list[str] = []
+    text = worker.run(["one two three"], None, chunks.append)
+    assert chunks == ["one ", "two ", "three "]
+    assert text == "".join(chunks)
+
+
+def test_failure_matches_the_cli_error(worker) -> None:
+    with pytest.raises(llmWorker.LLMWorkerError, match="^Error: Unknown model$"):
+        worker.run(["--fail", "Hello"], None)
+    # The worker keeps serving requests after a failure
+    assert worker.run(["Hello"], None) == "Hello "
+
+
+def test_unreadable_reply_falls_back_to_the_executable(worker) -> None:
+    assert worker.run(["--corrupt", "Hello"], None) is None
+    assert worker._process is None
+    # The next request starts a new worker
+    assert worker.run(["Hello"], None) == "Hello "
+
+
+def test_dead_worker_is_restarted_by_the_health_check(worker) -> None:
+    worker.start()
+    process = worker._process
+    process.kill()
+    process.wait()
+
+    worker.health_check()
+    assert worker._process is not None and worker._process is not process
+    assert worker._process.poll() is None
+    assert worker.run(["Hello"], None) == "Hello "
+
+
+def test_dead_worker_is_restarted_by_the_next_request(worker) -> None:
+    worker.start()
+    worker._process.kill()
+    worker._process.wait()
+    assert worker.run(["Hello"], None) == "Hello "
+
+
+def test_unavailable_worker_falls_back_to_the_executable(worker, monkeypatch) -> None:
+    monkeypatch.setitem(talon.settings.values, "user.model_llm_python", "")
+    monkeypatch.setitem(talon.settings.values, "user.model_llm_path", "missing-llm")
+    assert worker.run(["Hello"], None) is None
+
+
+def test_scheduled_health_check_does_not_block_the_caller(monkeypatch) -> None:
+    release = threading.Event()
+    checked: list[threading.Thread] = []
+
+    def slow_health_check() -> None:
+        checked.append(threading.current_thread())
+        release.wait(5)
+
+    monkeypatch.setattr(LLMWorker, "health_check", slow_health_check)
+    started = time.monotonic()
+    LLMWorker.schedule_health_check()
+    assert time.monotonic() - started < 1
+    release.set()
+
+    deadline = time.monotonic() + 5
+    while not checked and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert checked and checked[0] is not threading.main_thread()
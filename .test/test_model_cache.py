@@ -0,0 +1,49 @@
+import sys
+
+sys.path.append(".")
+
+from lib.modelCache import ResponseCache
+
+
+def test_key_ignores_payload_order() -> None:
+    first = ResponseCache.make_key({"model": "m", "messages": [1, 2]})
+    second = ResponseCache.make_key({"messages": [1, 2], "model": "m"})
+    assert first == second
+    assert first != ResponseCache.make_key({"model": "m", "messages": [2, 1]})
+
+
+def test_get_counts_hits_and_misses(tmp_path) -> None:
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    assert cache.get("k") is None
+    cache.put("k", "value")
+    assert cache.get("k") == "value"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": 5}
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch) -> None:
+    from lib import modelCache
+
+    now = [1000.0]
+    monkeypatch.setattr(modelCache.time, "time", lambda: now[0])
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=10)
+    cache.put("k", "value")
+    now[0] += 11
+    assert cache.get("k") is None
+
+
+def test_evicts_least_recently_used_over_size_cap(tmp_path, monkeypatch) -> None:
+    from lib import modelCache
+
+    now = [1000.0]
+    monkeypatch.setattr(modelCache.time, "time", lambda: now[0])
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_bytes=10)
+    cache.put("a", "aaaa")
+    now[0] += 1
+    cache.put("b", "bbbb")
+    now[0] += 1
+    assert cache.get("a") == "aaaa"
+    now[0] += 1
+    cache.put("c", "cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
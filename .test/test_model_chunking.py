@@ -0,0 +1,99 @@
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(".")
+
+from lib.modelChunking import (
+    TextChunk,
+    group_for_reduce,
+    join_chunks,
+    map_in_order,
+    split_text,
+)
+
+
+def rejoin(chunks: list[TextChunk]) -> str:
+    return "".join(chunk.text + chunk.separator for chunk in chunks)
+
+
+def test_small_text_is_one_chunk() -> None:
+    assert split_text("one paragraph", 100, len) == [TextChunk("one paragraph", "")]
+
+
+def test_splits_on_paragraph_boundaries() -> None:
+    text = "first paragraph\n\nsecond paragraph\n\nthird paragraph"
+    chunks = split_text(text, 20, len)
+    assert [chunk.text for chunk in chunks] == [
+        "first paragraph",
+        "second paragraph",
+        "third paragraph",
+    ]
+    assert rejoin(chunks) == text
+
+
+def test_keeps_fenced_code_blocks_together() -> None:
+    text = "intro\n\n```python\ndef a():\n\n    return 1\n```\n\noutro"
+    chunks = split_text(text, 40, len)
+    assert "```python\ndef a():\n\n    return 1\n```" in [
+        chunk.text for chunk in chunks
+    ]
+    assert rejoin(chunks) == text
+
+
+def test_oversized_blocks_are_split_on_lines_and_characters() -> None:
+    text = "short line\n" + "x" * 50
+    chunks = split_text(text, 20, len)
+    assert all(len(chunk.text) <= 20 for chunk in chunks)
+    assert rejoin(chunks) == text
+
+
+def test_join_chunks_uses_original_separators() -> None:
+    chunks = [TextChunk("a", "\n\n"), TextChunk("b", "  "), TextChunk("c", "\n")]
+    assert join_chunks(["A", "B", "C"], chunks) == "A\n\nB\nC"
+
+
+def test_group_for_reduce_keeps_order_within_budget() -> None:
+    assert group_for_reduce(["aa", "bb", "cc", "d"], 4, len) == [
+        ["aa", "bb"],
+        ["cc", "d"],
+    ]
+
+
+def test_map_in_order_returns_results_in_item_order() -> None:
+    def work(item: int) -> int:
+        time.sleep(0.01 * (5 - item))
+        return item * 10
+
+    assert map_in_order([1, 2, 3, 4], work, 4) == [10, 20, 30, 40]
+
+
+def test_map_in_order_bounds_concurrency() -> None:
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work(item: int) -> int:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return item
+
+    map_in_order(list(range(8)), work, 2)
+    assert peak <= 2
+
+
+def test_map_in_order_raises_the_first_failure() -> None:
+    def work(item: int) -> int:
+        if item == 2:
+            raise ValueError("bad chunk")
+        return item
+
+    with pytest.raises(ValueError, match="bad chunk"):
+        map_in_order([1, 2, 3], work, 2)
@@ -0,0 +1,57 @@
+import sys
+
+sys.path.append(".")
+
+from lib.modelContext import ContextStore
+
+
+def message(text: str) -> dict:
+    return {"type": "text", "text": text}
+
+
+def test_store_iterates_messages_in_order() -> None:
+    store = ContextStore(estimate=len)
+    store.add(message("first"))
+    store.add(message("second"))
+    assert [item["text"] for item in store] == ["first", "second"]
+    assert len(store) == 2
+    assert store.total_tokens == 11
+
+
+def test_enforce_budget_evicts_oldest_but_keeps_newest() -> None:
+    store = ContextStore(estimate=len)
+    for text in ["aaaa", "bbbb", "cccc"]:
+        store.add(message(text))
+    version = store.version
+    evicted = store.enforce_budget(5)
+    assert [item["text"] for item in evicted] == ["aaaa", "bbbb"]
+    assert [item["text"] for item in store] == ["cccc"]
+    assert store.version > version
+
+
+def test_enforce_budget_by_relevance() -> None:
+    store = ContextStore(estimate=lambda text: 10)
+    store.add(message("python list comprehension"))
+    store.add(message("grocery list"))
+    store.add(message("newest"))
+    evicted = store.enforce_budget(20, policy="relevance", query="python question")
+    assert [item["text"] for item in evicted] == ["grocery list"]
+
+
+def test_evicted_summaries_are_not_summarized_again() -> None:
+    summarized: list[list[dict]] = []
+    store = ContextStore(estimate=lambda text: 10)
+    store.on_evict = summarized.append
+    store.add(message("summary"), summary=True)
+    store.add(message("original"))
+    store.add(message("newest"))
+    store.enforce_budget(10)
+    assert summarized == [[message("original")]]
+
+
+def test_no_budget_means_no_eviction() -> None:
+    store = ContextStore(estimate=lambda text: 1000)
+    store.add(message("a"))
+    store.add(message("b"))
+    assert store.enforce_budget(0) == []
+    assert len(store) == 2
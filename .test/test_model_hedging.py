@@ -0,0 +1,192 @@
+import sys
+import threading
+
+import pytest
+
+sys.path.append(".")
+
+from lib.modelHedging import (
+    PRIMARY,
+    SECONDARY,
+    HedgeOutcome,
+    HedgeStats,
+    LatencyTracker,
+    hedged_call,
+)
+
+
+def answer(value: str, started: threading.Event | None = None):
+    def attempt(cancel_event: threading.Event, claim) -> str:
+        if started is not None:
+            started.set()
+        return value
+
+    return attempt
+
+
+def blocked(started: threading.Event, cancelled: threading.Event):
+    """An attempt that waits until it is cancelled"""
+
+    def attempt(cancel_event: threading.Event, claim) -> str:
+        started.set()
+        cancel_event.wait(5)
+        if cancel_event.is_set():
+            cancelled.set()
+        raise RuntimeError("cancelled")
+
+    return attempt
+
+
+def failing(message: str):
+    def attempt(cancel_event: threading.Event, claim) -> str:
+        raise RuntimeError(message)
+
+    return attempt
+
+
+def test_latency_tracker_percentile_and_delay() -> None:
+    tracker = LatencyTracker(window=100, min_samples=5)
+    assert tracker.percentile("m", 95) is None
+    assert tracker.delay("m", 95, default=2, minimum=0.25, maximum=10) == 2
+    for seconds in range(1, 11):
+        tracker.record("m", seconds / 10)
+    assert tracker.percentile("m", 50) == pytest.approx(0.5)
+    assert tracker.percentile("m", 95) == pytest.approx(1.0)
+    assert tracker.delay("m", 50, default=2, minimum=0.6, maximum=10) == 0.6
+    assert tracker.delay("m", 95, default=2, minimum=0, maximum=0.8) == 0.8
+
+
+def test_latency_tracker_keeps_a_window() -> None:
+    tracker = LatencyTracker(window=3, min_samples=1)
+    for seconds in (9, 9, 1, 1, 1):
+        tracker.record("m", seconds)
+    assert tracker.percentile("m", 100) == 1
+
+
+def test_fast_primary_is_not_hedged() -> None:
+    secondary_started = threading.Event()
+    outcome = hedged_call(
+        answer("primary"), answer("secondary", secondary_started), delay=5
+    )
+    assert outcome.result == "primary"
+    assert outcome.winner == PRIMARY
+    assert not outcome.hedged
+    assert not secondary_started.is_set()
+
+
+def test_slow_primary_is_hedged_and_cancelled() -> None:
+    started, cancelled = threading.Event(), threading.Event()
+    outcome = hedged_call(blocked(started, cancelled), answer("secondary"), delay=0)
+    assert outcome.result == "secondary"
+    assert outcome.winner == SECONDARY
+    assert outcome.hedged
+    assert cancelled.wait(5)
+
+
+def test_first_streamed_token_prevents_the_hedge() -> None:
+    chunks: list[str] = []
+    secondary_started = threading.Event()
+
+    def streaming(cancel_event: threading.Event, claim) -> str:
+        if claim():
+            chunks.append("first")
+        # Finishing takes longer than the hedge delay
+        cancel_event.wait(0.2)
+        return "streamed"
+
+    outcome = hedged_call(streaming, answer("late", secondary_started), delay=0.05)
+    assert outcome.result == "streamed"
+    assert outcome.winner == PRIMARY
+    assert not outcome.hedged
+    assert outcome.elapsed < 0.2
+    assert chunks == ["first"]
+    assert not secondary_started.is_set()
+
+
+def test_secondary_stream_claims_the_race() -> None:
+    chunks: list[str] = []
+
+    def slow(cancel_event: threading.Event, claim) -> str:
+        cancel_event.wait(5)
+        if claim():
+            chunks.append("primary")
+        return "primary"
+
+    def streaming(cancel_event: threading.Event, claim) -> str:
+        if claim():
+            chunks.append("secondary")
+        return "secondary"
+
+    outcome = hedged_call(slow, streaming, delay=0)
+    assert outcome.result == "secondary"
+    assert chunks == ["secondary"]
+
+
+def test_primary_failure_before_hedge_is_raised() -> None:
+    secondary_started = threading.Event()
+    with pytest.raises(RuntimeError, match="primary"):
+        hedged_call(failing("primary"), answer("secondary", secondary_started), 5)
+    assert not secondary_started.is_set()
+
+
+def test_failed_secondary_waits_for_primary() -> None:
+    release = threading.Event()
+
+    def slow(cancel_event: threading.Event, claim) -> str:
+        release.wait(5)
+        return "primary"
+
+    def secondary(cancel_event: threading.Event, claim) -> str:
+        release.set()
+        raise RuntimeError("secondary")
+
+    outcome = hedged_call(slow, secondary, delay=0)
+    assert outcome.result == "primary"
+    assert outcome.hedged
+
+
+def test_both_failing_raises_the_primary_error() -> None:
+    release = threading.Event()
+
+    def slow_failure(cancel_event: threading.Event, claim) -> str:
+        release.wait(5)
+        raise RuntimeError("primary")
+
+    def secondary(cancel_event: threading.Event, claim) -> str:
+        release.set()
+        raise RuntimeError("secondary")
+
+    with pytest.raises(RuntimeError, match="primary"):
+        hedged_call(slow_failure, secondary, delay=0)
+
+
+def test_caller_cancellation_cancels_both_attempts() -> None:
+    started, cancelled = threading.Event(), threading.Event()
+
+    def check_cancelled() -> None:
+        if started.is_set():
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        hedged_call(
+            blocked(started, cancelled),
+            answer("secondary"),
+            delay=5,
+            check_cancelled=check_cancelled,
+            poll_interval=0.01,
+        )
+    assert cancelled.wait(5)
+
+
+def test_hedge_stats() -> None:
+    stats = HedgeStats()
+    stats.record(HedgeOutcome("a", PRIMARY, False, 0.1))
+    stats.record(HedgeOutcome("b", SECONDARY, True, 0.5))
+    stats.record(HedgeOutcome("c", PRIMARY, True, 0.6))
+    stats.record(None)
+    assert stats.snapshot() == {
+        "requests": 4,
+        "hedged": 2,
+        "secondary_wins": 1,
+        "failures": 1,
+    }
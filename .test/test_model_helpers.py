@@ -0,0 +1,351 @@
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(".")
+
+from talon_package import ROOT, import_talon_module, talon
+
+from lib.tokenEstimator import count_message_tokens
+
+helpers = import_talon_module("lib.modelHelpers")
+
+SYSTEM_MESSAGE = "You are a helpful assistant."
+
+
+@pytest.fixture
+def llm_cli(monkeypatch, tmp_path):
+    """Send llm requests to the fake llm executable and count the prompt tokens"""
+    monkeypatch.setattr(helpers.tracer, "writer", None)
+    monkeypatch.setattr(helpers, "model_configs", {})
+    monkeypatch.setattr(
+        helpers, "_model_router", helpers.ModelRouter(tmp_path / "latency.json")
+    )
+    for name, value in {
+        "user.model_llm_path": str(ROOT / ".bench" / "stubs" / "llm"),
+        "user.model_llm_worker": False,
+        "user.model_cache_enabled": False,
+        "user.model_verbose_notifications": False,
+    }.items():
+        monkeypatch.setitem(talon.settings.values, name, value)
+    monkeypatch.setenv("BENCH_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("BENCH_LLM_TPS", "0")
+
+    counted: list[tuple[list[str], int, int]] = []
+
+    def spy(texts: list[str], images: int = 0, model_id: str = "") -> int:
+        tokens = count_message_tokens(texts, images, model_id)
+        counted.append((texts, images, tokens))
+        return tokens
+
+    monkeypatch.setattr(helpers, "count_message_tokens", spy)
+    return counted
+
+
+def test_llm_cli_counts_text_content_once(llm_cli) -> None:
+    prompt = helpers.format_message("Fix the grammar")
+    content = helpers.format_message("this sentence are wrong " * 50)
+    helpers.build_request(prompt, content)
+
+    helpers.send_request_to_llm_cli(
+        prompt, content, SYSTEM_MESSAGE, "gpt-4o-mini", False
+    )
+    [(texts, images, tokens)] = llm_cli
+    assert texts == [SYSTEM_MESSAGE, prompt["text"]]
+    assert images == 0
+    assert tokens == count_message_tokens([SYSTEM_MESSAGE, prompt["text"]])
+    assert tokens < count_message_tokens(
+        [SYSTEM_MESSAGE, prompt["text"], content["text"]]
+    )
+
+
+def test_llm_cli_counts_image_content(llm_cli) -> None:
+    prompt = helpers.format_message("Describe the image")
+    image = {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}}
+    helpers.build_request(prompt, image)  # type: ignore
+
+    helpers.send_request_to_llm_cli(
+        prompt, image, SYSTEM_MESSAGE, "gpt-4o-mini", False  # type: ignore
+    )
+    [(texts, images, _)] = llm_cli
+    assert texts == [SYSTEM_MESSAGE, "Describe the image"]
+    assert images == 1
+
+
+def test_text_that_fits_once_is_not_rejected(llm_cli, monkeypatch) -> None:
+    prompt = helpers.format_message("Summarize")
+    content = helpers.format_message("word " * 600)
+    helpers.build_request(prompt, content)
+    prompt_tokens = count_message_tokens([SYSTEM_MESSAGE, prompt["text"]])
+    # Room for the prompt and the response, but not for the content twice
+    monkeypatch.setitem(talon.settings.values, "user.model_max_output_tokens", 256)
+    monkeypatch.setitem(
+        talon.settings.values, "user.model_context_window", prompt_tokens + 300
+    )
+
+    response = helpers.send_request_to_llm_cli(
+        prompt, content, SYSTEM_MESSAGE, "gpt-4o-mini", False
+    )
+    assert response["type"] == "text"
+
+
+def fake_llm(tmp_path, status: int = 0):
+    """An llm executable that writes more than a pipe buffer to stderr"""
+    script = tmp_path / "llm"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "sys.stderr.write('warning ' * 100_000 + 'Error: model overloaded')\n"
+        "print('Answer')\n"
+        f"sys.exit({status})\n"
+    )
+    script.chmod(0o755)
+    return [str(script), "prompt"]
+
+
+def test_streamed_llm_output_is_not_blocked_by_stderr(llm_cli, tmp_path) -> None:
+    chunks: list[str] = []
+    result: list = []
+    thread = threading.Thread(
+        target=lambda: result.append(
+            helpers.stream_llm_cli(fake_llm(tmp_path), None, {}, chunks.append)
+        ),
+        daemon=True,
+    )
+    thread.start()
+    thread.join(10)
+    assert result and result[0]["text"] == "Answer"
+    assert "".join(chunks).strip() == "Answer"
+
+
+def test_streamed_llm_failure_reports_stderr(llm_cli, tmp_path) -> None:
+    with pytest.raises(Exception, match="model overloaded$"):
+        helpers.stream_llm_cli(fake_llm(tmp_path, 1), None, {}, lambda chunk: None)
+
+
+@pytest.fixture
+def auto_models(monkeypatch, tmp_path):
+    monkeypatch.setattr(helpers.tracer, "writer", None)
+    monkeypatch.setattr(
+        helpers, "model_configs", {"fast": {"name": "fast"}, "slow": {"name": "slow"}}
+    )
+    monkeypatch.setattr(
+        helpers, "_model_router", helpers.ModelRouter(tmp_path / "latency.json")
+    )
+    monkeypatch.setitem(talon.settings.values, "user.model_default", "auto")
+    # Defined in GPT/gpt.py, which these tests do not load
+    monkeypatch.setattr(
+        talon.actions.user, "gpt_additional_user_context", lambda: [], raising=False
+    )
+    monkeypatch.setitem(
+        talon.settings.values, "user.model_verbose_notifications", False
+    )
+
+
+def test_default_auto_model_is_routed_with_failover(auto_models) -> None:
+    prepared = helpers.prepare_request(
+        helpers.format_message("Summarize"),
+        helpers.format_message("text " * 3000),
+        "model",
+        "",
+    )
+    assert prepared["model"] == "fast"
+    assert prepared["fallback_models"] == ["slow"]
+
+
+def test_default_auto_model_is_routed_by_prompt_size(auto_models) -> None:
+    for _ in range(5):
+        helpers._model_router.record("fast", 3000, 20.0, ok=True)
+        helpers._model_router.record("slow", 3000, 2.0, ok=True)
+        helpers._model_router.record("fast", 10, 1.0, ok=True)
+
+    large = helpers.prepare_request(
+        helpers.format_message("Summarize"),
+        helpers.format_message("text " * 3000),
+        "model",
+        "",
+    )
+    small = helpers.prepare_request(
+        helpers.format_message("Summarize"), helpers.format_message("text"), "model", ""
+    )
+    assert [large["model"], *large["fallback_models"]] == ["slow", "fast"]
+    assert small["model"] == "fast"
+
+
+def test_named_model_has_no_fallbacks(auto_models) -> None:
+    assert helpers.resolve_models("slow", 100) == ["slow"]
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str = "Answer"):
+        self.status_code = status_code
+        self.text = text
+
+    def close(self) -> None:
+        pass
+
+    def json(self) -> dict:
+        if self.status_code != 200:
+            return {"error": {"message": f"HTTP {self.status_code}: {self.text}"}}
+        return {"choices": [{"message": {"content": self.text}}]}
+
+
+@pytest.fixture
+def api(auto_models, monkeypatch, tmp_path):
+    """Answer API requests with the given status codes, in order, per model"""
+    monkeypatch.setitem(talon.settings.values, "user.model_endpoint", "http://stub")
+    monkeypatch.setitem(talon.settings.values, "user.model_cache_enabled", False)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    recorded: list[tuple[str, bool]] = []
+    monkeypatch.setattr(
+        helpers._model_router,
+        "record",
+        lambda model, tokens, seconds, ok: recorded.append((model, ok)),
+    )
+    # An int is answered with that status, a tuple with a status and error message
+    statuses: dict[str, list[int | tuple[int, str]]] = {}
+
+    def post_with_retries(url, headers, data, model_id, stream):
+        status = statuses[model_id].pop(0)
+        return (
+            FakeResponse(*status) if isinstance(status, tuple) else FakeResponse(status)
+        )
+
+    monkeypatch.setattr(helpers, "post_with_retries", post_with_retries)
+    return SimpleNamespace(recorded=recorded, statuses=statuses)
+
+
+def auto_request(size: int = 10) -> "helpers.PreparedRequest":
+    return helpers.prepare_request(
+        helpers.format_message("Summarize"),
+        helpers.format_message("text " * size),
+        "auto",
+        "",
+    )
+
+
+def test_server_errors_are_recorded_and_fail_over(api) -> None:
+    api.statuses.update(fast=[503], slow=[200])
+    response = helpers.dispatch_request(auto_request())
+    assert response["text"] == "Answer"
+    assert api.recorded == [("fast", False), ("slow", True)]
+
+
+def test_bad_requests_are_not_recorded_and_do_not_fail_over(api) -> None:
+    api.statuses.update(fast=[404], slow=[200])
+    with pytest.raises(Exception):
+        helpers.dispatch_request(auto_request())
+    assert api.recorded == []
+    assert api.statuses["slow"] == [200]
+
+
+def test_client_side_failures_are_not_recorded(api, monkeypatch) -> None:
+    monkeypatch.delenv("OPENAI_API_KEY")
+    with pytest.raises(Exception, match="OPENAI_API_KEY"):
+        helpers.dispatch_request(auto_request())
+
+    monkeypatch.setitem(talon.settings.values, "user.model_context_window", 1000)
+    with pytest.raises(helpers.PromptTooLargeError):
+        helpers.dispatch_request(auto_request(size=5000))
+    assert api.recorded == []
+
+
+def test_cached_responses_are_not_recorded(api, monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(
+        helpers, "_response_cache", helpers.ResponseCache(tmp_path / "cache.sqlite3")
+    )
+    monkeypatch.setitem(talon.settings.values, "user.model_cache_enabled", True)
+    api.statuses.update(fast=[200])
+    helpers.dispatch_request(auto_request())
+    helpers.dispatch_request(auto_request())
+    assert api.recorded == [("fast", True)]
+
+
+def test_llm_errors_of_the_model_api_are_unavailable() -> None:
+    assert isinstance(
+        helpers.llm_failure("Error: 503 Service Unavailable"),
+        helpers.ModelUnavailableError,
+    )
+    assert isinstance(
+        helpers.llm_failure("Error: Rate limit reached for requests"),
+        helpers.ModelUnavailableError,
+    )
+    assert not isinstance(
+        helpers.llm_failure("Error: Unknown model: gpt-5-typo"),
+        helpers.ModelUnavailableError,
+    )
+
+
+JSON_SCHEMA = {"type": "json_schema", "json_schema": {"name": "plan", "schema": {}}}
+
+
+def test_rejected_response_format_is_reported_for_fallback(api) -> None:
+    api.statuses.update(fast=[(400, "Invalid parameter: 'response_format'")])
+    with pytest.raises(helpers.ResponseFormatError):
+        helpers.send_request_to_api(
+            {"role": "user", "content": [helpers.format_message("Plan")]},
+            SYSTEM_MESSAGE,
+            "fast",
+            response_format=JSON_SCHEMA,
+        )
+
+
+def test_other_bad_requests_with_a_response_format_fail_normally(api) -> None:
+    api.statuses.update(fast=[(400, "This model's maximum context length is 8192")])
+    with pytest.raises(Exception) as error:
+        helpers.send_request_to_api(
+            {"role": "user", "content": [helpers.format_message("Plan")]},
+            SYSTEM_MESSAGE,
+            "fast",
+            response_format=JSON_SCHEMA,
+        )
+    assert not isinstance(error.value, helpers.ResponseFormatError)
+    assert "maximum context length" in str(error.value)
+
+
+@pytest.fixture
+def hedged(api, monkeypatch):
+    """Hedge slow requests to "fast" with "slow" right away and record notifications"""
+    hedge = {"model": "slow", "delay_ms": 0, "min_delay_ms": 0}
+    monkeypatch.setitem(helpers.model_configs, "fast", {"name": "fast", "hedge": hedge})
+    # The primary only answers once the hedge has been sent
+    hedge_sent = threading.Event()
+    post_with_retries = helpers.post_with_retries
+
+    def slow_primary(url, headers, data, model_id, stream):
+        if model_id == "slow":
+            hedge_sent.set()
+        else:
+            hedge_sent.wait(5)
+        return post_with_retries(url, headers, data, model_id, stream)
+
+    monkeypatch.setattr(helpers, "post_with_retries", slow_primary)
+    notifications: list[str] = []
+    monkeypatch.setattr(
+        talon.actions.user, "notify", notifications.append, raising=False
+    )
+    api.notifications = notifications
+    return api
+
+
+def hedged_request() -> "helpers.GPTMessageItem":
+    return helpers.send_request_to_api(
+        {"role": "user", "content": [helpers.format_message("Plan")]},
+        SYSTEM_MESSAGE,
+        "fast",
+    )
+
+
+def test_failed_hedge_attempt_does_not_notify_when_the_other_wins(hedged) -> None:
+    hedged.statuses.update(fast=[503], slow=[200])
+    assert hedged_request()["text"] == "Answer"
+    assert hedged.notifications == []
+
+
+def test_hedged_request_notifies_once_when_every_attempt_fails(hedged) -> None:
+    hedged.statuses.update(fast=[503], slow=[500])
+    with pytest.raises(helpers.ModelUnavailableError):
+        hedged_request()
+    assert hedged.notifications == ["GPT Failure: Check the Talon Log"]
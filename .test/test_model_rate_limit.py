@@ -0,0 +1,184 @@
+import sys
+
+import pytest
+
+sys.path.append(".")
+
+from lib.modelRateLimit import (
+    DeadlineExceeded,
+    RateLimiter,
+    backoff_delay,
+    call_with_retries,
+    parse_duration,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict | None = None) -> None:
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def limiter(clock: FakeClock, requests_per_minute: float = 0) -> RateLimiter:
+    return RateLimiter(requests_per_minute, clock=clock, sleep=clock.sleep)
+
+
+def test_parse_duration() -> None:
+    assert parse_duration("1s") == 1
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("1h2m3.5s") == pytest.approx(3723.5)
+    assert parse_duration("2.5") == 2.5
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+
+def test_parse_retry_after() -> None:
+    assert parse_retry_after({"retry-after": "3"}) == 3
+    assert parse_retry_after({"retry-after-ms": "250", "retry-after": "3"}) == 0.25
+    date = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert parse_retry_after({"retry-after": date}, now=lambda: 1445412470) == 10
+    assert parse_retry_after({}) is None
+
+
+def test_backoff_grows_exponentially_up_to_the_cap() -> None:
+    assert [backoff_delay(i, rng=lambda: 1.0) for i in range(4)] == [0.5, 1, 2, 4]
+    assert backoff_delay(20, cap=30, rng=lambda: 1.0) == 30
+    assert backoff_delay(3, rng=lambda: 0.5) == 2
+
+
+def test_bucket_spaces_out_requests_over_the_limit() -> None:
+    clock = FakeClock()
+    rate_limiter = limiter(clock, requests_per_minute=60)
+    for _ in range(3):
+        rate_limiter.acquire("key")
+    assert clock.sleeps == [pytest.approx(1), pytest.approx(1)]
+
+
+def test_headers_block_until_reset() -> None:
+    clock = FakeClock()
+    rate_limiter = limiter(clock)
+    rate_limiter.observe(
+        "key",
+        {
+            "x-ratelimit-limit-requests": "600",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+        },
+    )
+    rate_limiter.acquire("key")
+    assert clock.sleeps == [pytest.approx(2)]
+    # Other keys are not affected
+    rate_limiter.acquire("other")
+    assert len(clock.sleeps) == 1
+
+
+def test_acquire_raises_when_the_wait_passes_the_deadline() -> None:
+    clock = FakeClock()
+    rate_limiter = limiter(clock)
+    rate_limiter.defer("key", 30)
+    with pytest.raises(DeadlineExceeded):
+        rate_limiter.acquire("key", deadline=10)
+
+
+def test_retries_rate_limited_responses_after_retry_after() -> None:
+    clock = FakeClock()
+    rate_limiter = limiter(clock)
+    responses = [FakeResponse(429, {"retry-after": "2"}), FakeResponse(200)]
+    result = call_with_retries(
+        lambda _: responses.pop(0), rate_limiter, "key", 60, 3, lambda e: False
+    )
+    assert result.status_code == 200
+    assert clock.sleeps == [pytest.approx(2)]
+
+
+def test_retries_transient_errors_with_backoff() -> None:
+    clock = FakeClock()
+    calls = 0
+
+    def send(_: float) -> FakeResponse:
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise ConnectionError("reset")
+        return FakeResponse(200)
+
+    result = call_with_retries(
+        send,
+        limiter(clock),
+        "key",
+        60,
+        3,
+        lambda e: isinstance(e, ConnectionError),
+        rng=lambda: 1.0,
+    )
+    assert result.status_code == 200
+    assert clock.sleeps == [0.5, 1]
+
+
+def test_returns_the_last_response_when_retries_run_out() -> None:
+    clock = FakeClock()
+    responses = [FakeResponse(503) for _ in range(3)]
+    sent = list(responses)
+    result = call_with_retries(
+        lambda _: responses.pop(0),
+        limiter(clock),
+        "key",
+        60,
+        2,
+        lambda e: False,
+        rng=lambda: 1.0,
+    )
+    assert result is sent[-1]
+    assert sent[0].closed and sent[1].closed and not sent[2].closed
+
+
+def test_does_not_retry_client_errors_or_unexpected_exceptions() -> None:
+    clock = FakeClock()
+    response = FakeResponse(400)
+    assert (
+        call_with_retries(
+            lambda _: response, limiter(clock), "k", 60, 3, lambda e: False
+        )
+        is response
+    )
+
+    def fail(_: float) -> FakeResponse:
+        raise ValueError("bug")
+
+    with pytest.raises(ValueError):
+        call_with_retries(fail, limiter(clock), "k", 60, 3, lambda e: False)
+    assert clock.sleeps == []
+
+
+def test_stops_retrying_at_the_deadline() -> None:
+    clock = FakeClock()
+    with pytest.raises(ConnectionError):
+        call_with_retries(
+            lambda _: (_ for _ in ()).throw(ConnectionError("down")),
+            limiter(clock),
+            "key",
+            3,
+            10,
+            lambda e: True,
+            rng=lambda: 1.0,
+        )
+    assert sum(clock.sleeps) <= 3
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+sys.path.append(".")
+
+from lib.modelRouter import ModelRouter, size_bucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def router(tmp_path: Path, clock: FakeClock) -> ModelRouter:
+    return ModelRouter(tmp_path / "latency.json", window=10, clock=clock)
+
+
+def record_many(
+    model_router: ModelRouter, model: str, seconds: float, ok: bool = True, tokens=100
+) -> None:
+    for _ in range(3):
+        model_router.record(model, tokens, seconds, ok)
+
+
+def test_size_bucket() -> None:
+    assert size_bucket(0) == 0
+    assert size_bucket(500) == 0
+    assert size_bucket(501) == 1
+    assert size_bucket(100000) == 3
+
+
+def test_unmeasured_models_keep_their_order(tmp_path: Path) -> None:
+    model_router = router(tmp_path, FakeClock())
+    assert model_router.choose(["a", "b"], 100, slo_seconds=2) == ["a", "b"]
+    assert model_router.estimate("a", 100) is None
+
+
+def test_slow_model_is_moved_behind_models_meeting_the_slo(tmp_path: Path) -> None:
+    model_router = router(tmp_path, FakeClock())
+    record_many(model_router, "a", 5)
+    record_many(model_router, "b", 1)
+    record_many(model_router, "c", 4)
+    assert model_router.choose(["a", "b", "c"], 100, slo_seconds=2) == ["b", "c", "a"]
+
+
+def test_latency_is_tracked_per_size_bucket(tmp_path: Path) -> None:
+    model_router = router(tmp_path, FakeClock())
+    record_many(model_router, "a", 1, tokens=100)
+    record_many(model_router, "a", 9, tokens=10000)
+    record_many(model_router, "b", 3, tokens=10000)
+    assert model_router.choose(["a", "b"], 100, slo_seconds=2) == ["a", "b"]
+    assert model_router.choose(["a", "b"], 10000, slo_seconds=2) == ["b", "a"]
+
+
+def test_failing_model_is_degraded_until_the_cooldown(tmp_path: Path) -> None:
+    clock = FakeClock()
+    model_router = router(tmp_path, clock)
+    record_many(model_router, "a", 0.1, ok=False)
+    assert model_router.is_degraded("a")
+    assert model_router.choose(["a", "b"], 100, slo_seconds=2) == ["b", "a"]
+    clock.now += 301
+    assert not model_router.is_degraded("a")
+    model_router.record("a", 100, 1, ok=True)
+    assert model_router.choose(["a", "b"], 100, slo_seconds=2) == ["a", "b"]
+
+
+def test_history_is_persisted_and_windowed(tmp_path: Path) -> None:
+    clock = FakeClock()
+    model_router = router(tmp_path, clock)
+    for seconds in range(20):
+        model_router.record("a", 100, seconds, ok=True)
+    reloaded = router(tmp_path, clock)
+    assert reloaded.estimate("a", 100) == 18
+    assert reloaded.report() == ["a: <=500 tokens 18.0s; 0/10 failed"]
@@ -0,0 +1,94 @@
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(".")
+
+from talon_package import import_talon_module, talon
+
+scheduler = import_talon_module("lib.modelScheduler")
+RequestScheduler = scheduler.RequestScheduler
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setitem(talon.settings.values, "user.model_max_concurrent_requests", 2)
+    monkeypatch.setattr(RequestScheduler, "_executor", None)
+    monkeypatch.setattr(RequestScheduler, "_in_flight", {})
+    yield RequestScheduler
+    RequestScheduler.cancel_all()
+
+
+def wait_until(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_result_is_passed_to_on_done(pool) -> None:
+    results: list[str] = []
+    pool.submit(lambda: "answer", results.append)
+    assert wait_until(lambda: results == ["answer"])
+    assert wait_until(lambda: pool.in_flight() == 0)
+
+
+def test_errors_are_passed_to_on_error(pool) -> None:
+    errors: list[Exception] = []
+
+    def fail():
+        raise ValueError("bad request")
+
+    pool.submit(fail, lambda result: None, errors.append)
+    assert wait_until(lambda: len(errors) == 1)
+    assert str(errors[0]) == "bad request"
+
+
+def test_requests_beyond_the_limit_wait_for_a_worker(pool) -> None:
+    release = threading.Event()
+    lock = threading.Lock()
+    running = peak = 0
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        release.wait(5)
+        with lock:
+            running -= 1
+
+    futures = [pool.submit(work, lambda result: None) for _ in range(4)]
+    assert wait_until(lambda: running == 2)
+    time.sleep(0.05)
+    assert running == 2
+    release.set()
+    assert wait_until(lambda: all(future.done() for future in futures))
+    assert peak == 2
+
+
+def test_cancel_all_stops_running_and_queued_requests(pool) -> None:
+    started = threading.Event()
+    results: list[str] = []
+
+    def work():
+        started.set()
+        scheduler.cancellable_sleep(5)
+        return "too late"
+
+    running = pool.submit(work, results.append)
+    pool.submit(work, results.append)
+    queued = pool.submit(work, results.append)
+    assert started.wait(5)
+    assert pool.cancel_all() == 3
+
+    assert wait_until(running.done)
+    assert isinstance(running.exception(), scheduler.RequestCancelled)
+    assert queued.cancelled()
+    assert wait_until(lambda: pool.in_flight() == 0)
+    time.sleep(0.05)
+    assert results == []
@@ -0,0 +1,120 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(".")
+
+from talon_package import import_talon_module, talon
+
+modelSession = import_talon_module("lib.modelSession")
+
+
+class FakeResponse:
+    def __init__(self):
+        self.closed = 0
+
+    def close(self) -> None:
+        self.closed += 1
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """Pooled sessions that answer every post with a fake response, on a fake clock"""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        modelSession, "time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    monkeypatch.setattr(
+        modelSession.requests.Session,
+        "post",
+        lambda self, url, **kwargs: FakeResponse(),
+    )
+    monkeypatch.setitem(talon.settings.values, "user.model_http_idle_timeout", 60)
+    modelSession.close_all()
+    yield clock
+    modelSession.close_all()
+
+
+def test_sessions_are_pooled_per_origin(sessions) -> None:
+    first = modelSession.session_for("https://api.example.com/v1/chat/completions")
+    assert modelSession.session_for("https://api.example.com/v1/images") is first
+    assert modelSession.session_for("https://other.example.com/v1/chat") is not first
+    assert modelSession.session_for("http://api.example.com/v1/chat") is not first
+
+
+def is_pooled(url: str) -> bool:
+    """Whether the url has an open session, without counting this as a use"""
+    return modelSession._origin(url) in modelSession._sessions
+
+
+def test_idle_sessions_are_evicted(sessions) -> None:
+    url = "https://api.example.com/v1"
+    modelSession.session_for(url)
+    sessions.now += 30
+    modelSession.evict_idle()
+    assert is_pooled(url)
+    sessions.now += 31
+    modelSession.evict_idle()
+    assert not is_pooled(url)
+
+
+def test_streamed_response_keeps_its_session_until_closed(sessions) -> None:
+    url = "https://api.example.com/v1"
+    response = modelSession.post(url, {}, stream=True)
+    sessions.now += 600
+    modelSession.evict_idle()
+    assert is_pooled(url)
+
+    response.close()
+    response.close()
+    assert response.closed == 2
+    # Idle time counts from when the stream was closed
+    sessions.now += 30
+    modelSession.evict_idle()
+    assert is_pooled(url)
+    sessions.now += 31
+    modelSession.evict_idle()
+    assert not is_pooled(url)
+
+
+def test_read_response_does_not_keep_its_session(sessions) -> None:
+    url = "https://api.example.com/v1"
+    modelSession.post(url, {})
+    sessions.now += 61
+    modelSession.evict_idle()
+    assert not is_pooled(url)
+
+
+def test_failed_request_does_not_keep_its_session(sessions, monkeypatch) -> None:
+    def refuse(self, url, **kwargs):
+        raise modelSession.requests.ConnectionError("refused")
+
+    monkeypatch.setattr(modelSession.requests.Session, "post", refuse)
+    url = "https://api.example.com/v1"
+    with pytest.raises(modelSession.requests.ConnectionError):
+        modelSession.post(url, {}, stream=True)
+    sessions.now += 61
+    modelSession.evict_idle()
+    assert not is_pooled(url)
+
+
+def test_closing_all_sessions_waits_for_open_streams(sessions, monkeypatch) -> None:
+    closed: list = []
+    monkeypatch.setattr(
+        modelSession.requests.Session, "close", lambda self: closed.append(self)
+    )
+    streaming = "https://api.example.com/v1"
+    idle = "https://other.example.com/v1"
+    response = modelSession.post(streaming, {}, stream=True)
+    stream_session = modelSession.session_for(streaming)
+    idle_session = modelSession.session_for(idle)
+
+    modelSession.close_all()
+    assert closed == [idle_session]
+    assert not is_pooled(streaming)
+    # New requests get a new session while the stream is still being read
+    assert modelSession.session_for(streaming) is not stream_session
+
+    response.close()
+    assert closed == [idle_session, stream_session]
@@ -0,0 +1,110 @@
+import json
+import sys
+import threading
+
+import pytest
+
+sys.path.append(".")
+
+from talon_package import import_talon_module, talon
+
+modelStreaming = import_talon_module("lib.modelStreaming")
+helpers = import_talon_module("lib.modelHelpers")
+scheduler = import_talon_module("lib.modelScheduler")
+ResponseStream = modelStreaming.ResponseStream
+
+
+@pytest.fixture
+def inserted(monkeypatch):
+    """Record what each destination receives"""
+    calls: list[tuple[str, str]] = []
+    for name in ("paste", "confirmation_gui_append", "tts"):
+        monkeypatch.setattr(
+            talon.actions.user,
+            name,
+            lambda text, name=name: calls.append((name, text)),
+            raising=False,
+        )
+    monkeypatch.setattr(helpers.GPTState, "text_to_confirm", "")
+    return calls
+
+
+def sse(delta: str) -> str:
+    return "data: " + json.dumps({"choices": [{"delta": {"content": delta}}]})
+
+
+class FakeStream:
+    """A streamed response whose lines can be cancelled between"""
+
+    def __init__(self, lines: list[str], cancel_after: int = -1, event=None):
+        self.lines = lines
+        self.cancel_after = cancel_after
+        self.event = event
+        self.closed = False
+
+    def iter_lines(self, decode_unicode: bool = False):
+        for index, line in enumerate(self.lines):
+            if index == self.cancel_after:
+                self.event.set()
+            yield line
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_only_streamable_destinations_are_streamed(monkeypatch) -> None:
+    monkeypatch.setitem(talon.settings.values, "user.model_stream_responses", True)
+    assert ResponseStream.for_destination("paste").destination == "paste"
+    assert ResponseStream.for_destination("clipboard") is None
+    monkeypatch.setitem(
+        talon.settings.values, "user.model_default_destination", "window"
+    )
+    assert ResponseStream.for_destination("").destination == "window"
+    monkeypatch.setitem(talon.settings.values, "user.model_stream_responses", False)
+    assert ResponseStream.for_destination("paste") is None
+
+
+def test_paste_inserts_whole_lines_as_they_arrive(inserted) -> None:
+    stream = ResponseStream("paste")
+    stream.feed("first ")
+    assert inserted == []
+    stream.feed("line\nsecond")
+    assert inserted == [("paste", "first line\n")]
+    stream.feed(" line")
+    stream.finish(helpers.format_message("first line\nsecond line"))
+    assert inserted == [("paste", "first line\n"), ("paste", "second line")]
+    assert stream.text == "first line\nsecond line"
+
+
+def test_text_to_speech_speaks_whole_sentences(inserted) -> None:
+    stream = ResponseStream("textToSpeech")
+    stream.feed("Hello there. How")
+    stream.feed(" are you")
+    stream.finish(helpers.format_message("Hello there. How are you"))
+    assert inserted == [("tts", "Hello there. "), ("tts", "How are you")]
+
+
+def test_window_shows_the_final_response(inserted) -> None:
+    stream = ResponseStream("window")
+    stream.feed("```\nHello")
+    stream.finish(helpers.format_message("Hello"))
+    assert inserted == [
+        ("confirmation_gui_append", "```\nHello"),
+        ("confirmation_gui_append", "Hello"),
+    ]
+    assert helpers.GPTState.text_to_confirm == "Hello"
+
+
+def test_cancelling_stops_pasting_and_closes_the_response(inserted) -> None:
+    stream = ResponseStream("paste")
+    event = threading.Event()
+    response = FakeStream(
+        [sse("one\n"), sse("two\n"), sse("three\n")], cancel_after=2, event=event
+    )
+    with pytest.raises(scheduler.RequestCancelled):
+        scheduler.run_with_cancel(
+            event, lambda: helpers.read_streamed_response(response, stream.feed)
+        )
+    assert response.closed
+    # The markdown stripper holds the latest line back until the next one arrives
+    assert inserted == [("paste", "one\n")]
@@ -0,0 +1,94 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(".")
+
+from talon_package import import_talon_module, talon
+
+modelSystemPrompt = import_talon_module("lib.modelSystemPrompt")
+SystemPromptBuilder = modelSystemPrompt.SystemPromptBuilder
+GPTState = modelSystemPrompt.GPTState
+ContextStore = import_talon_module("lib.modelContext").ContextStore
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Fake the focused window and count the calls of each context provider"""
+    state = SimpleNamespace(
+        calls={"application": 0, "additional": 0},
+        extra=["First extra context"],
+        language="python",
+        app="Editor",
+        title="main.py",
+    )
+
+    def active_context() -> str:
+        state.calls["application"] += 1
+        return f"Name: {state.app}\nTitle: {state.title}"
+
+    def additional_context() -> list[str]:
+        state.calls["additional"] += 1
+        return list(state.extra)
+
+    for namespace, name, action in [
+        (talon.actions.code, "language", lambda: state.language),
+        (talon.actions.app, "name", lambda: state.app),
+        (talon.actions.win, "title", lambda: state.title),
+        (talon.actions.user, "talon_get_active_context", active_context),
+        (talon.actions.user, "gpt_additional_user_context", additional_context),
+    ]:
+        monkeypatch.setattr(namespace, name, action, raising=False)
+    monkeypatch.setitem(talon.settings.values, "user.model_system_prompt", "System")
+    monkeypatch.setattr(SystemPromptBuilder, "_segments", {})
+    monkeypatch.setattr(SystemPromptBuilder, "counts", {})
+    monkeypatch.setattr(GPTState, "context", ContextStore())
+    return state
+
+
+def test_application_segment_is_reused_until_invalidated(providers) -> None:
+    first = SystemPromptBuilder.build(None)
+    assert SystemPromptBuilder.build(None) == first
+    assert providers.calls["application"] == 1
+
+    SystemPromptBuilder.invalidate()
+    SystemPromptBuilder.build(None)
+    assert providers.calls["application"] == 2
+
+
+def test_focus_segments_follow_their_inputs_without_events(providers) -> None:
+    assert "python" in SystemPromptBuilder.build(None)
+    providers.language = "rust"
+    providers.app = "Terminal"
+    prompt = SystemPromptBuilder.build(None)
+    assert "rust" in prompt and "python" not in prompt
+    assert "Name: Terminal" in prompt
+    assert SystemPromptBuilder.counts["language"] == [0, 2]
+
+    providers.title = "other.py"
+    assert "Title: other.py" in SystemPromptBuilder.build(None)
+    assert providers.calls["application"] == 3
+
+
+def test_stored_context_is_keyed_by_its_version(providers) -> None:
+    assert "Pushed" not in SystemPromptBuilder.build(None)
+    GPTState.context.add({"type": "text", "text": "Pushed"})
+    assert SystemPromptBuilder.build(None).endswith("Pushed")
+    GPTState.context.clear()
+    assert "Pushed" not in SystemPromptBuilder.build(None)
+
+
+def test_additional_context_is_not_memoized(providers) -> None:
+    assert "First extra context" in SystemPromptBuilder.build(None)
+    providers.extra = ["Second extra context"]
+    prompt = SystemPromptBuilder.build(None)
+    assert "Second extra context" in prompt
+    assert "First extra context" not in prompt
+    assert providers.calls["additional"] == 2
+
+
+def test_snippet_instructions_depend_on_the_destination(providers) -> None:
+    assert "snippet" not in SystemPromptBuilder.build(None)
+    assert "snippet" in SystemPromptBuilder.build(None, "snip")
+    assert SystemPromptBuilder.build("Override").startswith("Override")
@@ -0,0 +1,114 @@
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(".")
+
+from lib.modelTracing import Tracer, TraceWriter, waterfall
+
+
+def test_spans_nest_on_one_thread() -> None:
+    tracer = Tracer()
+    with tracer.span("request", model="a") as root:
+        with tracer.span("network") as child:
+            child.set(status=200)
+        with tracer.span("strip_markdown"):
+            pass
+    assert tracer.current() is None
+    [spans] = tracer.recent_traces()
+    assert [span["name"] for span in spans] == ["request", "network", "strip_markdown"]
+    assert {span["trace"] for span in spans} == {root.trace_id}
+    assert spans[0]["parent"] is None
+    assert spans[1]["parent"] == root.span_id
+    assert spans[1]["attrs"] == {"status": 200}
+    assert spans[0]["attrs"] == {"model": "a"}
+
+
+def test_separate_roots_are_separate_traces() -> None:
+    tracer = Tracer()
+    for name in ("first", "second", "third"):
+        with tracer.span(name):
+            pass
+    traces = tracer.recent_traces(count=2)
+    assert [spans[0]["name"] for spans in traces] == ["second", "third"]
+
+
+def test_failed_span_records_the_error() -> None:
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("parse"):
+            raise ValueError("bad")
+    [[span]] = tracer.recent_traces()
+    assert span["error"] == "ValueError"
+    assert tracer.current() is None
+
+
+def test_bind_continues_the_trace_on_another_thread() -> None:
+    tracer = Tracer()
+
+    def work() -> None:
+        with tracer.span("worker"):
+            pass
+
+    with tracer.span("action") as root:
+        bound = tracer.bind(work)
+    thread = threading.Thread(target=bound)
+    thread.start()
+    thread.join()
+    [spans] = tracer.recent_traces()
+    worker = next(span for span in spans if span["name"] == "worker")
+    assert worker["parent"] == root.span_id
+    assert worker["thread"] == thread.name
+
+
+def test_bind_without_an_open_span_starts_a_new_trace() -> None:
+    tracer = Tracer()
+
+    def work() -> None:
+        with tracer.span("alone"):
+            pass
+
+    bound = tracer.bind(work)
+    with tracer.span("other"):
+        bound()
+        assert tracer.current().name == "other"  # type: ignore
+    spans = [span for spans in tracer.recent_traces() for span in spans]
+    alone = next(span for span in spans if span["name"] == "alone")
+    assert alone["parent"] is None
+
+
+def test_writer_appends_jsonl_and_rotates(tmp_path: Path) -> None:
+    path = tmp_path / "traces.jsonl"
+    writer = TraceWriter(path, max_bytes=200, backups=2)
+    tracer = Tracer(writer)
+    for index in range(12):
+        with tracer.span("phase", index=index):
+            pass
+    writer.flush()
+    files = sorted(tmp_path.iterdir())
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert len(files) <= 3
+    records = [
+        json.loads(line)
+        for file in files
+        for line in file.read_text(encoding="utf-8").splitlines()
+    ]
+    assert all(record["name"] == "phase" for record in records)
+    assert max(record["attrs"]["index"] for record in records) == 11
+
+
+def test_waterfall_rows() -> None:
+    spans = [
+        {"span": "1", "parent": None, "name": "a", "start": 10.0, "ms": 100.0},
+        {"span": "2", "parent": "1", "name": "b", "start": 10.05, "ms": 50.0},
+        {"span": "3", "parent": "2", "name": "c", "start": 10.05, "ms": 10.0},
+    ]
+    rows = waterfall(spans, width=10)
+    assert [row["depth"] for row in rows] == [0, 1, 2]
+    assert rows[1]["offset_ms"] == pytest.approx(50)
+    assert rows[0]["bar"] == (0, 10)
+    assert rows[1]["bar"] == (5, 5)
+    assert rows[2]["bar"] == (5, 1)
@@ -0,0 +1,45 @@
+import sys
+
+sys.path.append(".")
+
+from lib.tokenEstimator import (
+    IMAGE_TOKENS,
+    count_message_tokens,
+    count_tokens,
+    estimate_tokens,
+)
+
+
+def test_common_words_are_single_tokens() -> None:
+    assert estimate_tokens("the") == 1
+    assert estimate_tokens("and the") == 2
+
+
+def test_long_words_cost_more_than_short_words() -> None:
+    assert estimate_tokens("internationalization") > estimate_tokens("cat")
+
+
+def test_empty_text_has_no_tokens() -> None:
+    assert estimate_tokens("") == 0
+
+
+def test_estimate_is_close_for_english_prose() -> None:
+    # cl100k_base encodes this sentence as 19 tokens
+    text = "Please rewrite the following paragraph so that it is shorter and easier to read for everyone."
+    assert 14 <= estimate_tokens(text) <= 24
+
+
+def test_non_ascii_text_is_not_undercounted() -> None:
+    assert estimate_tokens("こんにちは世界") >= 7
+
+
+def test_unknown_model_falls_back_to_estimate() -> None:
+    text = "def main():\n    return 42\n"
+    assert count_tokens(text, "not-a-real-model") == estimate_tokens(text)
+
+
+def test_message_tokens_include_images_and_overhead() -> None:
+    texts = ["system prompt", "user text"]
+    without_images = count_message_tokens(texts)
+    assert without_images > sum(estimate_tokens(text) for text in texts)
+    assert count_message_tokens(texts, images=2) == without_images + 2 * IMAGE_TOKENS
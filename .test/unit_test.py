@@ -5,7 +5,7 @@ import sys
 
 sys.path.append(".")
 
-from lib.pureHelpers import strip_markdown
+from lib.pureHelpers import MarkdownStreamStripper, parse_sse_delta, strip_markdown
 
 
 def test_strip_markdown():
@@ -40,3 +40,37 @@ def test_strip_markdown():
     # ```
     # """
     # assert strip_markdown(markdown) == '# Test\n```rust\nprintln!("hello");```'
+
+
+def stream_strip(chunks: list[str]) -> str:
+    stripper = MarkdownStreamStripper()
+    return "".join(stripper.feed(chunk) for chunk in chunks) + stripper.finish()
+
+
+def test_stream_stripper_matches_strip_markdown_at_every_split():
+    samples = [
+        """
+    ```python
+    print("hello")
+    ```
+    """,
+        'Run this:\n```sh\necho "hello"\n```\nthen check the output.',
+        "no fences at all\n\nsecond paragraph  ",
+        "inline ```code``` stays",
+    ]
+    for text in samples:
+        for split in range(len(text) + 1):
+            assert stream_strip([text[:split], text[split:]]) == strip_markdown(text)
+
+
+def test_stream_stripper_handles_single_character_chunks():
+    text = "```bash\necho one\necho two\n```\n"
+    assert stream_strip(list(text)) == "echo one\necho two"
+
+
+def test_parse_sse_delta():
+    line = 'data: {"choices":[{"delta":{"content":"Hi"}}]}'
+    assert parse_sse_delta(line) == "Hi"
+    assert parse_sse_delta("data: [DONE]") is None
+    assert parse_sse_delta(": keep-alive") is None
+    assert parse_sse_delta('data: {"choices":[{"delta":{"role":"assistant"}}]}') is None
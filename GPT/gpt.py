@@ -1,19 +1,34 @@
+import html
 import os
-from typing import Any, Optional
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
 
 from talon import Module, actions, clip, settings
 
 from ..lib.HTMLBuilder import Builder
 from ..lib.modelConfirmationGUI import confirmation_gui
 from ..lib.modelHelpers import (
+    clear_response_cache,
+    context_token_budget,
+    dispatch_request,
     extract_message,
     format_clipboard,
     format_message,
+    hedge_stats,
+    image_stats,
     messages_to_string,
+    model_latency_report,
     notify,
+    prepare_request,
+    resolve_model_name,
+    response_cache_stats,
     send_request,
 )
+from ..lib.modelScheduler import RequestScheduler, run_on_main
 from ..lib.modelState import GPTState
+from ..lib.modelStreaming import ResponseStream
+from ..lib.modelSystemPrompt import SystemPromptBuilder
+from ..lib.modelTracing import tracer, waterfall
 from ..lib.modelTypes import GPTMessageItem
 
 mod = Module()
@@ -29,17 +44,73 @@ def gpt_query(
     model: str,
     thread: str,
     destination: str = "",
+    on_chunk: Optional[Callable[[str], None]] = None,
+    chunk_mode: str = "",
 ):
     """Send a prompt to the GPT API and return the response"""
 
     # Reset state before pasting
     GPTState.last_was_pasted = False
 
-    response = send_request(prompt, text_to_process, model, thread, destination)
+    response = send_request(
+        prompt, text_to_process, model, thread, destination, on_chunk, chunk_mode
+    )
     GPTState.last_response = extract_message(response)
     return response
 
 
+def gpt_query_async(
+    prompt: GPTMessageItem,
+    text_to_process: Optional[GPTMessageItem],
+    model: str,
+    thread: str,
+    destination: str,
+    on_response: Callable[[GPTMessageItem], None],
+    on_chunk: Optional[Callable[[str], None]] = None,
+    chunk_mode: str = "",
+) -> Future:
+    """Send a prompt on a worker thread and pass the response to on_response on the main thread"""
+
+    # Reset state before pasting
+    GPTState.last_was_pasted = False
+
+    # Building the request calls Talon actions, so do it before leaving the main thread
+    with tracer.span("prepare_request"):
+        prepared = prepare_request(
+            prompt, text_to_process, model, thread, destination, chunk_mode
+        )
+
+    def on_done(response: GPTMessageItem):
+        GPTState.last_response = extract_message(response)
+        on_response(response)
+
+    # Failures are already reported by the request helpers, so only log them here
+    return RequestScheduler.submit(
+        lambda: dispatch_request(prepared, on_chunk), on_done
+    )
+
+
+# Width of the timeline column of the timings page in characters
+TIMING_COLUMNS = 40
+
+
+def timing_row(row: dict[str, Any]) -> list[str]:
+    """Table cells for one span of a waterfall"""
+    name = "&nbsp;" * 4 * row["depth"] + html.escape(row["name"])
+    if row["error"]:
+        name += f" (failed: {html.escape(row['error'])})"
+    details = ", ".join(f"{key}={value}" for key, value in row["attrs"].items())
+    column, length = row["bar"]
+    bar = "·" * column + "█" * length + "·" * (TIMING_COLUMNS - column - length)
+    return [
+        name,
+        f"{row['offset_ms']:.1f}",
+        f"{row['ms']:.1f}",
+        f"<code aria-hidden='true'>{bar}</code>",
+        html.escape(details),
+    ]
+
+
 @mod.action_class
 class UserActions:
     def gpt_generate_shell(text_to_process: str, model: str, thread: str) -> str:
@@ -72,6 +143,81 @@ class UserActions:
             format_message(prompt), format_message(text_to_process), model, thread
         ).get("text", "")
 
+    def gpt_cancel():
+        """Cancel all queued and running background model requests"""
+        cancelled = RequestScheduler.cancel_all()
+        if cancelled:
+            notify(f"Cancelled {cancelled} model request(s)")
+        else:
+            notify("No model requests to cancel")
+
+    def gpt_clear_cache():
+        """Remove all cached model responses"""
+        clear_response_cache()
+        notify("Cleared model response cache")
+
+    def gpt_cache_stats():
+        """Show the hit rate and size of the model response cache"""
+        stats = response_cache_stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups if lookups else 0
+        size_kb = stats["bytes"] // 1024
+        notify(
+            f"Model cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({hit_rate:.0%}), {stats['entries']} responses, {size_kb} KB"
+        )
+
+    def gpt_hedge_stats():
+        """Show how often slow requests were hedged and how often the hedge won"""
+        stats = hedge_stats()
+        notify(
+            f"Model hedging: {stats['hedged']} of {stats['requests']} requests hedged, "
+            f"{stats['secondary_wins']} won by the secondary, {stats['failures']} failed"
+        )
+
+    def gpt_image_stats():
+        """Show how much smaller images were made before sending them to the model"""
+        stats = image_stats()
+        notify(
+            f"Images: {stats['images']} sent, {stats['cache_hits']} reused, "
+            f"{stats['original_bytes'] / 1e6:.1f} MB reduced to "
+            f"{stats['sent_bytes'] / 1e6:.1f} MB, saving about "
+            f"{stats['saved_seconds']:.1f}s of upload in {stats['encode_ms']:.0f}ms"
+        )
+
+    def gpt_model_latency():
+        """Show the observed latency and failures of each model, which route the auto model"""
+        report = model_latency_report()
+        notify("\n".join(report) if report else "No model requests have been timed yet")
+
+    def gpt_show_timings():
+        """Show the timing spans of recent model requests as a waterfall in the browser"""
+        traces = tracer.recent_traces()
+        if not traces:
+            notify("No model requests have been timed yet")
+            return
+
+        builder = Builder()
+        builder.title("Talon GPT Timings")
+        builder.h1("Talon GPT Timings")
+        # Most recent request first
+        for spans in reversed(traces):
+            rows = waterfall(spans, TIMING_COLUMNS)
+            total_ms = max(row["offset_ms"] + row["ms"] for row in rows)
+            builder.h2(f"{html.escape(rows[0]['name'])}: {total_ms:.0f} ms")
+            builder.start_table(
+                ["Phase", "Start (ms)", "Duration (ms)", "Timeline", "Details"]
+            )
+            for row in rows:
+                builder.add_row(timing_row(row))
+            builder.end_table()
+        builder.render()
+
+    def gpt_system_prompt_timings():
+        """Show how long each part of the system prompt took to build and how often it was cached"""
+        report = SystemPromptBuilder.report()
+        notify("\n".join(report) if report else "No system prompt has been built yet")
+
     def gpt_start_debug():
         """Enable debug logging"""
         GPTState.start_debug()
@@ -84,6 +230,14 @@ class UserActions:
         """Reset the stored context"""
         GPTState.clear_context()
 
+    def gpt_context_usage():
+        """Show how much of the token budget the stored context is using"""
+        budget = context_token_budget(resolve_model_name("model"))
+        notify(
+            f"Context: {len(GPTState.context)} item(s) using about "
+            f"{GPTState.context.total_tokens} of {budget} tokens"
+        )
+
     def gpt_push_context(context: str | list[str]):
         """Add the selected text to the stored context"""
         if isinstance(context, list):
@@ -113,25 +267,58 @@ class UserActions:
         thread: str,
         source: str = "",
         destination: str = "",
+        chunk_mode: str = "",
     ):
-        """Apply an arbitrary prompt to arbitrary text"""
-
-        text_to_process: GPTMessageItem = actions.user.gpt_get_source_text(source)
-        if not text_to_process.get("text") and not text_to_process.get("image_url"):
-            text_to_process = None  # type: ignore
-
-        # Handle special cases in the prompt
-        ### Ask is a special case, where the text to process is the prompted question, not selected text
-        if prompt.startswith("ask"):
-            text_to_process = format_message(prompt.removeprefix("ask"))
-            prompt = "Generate text that satisfies the question or request given in the input."
+        """Apply an arbitrary prompt to arbitrary text. chunk_mode is "map" or "reduce" to process large text in chunks"""
 
-        response = gpt_query(
-            format_message(prompt), text_to_process, model, thread, destination
-        )
-
-        actions.user.gpt_insert_response(response, destination)
-        return response
+        with tracer.span("gpt_apply_prompt", prompt=prompt[:40], model=model):
+            with tracer.span("gpt_get_source_text", source=source):
+                text_to_process: GPTMessageItem = actions.user.gpt_get_source_text(
+                    source
+                )
+            if not text_to_process.get("text") and not text_to_process.get("image_url"):
+                text_to_process = None  # type: ignore
+
+            # Handle special cases in the prompt
+            ### Ask is a special case, where the text to process is the prompted question, not selected text
+            if prompt.startswith("ask"):
+                text_to_process = format_message(prompt.removeprefix("ask"))
+                prompt = "Generate text that satisfies the question or request given in the input."
+
+            stream = ResponseStream.for_destination(destination)
+
+            def insert(response: GPTMessageItem):
+                with tracer.span("gpt_insert_response", destination=destination):
+                    if stream:
+                        stream.finish(response)
+                    else:
+                        actions.user.gpt_insert_response(response, destination)
+
+            if settings.get("user.model_async_requests"):
+                # The response is inserted when it arrives, so there is nothing to return yet
+                gpt_query_async(
+                    format_message(prompt),
+                    text_to_process,
+                    model,
+                    thread,
+                    destination,
+                    insert,
+                    run_on_main(stream.feed) if stream else None,
+                    chunk_mode,
+                )
+                return None
+
+            response = gpt_query(
+                format_message(prompt),
+                text_to_process,
+                model,
+                thread,
+                destination,
+                stream.feed if stream else None,
+                chunk_mode,
+            )
+            insert(response)
+            return response
 
     def gpt_apply_prompt_for_cursorless(
         prompt: str,
@@ -283,12 +470,12 @@ class UserActions:
             case "clipboard":
                 return format_clipboard()
             case "context":
-                if GPTState.context == []:
+                if len(GPTState.context) == 0:
                     notify("GPT Failure: Context is empty")
                     raise Exception(
                         "GPT Failure: User applied a prompt to the phrase context, but there was no context stored"
                     )
-                return format_message(messages_to_string(GPTState.context))
+                return format_message(messages_to_string(list(GPTState.context)))
             case "gptResponse":
                 if GPTState.last_response == "":
                     raise Exception(
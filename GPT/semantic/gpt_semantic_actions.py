@@ -36,3 +36,15 @@ class UserActions:
     def gpt_semantic_repeat_last() -> None:
         """Re-open the last confirmed semantic plan in preview mode."""
         GptSemanticRuntime.repeat_last()
+
+    def gpt_semantic_refresh_launch_catalog() -> None:
+        """Rescan desktop entries for newly installed or removed apps."""
+        GptSemanticRuntime.refresh_launch_catalog()
+
+    def gpt_semantic_clear_plan_cache() -> None:
+        """Forget cached semantic plans and learned request templates."""
+        GptSemanticRuntime.clear_plan_cache()
+
+    def gpt_semantic_show_stats() -> None:
+        """Show how many semantic requests were planned without the model."""
+        GptSemanticRuntime.show_stats()
@@ -2,11 +2,16 @@
 
 Purpose:
 - Collects active window data, running apps, and launchable app catalog context.
+- Builds a pruned context with only the apps relevant to the request, and the
+  full context used when planning with the pruned one fails.
+- Fingerprints the app context a plan depends on so cached plans can be reused.
 
 Called from:
 - `GPT/semantic/gpt_semantic_runtime.py` during plan generation.
 """
 
+from dataclasses import dataclass
+
 from talon import actions
 
 try:
@@ -14,15 +19,104 @@ try:
 except (ModuleNotFoundError, ImportError):  # pragma: no cover
     ui = None
 
-from .gpt_semantic_launch_catalog import launch_context_text
+from .gpt_semantic_context_select import (
+    LAUNCH_WIDE,
+    RUNNING_MAX,
+    ContextStats,
+    select_running_apps,
+)
+from .gpt_semantic_executor_helpers import is_running_app
+from .gpt_semantic_launch_catalog import (
+    exact_launch_command,
+    format_launch_entries,
+    relevant_launch_entries,
+    resolve_launch_command,
+)
+from .gpt_semantic_types import GptSemanticPlan
+
+try:
+    from ...lib.tokenEstimator import estimate_tokens
+except ImportError:
+    from lib.tokenEstimator import estimate_tokens
+
+APP_ACTIONS = ("switch_app", "launch_app")
+
+context_stats = ContextStats()
+
+
+@dataclass(frozen=True)
+class SemanticContext:
+    text: str
+    launch_commands: tuple[str, ...]
+    running_apps: tuple[str, ...] = ()
 
+    def covers(self, plan: GptSemanticPlan, full: "SemanticContext") -> bool:
+        """
+        Whether planning with the full context could not fix the apps of the plan.
+        An app that is neither running nor a known launch command is only worth a
+        retry if the full context lists apps of that kind that this one left out.
+        """
+        more_running = not set(full.running_apps) <= set(self.running_apps)
+        more_launch = not set(full.launch_commands) <= set(self.launch_commands)
+        for step in plan.steps:
+            app_name = str(step.args.get("app_name", ""))
+            if (
+                step.action == "switch_app"
+                and more_running
+                and not is_running_app(app_name)
+            ):
+                return False
+            if (
+                step.action == "launch_app"
+                and more_launch
+                and app_name not in self.launch_commands
+                and exact_launch_command(app_name) is None
+            ):
+                return False
+        return True
 
-def semantic_context_text(request_text: str) -> str:
-    return "\n\n".join(
-        [_active_context(), _running_apps_context(), launch_context_text(request_text)]
+
+def semantic_contexts(
+    request_text: str, prune: bool = True
+) -> tuple[SemanticContext, SemanticContext | None]:
+    """The context to plan with and the full context to retry with, if pruned"""
+    active = _active_context()
+    names = running_app_names()
+    full = _context(
+        active,
+        names[:RUNNING_MAX],
+        relevant_launch_entries(request_text, LAUNCH_WIDE, LAUNCH_WIDE),
+    )
+    if not prune:
+        return full, None
+    pruned = _context(
+        active,
+        select_running_apps(request_text, names),
+        relevant_launch_entries(request_text),
+    )
+    context_stats.record(estimate_tokens(pruned.text), estimate_tokens(full.text))
+    return pruned, full
+
+
+def plan_context_fingerprint(plan: GptSemanticPlan) -> str:
+    """Running state and launch command of each app the plan switches to or launches"""
+    apps = dict.fromkeys(
+        str(step.args.get("app_name", "")).lower()
+        for step in plan.steps
+        if step.action in APP_ACTIONS
+    )
+    return "\n".join(
+        f"{app}|{is_running_app(app)}|{resolve_launch_command(app) or ''}"
+        for app in apps
     )
 
 
+def running_app_names() -> list[str]:
+    if ui is None:
+        return []
+    return sorted({app.name for app in ui.apps(background=False) if app.name})
+
+
 def _active_context() -> str:
     try:
         return actions.user.talon_get_active_context()
@@ -30,14 +124,16 @@ def _active_context() -> str:
         return f"Name: {actions.app.name()}\nTitle: {actions.win.title()}"
 
 
-def _running_apps_context() -> str:
-    names = _running_app_names()
-    if names:
-        return "Running apps for switch_app:\n" + ", ".join(names[:40])
-    return "Running apps for switch_app: unavailable"
+def _context(
+    active: str, names: list[str], entries: list[tuple[str, str]]
+) -> SemanticContext:
+    text = "\n\n".join(
+        [active, _running_apps_context(names), format_launch_entries(entries)]
+    )
+    return SemanticContext(text, tuple(command for _, command in entries), tuple(names))
 
 
-def _running_app_names() -> list[str]:
-    if ui is None:
-        return []
-    return sorted({app.name for app in ui.apps(background=False) if app.name})
+def _running_apps_context(names: list[str]) -> str:
+    if names:
+        return "Running apps for switch_app:\n" + ", ".join(names)
+    return "Running apps for switch_app: unavailable"
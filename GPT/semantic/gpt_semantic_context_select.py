@@ -0,0 +1,88 @@
+"""Relevance-based selection of planner context items.
+
+Purpose:
+- Ranks running apps against the request text.
+- Picks an adaptive number of items: few when the request names a clear match,
+  more when nothing matches and the model has to choose by function.
+- Tracks how many prompt tokens the pruned context saves.
+
+Called from:
+- `GPT/semantic/gpt_semantic_context.py` while building planner context.
+- `GPT/semantic/gpt_semantic_launch_catalog.py` to size the launchable apps list.
+"""
+
+import threading
+
+# Items scoring at least this share of the best score count as relevant
+RELATIVE_CUTOFF = 0.5
+RUNNING_MIN = 8
+RUNNING_MAX = 40
+LAUNCH_MIN = 10
+LAUNCH_MAX = 60
+LAUNCH_WIDE = 300
+
+
+def adaptive_k(scores: list[int], minimum: int, maximum: int) -> int:
+    """Number of items to keep: the near-best matches, or maximum if nothing matched"""
+    top = max(scores, default=0)
+    if top <= 0:
+        return maximum
+    relevant = sum(1 for score in scores if score >= top * RELATIVE_CUTOFF)
+    return max(minimum, min(maximum, relevant))
+
+
+def rank_running_apps(request: str, names: list[str]) -> list[tuple[str, int]]:
+    """Running app names with their relevance score, best first"""
+    request_key = _key(request)
+    words = {word for word in request_key.split() if len(word) > 1}
+    scored = []
+    for name in names:
+        key = _key(name)
+        name_words = set(key.split())
+        score = 5 if key and f" {key} " in f" {request_key} " else 0
+        score += len(words & name_words)
+        score += sum(1 for word in words - name_words if len(word) > 2 and word in key)
+        scored.append((name, score))
+    return sorted(scored, key=lambda item: (-item[1], item[0].lower()))
+
+
+def select_running_apps(
+    request: str,
+    names: list[str],
+    minimum: int = RUNNING_MIN,
+    maximum: int = RUNNING_MAX,
+) -> list[str]:
+    ranked = rank_running_apps(request, names)
+    limit = adaptive_k([score for _, score in ranked], minimum, maximum)
+    return [name for name, _ in ranked[:limit]]
+
+
+def _key(value: str) -> str:
+    lowered = value.lower().replace("-", " ").replace("_", " ").replace(".", " ")
+    return " ".join(lowered.split())
+
+
+class ContextStats:
+    """Prompt tokens of the pruned context against the full context"""
+
+    def __init__(self):
+        self.requests = 0
+        self.pruned_tokens = 0
+        self.full_tokens = 0
+        self.wide_retries = 0
+        self._lock = threading.Lock()
+
+    def record(self, pruned_tokens: int, full_tokens: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.pruned_tokens += pruned_tokens
+            self.full_tokens += full_tokens
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.wide_retries += 1
+
+    def saved_percent(self) -> int:
+        if not self.full_tokens:
+            return 0
+        return 100 * (self.full_tokens - self.pruned_tokens) // self.full_tokens
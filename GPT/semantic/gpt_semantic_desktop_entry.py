@@ -0,0 +1,101 @@
+"""Lightweight desktop entry parsing and executable lookup.
+
+Purpose:
+- Parses the `[Desktop Entry]` group with the same results as `ConfigParser`
+  (interpolation off, non-strict) without building a parser per file.
+- Resolves executables against an index of `PATH` built once per scan instead of
+  walking `PATH` with `shutil.which` for every entry.
+
+Called from:
+- `GPT/semantic/gpt_semantic_launch_reader.py`.
+"""
+
+import os
+import re
+from configparser import ConfigParser
+from shutil import which
+
+DESKTOP_SECTION = "Desktop Entry"
+DEFAULT_SECTION = "DEFAULT"
+COMMENT_PREFIXES = ("#", ";")
+NON_SPACE = re.compile(r"\S")
+
+DesktopValues = dict[str, list[str]]
+
+
+def parse_desktop_entry(text: str) -> dict[str, str] | None:
+    """Return the lowercased keys of the desktop entry group, or None if invalid.
+
+    Like `ConfigParser`, keys missing from the group fall back to `[DEFAULT]` and
+    any malformed line makes the whole file invalid.
+    """
+    sections: dict[str, DesktopValues] = {}
+    current: DesktopValues | None = None
+    option: str | None = None
+    indent_level = 0
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith(COMMENT_PREFIXES):
+            if not stripped and current is not None and option:
+                current[option].append("")
+            continue
+        match = NON_SPACE.search(line)
+        line_indent = match.start() if match else 0
+        if current is not None and option and line_indent > indent_level:
+            current[option].append(stripped)
+            continue
+        indent_level = line_indent
+        header = ConfigParser.SECTCRE.match(stripped)
+        if header:
+            current = sections.setdefault(header.group("header"), {})
+            option = None
+            continue
+        if current is None:
+            return None
+        pair = ConfigParser.OPTCRE.match(stripped)
+        if not pair or not pair.group("option"):
+            return None
+        option = pair.group("option").rstrip().lower()
+        current[option] = [pair.group("value").strip()]
+    if DESKTOP_SECTION not in sections:
+        return {}
+    values = {**sections.get(DEFAULT_SECTION, {}), **sections[DESKTOP_SECTION]}
+    return {key: "\n".join(lines).rstrip() for key, lines in values.items()}
+
+
+class ExecutableIndex:
+    """Memoized `shutil.which` for the `PATH` at the time the index was created."""
+
+    def __init__(self, path: str | None = None):
+        if path is None:
+            path = os.environ.get("PATH", os.defpath)
+        self.directories = list(dict.fromkeys(path.split(os.pathsep))) if path else []
+        self._listings: dict[str, frozenset[str]] = {}
+        self._resolved: dict[str, str | None] = {}
+
+    def which(self, command: str) -> str | None:
+        if command not in self._resolved:
+            self._resolved[command] = self._lookup(command)
+        return self._resolved[command]
+
+    def _lookup(self, command: str) -> str | None:
+        if os.path.dirname(command) or os.name == "nt":
+            # Explicit paths and Windows executable extensions need no index
+            return which(command)
+        for directory in self.directories:
+            if command not in self._listing(directory):
+                continue
+            candidate = os.path.join(directory, command)
+            if os.access(candidate, os.X_OK) and not os.path.isdir(candidate):
+                return candidate
+        return None
+
+    def _listing(self, directory: str) -> frozenset[str]:
+        listing = self._listings.get(directory)
+        if listing is None:
+            try:
+                listing = frozenset(os.listdir(directory or os.curdir))
+            except OSError:
+                listing = frozenset()
+            self._listings[directory] = listing
+        return listing
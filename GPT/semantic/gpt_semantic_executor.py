@@ -3,6 +3,7 @@
 Purpose:
 - Exposes the public execution API for semantic plans.
 - Selects a Talon runner and delegates to the step executor implementation.
+- Passes on results prepared while the preview was open.
 
 Called from:
 - `GPT/semantic/gpt_semantic_runtime.py` when running a confirmed plan.
@@ -15,16 +16,21 @@ try:
 except (ModuleNotFoundError, ImportError):  # pragma: no cover
     talon_actions = None
 
+from .gpt_semantic_prepare import PreparedPlan
 from .gpt_semantic_step_executor import (
     GptSemanticExecutionError,
     GptSemanticStepExecutor,
+    StepTiming,
 )
 from .gpt_semantic_types import GptSemanticPlan
 
 
-def execute_plan(plan: GptSemanticPlan, runner: Any = None) -> None:
+def execute_plan(
+    plan: GptSemanticPlan, runner: Any = None, prepared: PreparedPlan | None = None
+) -> list[StepTiming]:
+    """Run the plan and return how long each compiled step took"""
     active_runner = runner if runner is not None else _default_runner()
-    GptSemanticStepExecutor(active_runner).run(plan)
+    return GptSemanticStepExecutor(active_runner, prepared).run(plan)
 
 
 def _default_runner() -> Any:
@@ -3,17 +3,30 @@
 Purpose:
 - Provides public launch catalog APIs used by planner context and executor.
 - Delegates reading and matching to focused helper modules.
+- Keeps a launch index that is rebuilt only when the catalog entries change.
+- Refreshes the catalog when desktop directories change or on request.
 
 Called from:
 - `GPT/semantic/gpt_semantic_context.py` to build planner context.
 - `GPT/semantic/gpt_semantic_executor_helpers.py` to resolve launch commands.
+- `GPT/semantic/gpt_semantic_runtime.py` for exact matches in the local planner.
 """
 
-from functools import lru_cache
+import threading
 from pathlib import Path
 
+try:
+    from talon import app, cron, fs
+except (ModuleNotFoundError, ImportError):  # pragma: no cover
+    app = None
+    cron = None
+    fs = None
+
+from .gpt_semantic_context_select import LAUNCH_MAX, LAUNCH_MIN, adaptive_k
+from .gpt_semantic_launch_index import LaunchIndex
 from .gpt_semantic_launch_matcher import LaunchMatcher
-from .gpt_semantic_launch_provider import LaunchProvider
+from .gpt_semantic_launch_service import LaunchCatalogService
+from .gpt_semantic_launch_text import normalize_text
 
 DESKTOP_DIRS = [
     Path.home() / ".local/share/applications",
@@ -21,6 +34,11 @@ DESKTOP_DIRS = [
     Path("/var/lib/flatpak/exports/share/applications"),
     Path.home() / ".local/share/flatpak/exports/share/applications",
 ]
+CACHE_PATH = Path(__file__).parents[2] / ".cache" / "semantic_launch_catalog.json"
+# Directory mtimes are polled for directories that cannot be watched
+POLL_INTERVAL = "60s"
+# Installers write several files at once, so wait for them to settle
+WATCH_DEBOUNCE = "2s"
 STOP_WORDS = {
     "a",
     "an",
@@ -35,9 +53,26 @@ STOP_WORDS = {
     "the",
 }
 
+_service = LaunchCatalogService(DESKTOP_DIRS, CACHE_PATH)
+_cached_index: LaunchIndex | None = None
+_refresh_job = None
+
 
 def launch_context_text(query: str = "", limit: int = 300) -> str:
-    entries = _matcher().rank_entries(query, launch_entries(), limit)
+    return format_launch_entries(_matcher().rank_entries(query, _index(), limit))
+
+
+def relevant_launch_entries(
+    query: str, minimum: int = LAUNCH_MIN, maximum: int = LAUNCH_MAX
+) -> list[tuple[str, str]]:
+    """The entries most relevant to the query, as many as adaptive_k allows"""
+    index = _index()
+    scores = _matcher().match_scores(query, index)
+    limit = adaptive_k(scores, minimum, maximum)
+    return _matcher().rank_entries(query, index, limit)
+
+
+def format_launch_entries(entries: list[tuple[str, str]]) -> str:
     if not entries:
         return "Launchable apps for launch_app: unavailable"
     lines = ["Launchable apps for launch_app (name => command):"]
@@ -46,13 +81,59 @@ def launch_context_text(query: str = "", limit: int = 300) -> str:
 
 
 def resolve_launch_command(app_name: str) -> str | None:
-    return _matcher().resolve(app_name, launch_entries())
+    return _matcher().resolve(app_name, _index())
+
+
+def exact_launch_command(app_name: str) -> str | None:
+    """Command of the only catalog entry whose name or command is app_name"""
+    index = _index()
+    commands = {index.entries[i][1] for i in index.exact(normalize_text(app_name))}
+    return commands.pop() if len(commands) == 1 else None
 
 
-@lru_cache(maxsize=1)
 def launch_entries() -> tuple[tuple[str, str], ...]:
-    return LaunchProvider(DESKTOP_DIRS).read_entries()
+    return _service.entries()
+
+
+def refresh_launch_catalog() -> int:
+    _service.refresh()
+    return len(_service.entries())
+
+
+def _index() -> LaunchIndex:
+    global _cached_index
+    entries = launch_entries()
+    if _cached_index is None or _cached_index.entries is not entries:
+        _cached_index = LaunchIndex(entries)
+    return _cached_index
 
 
 def _matcher() -> LaunchMatcher:
     return LaunchMatcher(STOP_WORDS)
+
+
+def _refresh_in_background(*_args) -> None:
+    threading.Thread(target=_service.refresh, daemon=True).start()
+
+
+def _on_directory_change(*_args) -> None:
+    global _refresh_job
+    if _refresh_job is not None:
+        cron.cancel(_refresh_job)
+    _refresh_job = cron.after(WATCH_DEBOUNCE, _refresh_in_background)
+
+
+def _poll_in_background() -> None:
+    threading.Thread(target=_service.poll, daemon=True).start()
+
+
+def _on_ready() -> None:
+    _refresh_in_background()
+    for directory in DESKTOP_DIRS:
+        if directory.is_dir():
+            fs.watch(str(directory), _on_directory_change)
+    cron.interval(POLL_INTERVAL, _poll_in_background)
+
+
+if app is not None:
+    app.register("ready", _on_ready)
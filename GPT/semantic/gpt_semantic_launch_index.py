@@ -0,0 +1,92 @@
+"""Precomputed lookup tables for launch catalog matching.
+
+Purpose:
+- Normalizes entry names and commands once per catalog instead of per query.
+- Finds substring matches through gram tables and token matches through an
+  inverted index so lookups only touch candidate entries.
+
+Called from:
+- `GPT/semantic/gpt_semantic_launch_catalog.py` to build the index.
+- `GPT/semantic/gpt_semantic_launch_matcher.py` to resolve and rank entries.
+"""
+
+from .gpt_semantic_launch_text import command_name, normalize_text
+
+LaunchEntries = tuple[tuple[str, str], ...]
+GramTable = dict[str, set[int]]
+
+GRAM_SIZE = 3
+TOKEN_CACHE_SIZE = 4096
+
+
+class LaunchIndex:
+    def __init__(self, entries: LaunchEntries):
+        self.entries = entries
+        self.name_keys = [normalize_text(name) for name, _ in entries]
+        self.command_keys = [command_name(command) for _, command in entries]
+        self.by_name = _positions(self.name_keys)
+        self.by_command = _positions(self.command_keys)
+        self.name_grams = _gram_table(self.name_keys)
+        self.command_grams = _gram_table(self.command_keys)
+        self.name_order = sorted(
+            range(len(entries)), key=lambda i: entries[i][0].lower()
+        )
+        self._token_cache: dict[str, set[int]] = {}
+
+    def name_matches(self, text: str) -> set[int]:
+        return _lookup(text, self.name_grams, self.name_keys)
+
+    def command_matches(self, text: str) -> set[int]:
+        return _lookup(text, self.command_grams, self.command_keys)
+
+    def matches(self, text: str) -> set[int]:
+        """Entries whose name key or command key contains text"""
+        cached = self._token_cache.get(text)
+        if cached is None:
+            if len(self._token_cache) >= TOKEN_CACHE_SIZE:
+                self._token_cache.clear()
+            cached = self.name_matches(text) | self.command_matches(text)
+            self._token_cache[text] = cached
+        return cached
+
+    def exact(self, text: str) -> set[int]:
+        """Entries whose name key or command key equals text"""
+        return self.by_name.get(text, set()) | self.by_command.get(text, set())
+
+
+def _positions(keys: list[str]) -> dict[str, set[int]]:
+    table: dict[str, set[int]] = {}
+    for position, key in enumerate(keys):
+        table.setdefault(key, set()).add(position)
+    return table
+
+
+def _grams(text: str) -> set[str]:
+    """Every substring of up to GRAM_SIZE characters"""
+    return {
+        text[start : start + size]
+        for size in range(1, GRAM_SIZE + 1)
+        for start in range(len(text) - size + 1)
+    }
+
+
+def _gram_table(keys: list[str]) -> GramTable:
+    table: GramTable = {}
+    for position, key in enumerate(keys):
+        for gram in _grams(key):
+            table.setdefault(gram, set()).add(position)
+    return table
+
+
+def _lookup(text: str, table: GramTable, keys: list[str]) -> set[int]:
+    if not text:
+        return set(range(len(keys)))
+    if len(text) <= GRAM_SIZE:
+        return set(table.get(text, ()))
+    postings = [
+        table.get(text[start : start + GRAM_SIZE], set())
+        for start in range(len(text) - GRAM_SIZE + 1)
+    ]
+    postings.sort(key=len)
+    candidates = set(postings[0]).intersection(*postings[1:])
+    return {position for position in candidates if text in keys[position]}
@@ -8,69 +8,67 @@ Called from:
 - `GPT/semantic/gpt_semantic_launch_catalog.py`.
 """
 
-from .gpt_semantic_launch_text import command_name, normalize_text
+from .gpt_semantic_launch_index import LaunchIndex
+from .gpt_semantic_launch_text import normalize_text
 
-LaunchEntries = tuple[tuple[str, str], ...]
+MIN_RELEVANT_TOKEN = 3
 
 
 class LaunchMatcher:
     def __init__(self, stop_words: set[str]):
         self.stop_words = stop_words
 
-    def resolve(self, app_name: str, entries: LaunchEntries) -> str | None:
+    def resolve(self, app_name: str, index: LaunchIndex) -> str | None:
         target = normalize_text(app_name)
-        return self._resolve_name(target, entries) or self._resolve_command(
-            target, entries
-        )
+        return self._resolve_name(target, index) or self._resolve_command(target, index)
 
     def rank_entries(
-        self, query: str, entries: LaunchEntries, limit: int
+        self, query: str, index: LaunchIndex, limit: int
     ) -> list[tuple[str, str]]:
         if not query.strip():
-            return list(entries[:limit])
-        return self._rank_with_query(query, entries, limit)
+            return list(index.entries[:limit])
+        return self._rank_with_query(query, index, limit)
+
+    def match_scores(self, query: str, index: LaunchIndex) -> list[int]:
+        """Scores of the entries that match the query, best first"""
+        # Words like "to" match inside many names, so they do not count as relevance
+        scores = self._scores(normalize_text(query), index, MIN_RELEVANT_TOKEN)
+        return sorted(scores.values(), reverse=True)
 
-    def _resolve_name(self, target: str, entries: LaunchEntries) -> str | None:
-        for name, command in entries:
-            if normalize_text(name) == target or (
-                target and target in normalize_text(name)
-            ):
-                return command
-        return None
+    def _resolve_name(self, target: str, index: LaunchIndex) -> str | None:
+        positions = index.by_name.get(target, set()) | (
+            index.name_matches(target) if target else set()
+        )
+        return index.entries[min(positions)][1] if positions else None
 
-    def _resolve_command(self, target: str, entries: LaunchEntries) -> str | None:
-        for _, command in entries:
-            if command_name(command) == target:
-                return command
-        return None
+    def _resolve_command(self, target: str, index: LaunchIndex) -> str | None:
+        positions = index.by_command.get(target)
+        return index.entries[min(positions)][1] if positions else None
 
     def _rank_with_query(
-        self, query: str, entries: LaunchEntries, limit: int
+        self, query: str, index: LaunchIndex, limit: int
     ) -> list[tuple[str, str]]:
-        scored = [(*row, self._score(query, *row)) for row in entries]
-        scored.sort(key=lambda row: (-row[2], row[0].lower()))
-        return [(name, command) for name, command, _ in scored[:limit]]
+        scores = self._scores(normalize_text(query), index)
+        ranked = sorted(
+            scores, key=lambda i: (-scores[i], index.entries[i][0].lower(), i)
+        )
+        ranked.extend(i for i in index.name_order if i not in scores)
+        return [index.entries[i] for i in ranked[:limit]]
 
-    def _score(self, query: str, name: str, command: str) -> int:
-        target = normalize_text(query)
+    def _scores(
+        self, target: str, index: LaunchIndex, min_token: int = 2
+    ) -> dict[int, int]:
+        """Scores of the entries that match the query; every other entry scores 0"""
+        scores: dict[int, int] = {}
         if not target:
-            return 0
-        name_key = normalize_text(name)
-        command_key = command_name(command)
-        score = self._base_score(target, name_key, command_key)
-        return score + self._token_score(target, name_key, command_key)
-
-    def _base_score(self, target: str, name_key: str, command_key: str) -> int:
-        if target == name_key or target == command_key:
-            return 10
-        if target in name_key or target in command_key:
-            return 5
-        return 0
-
-    def _token_score(self, target: str, name_key: str, command_key: str) -> int:
-        tokens = [
-            token
-            for token in target.split()
-            if token not in self.stop_words and len(token) > 1
-        ]
-        return sum(1 for token in tokens if token in name_key or token in command_key)
+            return scores
+        for position in index.matches(target):
+            scores[position] = 5
+        for position in index.exact(target):
+            scores[position] = 10
+        for token in target.split():
+            if token in self.stop_words or len(token) < min_token:
+                continue
+            for position in index.matches(token):
+                scores[position] = scores.get(position, 0) + 1
+        return {position: score for position, score in scores.items() if score}
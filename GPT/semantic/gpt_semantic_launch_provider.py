@@ -5,7 +5,7 @@ Purpose:
 - Falls back to semantic desktop entry reader when community data is unavailable.
 
 Called from:
-- `GPT/semantic/gpt_semantic_launch_catalog.py`.
+- `GPT/semantic/gpt_semantic_launch_service.py`.
 """
 
 from pathlib import Path
@@ -17,8 +17,13 @@ LaunchEntries = tuple[tuple[str, str], ...]
 
 
 class LaunchProvider:
-    def __init__(self, desktop_dirs: list[Path]):
+    def __init__(
+        self,
+        desktop_dirs: list[Path],
+        desktop_source: Callable[[], LaunchEntries] | None = None,
+    ):
         self.desktop_dirs = desktop_dirs
+        self.desktop_source = desktop_source
 
     def read_entries(self) -> LaunchEntries:
         return self._community_entries() or self._desktop_entries()
@@ -31,6 +36,8 @@ class LaunchProvider:
         return tuple(rows)
 
     def _desktop_entries(self) -> LaunchEntries:
+        if self.desktop_source is not None:
+            return self.desktop_source()
         return DesktopEntryReader(self.desktop_dirs).read_entries()
 
     def _load_community_apps(self) -> dict[str, str]:
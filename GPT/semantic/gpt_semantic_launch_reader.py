@@ -2,74 +2,114 @@
 
 Purpose:
 - Scans .desktop files and extracts normalized executable launch entries.
+- Reads files on a small thread pool and resolves executables with one index per scan.
 
 Called from:
-- `GPT/semantic/gpt_semantic_launch_catalog.py`.
+- `GPT/semantic/gpt_semantic_launch_provider.py` for a full scan.
+- `GPT/semantic/gpt_semantic_launch_service.py` to reparse changed files.
 """
 
-from configparser import ConfigParser
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from shlex import split
-from shutil import which
+from typing import Iterable
+
+from .gpt_semantic_desktop_entry import ExecutableIndex, parse_desktop_entry
 
 LaunchEntries = tuple[tuple[str, str], ...]
 
+READ_WORKERS = 8
+# Characters that make shlex.split differ from str.split on ASCII text
+SHLEX_SPECIAL = re.compile(r"[\"'\\\x0b\x0c\x1c-\x1f]")
+
+
+def split_command(command: str) -> list[str]:
+    if command.isascii() and not SHLEX_SPECIAL.search(command):
+        return command.split()
+    return split(command)
+
+
+def read_text(file_path: Path) -> str | None:
+    try:
+        with open(file_path, encoding="utf-8") as file:
+            return file.read()
+    except Exception:
+        return None
+
+
+def merge_entries(parsed: Iterable[tuple[str, str] | None]) -> LaunchEntries:
+    """Keep the first entry for each name, in directory order, sorted by name"""
+    merged: dict[str, str] = {}
+    for entry in parsed:
+        if entry is not None:
+            merged.setdefault(*entry)
+    return tuple(sorted(merged.items(), key=lambda item: item[0].lower()))
+
 
 class DesktopEntryReader:
     def __init__(self, directories: list[Path]):
         self.directories = directories
+        self.executables = ExecutableIndex()
 
     def read_entries(self) -> LaunchEntries:
-        merged: dict[str, str] = {}
-        for file_path in self._desktop_files():
-            parsed = self._parse_file(file_path)
-            if parsed is not None:
-                merged.setdefault(*parsed)
-        return tuple(sorted(merged.items(), key=lambda item: item[0].lower()))
-
-    def _desktop_files(self) -> list[Path]:
+        return merge_entries(self.parse_files(self.desktop_files()))
+
+    def desktop_files(self) -> list[Path]:
         files: list[Path] = []
         for directory in self.directories:
             if directory.exists():
                 files.extend(directory.glob("*.desktop"))
         return files
 
-    def _parse_file(self, file_path: Path) -> tuple[str, str] | None:
-        parser = self._read_parser(file_path)
-        if parser is None or not self._is_valid_entry(parser):
+    def parse_files(self, file_paths: list[Path]) -> list[tuple[str, str] | None]:
+        """Parse files in order, resolving executables against the current PATH."""
+        self.executables = ExecutableIndex()
+        return [
+            self._parse_text(text) if text is not None else None
+            for text in self._read_texts(file_paths)
+        ]
+
+    def _read_texts(self, file_paths: list[Path]) -> list[str | None]:
+        """Read files in a few batches on a pool; parsing is CPU bound so it stays serial"""
+        if len(file_paths) < READ_WORKERS * 4:
+            return [read_text(path) for path in file_paths]
+        batches = [file_paths[i::READ_WORKERS] for i in range(READ_WORKERS)]
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            results = list(executor.map(self._read_batch, batches))
+        texts: list[str | None] = [None] * len(file_paths)
+        for i, batch_texts in enumerate(results):
+            texts[i::READ_WORKERS] = batch_texts
+        return texts
+
+    def _read_batch(self, file_paths: list[Path]) -> list[str | None]:
+        return [read_text(path) for path in file_paths]
+
+    def _parse_text(self, text: str) -> tuple[str, str] | None:
+        values = parse_desktop_entry(text)
+        if values is None or not self._is_valid_entry(values):
             return None
-        return self._entry_values(parser)
+        return self._entry_values(values)
 
-    def _read_parser(self, file_path: Path) -> ConfigParser | None:
-        parser = ConfigParser(interpolation=None, strict=False)
-        try:
-            parser.read(file_path, encoding="utf-8")
-        except Exception:
-            return None
-        return parser
-
-    def _is_valid_entry(self, parser: ConfigParser) -> bool:
-        if parser.get("Desktop Entry", "Type", fallback="") != "Application":
+    def _is_valid_entry(self, values: dict[str, str]) -> bool:
+        if values.get("type", "") != "Application":
             return False
-        return (
-            parser.get("Desktop Entry", "NoDisplay", fallback="false").lower() != "true"
-        )
-
-    def _entry_values(self, parser: ConfigParser) -> tuple[str, str] | None:
-        name = parser.get("Desktop Entry", "Name", fallback="").strip()
-        command = self._canonical_exec(
-            self._clean_exec(parser.get("Desktop Entry", "Exec", fallback=""))
-        )
+        return values.get("nodisplay", "false").lower() != "true"
+
+    def _entry_values(self, values: dict[str, str]) -> tuple[str, str] | None:
+        name = values.get("name", "").strip()
+        command = self._canonical_exec(self._clean_exec(values.get("exec", "")))
         if not name or not command or self._looks_like_web_shortcut(name, command):
             return None
         return name, command
 
     def _clean_exec(self, exec_line: str) -> str:
-        parts = [part for part in split(exec_line) if not part.startswith("%")]
+        parts = split_command(exec_line)
+        parts = [part for part in parts if not part.startswith("%")]
         return " ".join(parts).strip()
 
     def _canonical_exec(self, command: str) -> str:
-        parts = split(command) if command else []
+        parts = split_command(command) if command else []
         if not parts:
             return ""
         resolved = self._resolve_executable(parts[0])
@@ -81,7 +121,7 @@ class DesktopEntryReader:
     def _resolve_executable(self, command: str) -> str | None:
         if command.startswith("/") and Path(command).is_file():
             return command
-        return which(command)
+        return self.executables.which(command)
 
     def _looks_like_web_shortcut(self, name: str, command: str) -> bool:
         combined = f"{name}\n{command}".lower()
@@ -0,0 +1,138 @@
+"""Incrementally refreshed launch catalog backed by an on-disk cache.
+
+Purpose:
+- Keeps the launch catalog current without rescanning every desktop file.
+- Reparses only .desktop files whose path or mtime changed since the last scan.
+- Persists parsed desktop entries so startup does not pay for a full scan.
+
+Called from:
+- `GPT/semantic/gpt_semantic_launch_catalog.py`, which owns the service and
+  triggers refreshes from file watchers, polling, and the refresh action.
+"""
+
+import json
+import threading
+from pathlib import Path
+
+from .gpt_semantic_launch_provider import LaunchProvider
+from .gpt_semantic_launch_reader import DesktopEntryReader, merge_entries
+
+LaunchEntries = tuple[tuple[str, str], ...]
+# Path -> (mtime in nanoseconds, parsed entry or None for files that are not launchable)
+FileCache = dict[str, tuple[int, tuple[str, str] | None]]
+
+CACHE_VERSION = 1
+
+
+class LaunchCatalogService:
+    def __init__(self, directories: list[Path], cache_path: Path):
+        self.directories = directories
+        self.cache_path = cache_path
+        self.reader = DesktopEntryReader(directories)
+        self.provider = LaunchProvider(directories, self.desktop_entries)
+        self._files: FileCache = {}
+        self._directory_mtimes: dict[str, int] = {}
+        self._entries: LaunchEntries | None = None
+        self._lock = threading.RLock()
+
+    def entries(self) -> LaunchEntries:
+        with self._lock:
+            if self._entries is None:
+                if self._load():
+                    self._update_entries()
+                else:
+                    self.refresh()
+            return self._entries  # type: ignore
+
+    def desktop_entries(self) -> LaunchEntries:
+        with self._lock:
+            return merge_entries(entry for _, entry in self._files.values())
+
+    def refresh(self) -> bool:
+        """Reparse new and changed desktop files. Returns True if the catalog changed."""
+        with self._lock:
+            # Checked first so that changes made during the scan are found by poll
+            self._directory_mtimes = self._scan_directories()
+            files = self._scan_files()
+            if files != self._files:
+                self._files = files
+                self._save()
+            return self._update_entries()
+
+    def poll(self) -> bool:
+        """Refresh if a desktop directory changed, otherwise only recheck other sources."""
+        with self._lock:
+            if self._entries is None:
+                return False
+            if self._scan_directories() != self._directory_mtimes:
+                return self.refresh()
+            return self._update_entries()
+
+    def _scan_files(self) -> FileCache:
+        files: FileCache = {}
+        changed: list[tuple[Path, int]] = []
+        for path in self.reader.desktop_files():
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            cached = self._files.get(str(path))
+            if cached is not None and cached[0] == mtime:
+                files[str(path)] = cached
+            else:
+                # Reserve the position so directory order is kept for merging
+                files[str(path)] = (mtime, None)
+                changed.append((path, mtime))
+        parsed = self.reader.parse_files([path for path, _ in changed])
+        for (path, mtime), entry in zip(changed, parsed):
+            files[str(path)] = (mtime, entry)
+        return files
+
+    def _scan_directories(self) -> dict[str, int]:
+        mtimes: dict[str, int] = {}
+        for directory in self.directories:
+            try:
+                mtimes[str(directory)] = directory.stat().st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def _update_entries(self) -> bool:
+        entries = self.provider.read_entries()
+        if entries == self._entries:
+            # Keep the same tuple so indexes built from it stay valid
+            return False
+        self._entries = entries
+        return True
+
+    def _load(self) -> bool:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            if data.get("version") != CACHE_VERSION:
+                return False
+            self._files = {
+                path: (row[0], (row[1], row[2]) if len(row) == 3 else None)
+                for path, row in data["files"].items()
+            }
+            self._directory_mtimes = data["directories"]
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            self._files = {}
+            return False
+        return True
+
+    def _save(self) -> None:
+        data = {
+            "version": CACHE_VERSION,
+            "directories": self._directory_mtimes,
+            "files": {
+                path: [mtime, *entry] if entry is not None else [mtime]
+                for path, (mtime, entry) in self._files.items()
+            },
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(data), encoding="utf-8")
+            temp_path.replace(self.cache_path)
+        except OSError:
+            pass
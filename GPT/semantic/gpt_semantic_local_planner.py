@@ -0,0 +1,107 @@
+"""Deterministic planner for trivial semantic requests.
+
+Purpose:
+- Plans single-step requests such as "switch to slack", "new tab", "undo" or
+  "go to example.com" locally, without a model round trip.
+- Only answers when the request is unambiguous and falls through otherwise.
+- Counts fast-path hits and misses.
+
+Called from:
+- `GPT/semantic/gpt_semantic_runtime.py` before the plan cache and the model.
+"""
+
+import re
+from typing import Callable
+
+from .gpt_semantic_types import ACTION_ARG_SPECS, GptSemanticPlan, GptSemanticStep
+
+PHRASE_ACTIONS: dict[str, tuple[str, ...]] = {
+    "new_tab": ("new tab", "open tab", "open new tab", "open a new tab"),
+    "focus_address": ("address bar", "focus address", "focus address bar"),
+    "copy": ("copy", "copy that", "copy selection"),
+    "paste": ("paste", "paste that", "paste clipboard"),
+    "select_all": ("select all", "select everything"),
+    "undo": ("undo", "undo that"),
+    "redo": ("redo", "redo that"),
+    "line_start": ("line start", "start of line", "go to line start"),
+    "line_end": ("line end", "end of line", "go to line end"),
+    "delete_selection": ("delete selection", "delete that"),
+}
+PHRASES = {
+    phrase: action
+    for action, phrases in PHRASE_ACTIONS.items()
+    if not ACTION_ARG_SPECS[action]
+    for phrase in phrases
+}
+URL_PREFIXES = ("go to ", "open ", "visit ", "browse to ", "navigate to ")
+SWITCH_PREFIXES = ("switch to ", "focus ", "go to ", "bring up ", "open ")
+LAUNCH_PREFIXES = ("launch ", "open ", "start ", "run ")
+URL = re.compile(r"(https?://)?([a-z0-9-]+\.)+[a-z]{2,}(/\S*)?")
+POLITE_WORDS = {"please", "now"}
+
+
+class LocalPlanner:
+    def __init__(
+        self,
+        running_apps: Callable[[], list[str]],
+        launch_command: Callable[[str], str | None],
+    ):
+        self.running_apps = running_apps
+        # Returns a command only for an unambiguous catalog match
+        self.launch_command = launch_command
+        self.stats = {"hits": 0, "misses": 0}
+
+    def plan(self, request: str) -> GptSemanticPlan | None:
+        step = self._step(_normalize(request))
+        self.stats["hits" if step else "misses"] += 1
+        return GptSemanticPlan(steps=[step]) if step else None
+
+    def _step(self, text: str) -> GptSemanticStep | None:
+        if text in PHRASES:
+            return GptSemanticStep(PHRASES[text], {})
+        url = _url_target(text)
+        if url:
+            return GptSemanticStep("go_url", {"url": url})
+        target = _strip_prefix(text, SWITCH_PREFIXES)
+        app_name = _running_match(target, self.running_apps()) if target else None
+        if app_name:
+            return GptSemanticStep("switch_app", {"app_name": app_name})
+        target = _strip_prefix(text, LAUNCH_PREFIXES + SWITCH_PREFIXES)
+        command = self.launch_command(target) if target else None
+        if command:
+            return GptSemanticStep("launch_app", {"app_name": command})
+        return None
+
+
+def _normalize(text: str) -> str:
+    words = text.lower().replace(" dot ", ".").strip(" .!?").split()
+    return " ".join(word for word in words if word not in POLITE_WORDS)
+
+
+def _strip_prefix(text: str, prefixes: tuple[str, ...]) -> str | None:
+    for prefix in prefixes:
+        if text.startswith(prefix):
+            return text[len(prefix) :].strip()
+    return None
+
+
+def _url_target(text: str) -> str | None:
+    target = _strip_prefix(text, URL_PREFIXES)
+    if target is None or not URL.fullmatch(target):
+        return None
+    return target if "://" in target else f"https://{target}"
+
+
+def _app_key(name: str) -> str:
+    return " ".join(name.lower().replace("-", " ").replace("_", " ").split())
+
+
+def _running_match(target: str, names: list[str]) -> str | None:
+    """The only running app named target, or whose name contains it as whole words"""
+    key = _app_key(target)
+    exact = [name for name in names if _app_key(name) == key]
+    if exact:
+        return exact[0] if len(exact) == 1 else None
+    padded = f" {key} "
+    partial = [name for name in names if padded in f" {_app_key(name)} "]
+    return partial[0] if len(partial) == 1 else None
@@ -53,6 +53,30 @@ mod.setting(
     default=180,
     desc="Small delay after UI-sensitive steps to reduce race conditions",
 )
+mod.setting(
+    "gpt_semantic_response_format",
+    type=str,
+    default="json_schema",
+    desc="Structured output for semantic plans: json_schema, json_object (JSON mode) or off. Rejected formats fall back to the next one",
+)
+mod.setting(
+    "gpt_semantic_prune_context",
+    type=bool,
+    default=True,
+    desc="Send only the running and launchable apps relevant to the request, retrying with all of them if planning fails",
+)
+mod.setting(
+    "gpt_semantic_local_planner",
+    type=bool,
+    default=True,
+    desc="Plan trivial single-step requests like 'switch to slack' or 'undo' without the model",
+)
+mod.setting(
+    "gpt_semantic_plan_cache_size",
+    type=int,
+    default=200,
+    desc="Number of successfully run semantic plans and templates to reuse without the model, 0 to disable",
+)
 mod.setting(
     "gpt_semantic_system_prompt",
     type=str,
@@ -2,6 +2,8 @@
 
 Purpose:
 - Parses model output into typed plan objects.
+- Recovers JSON wrapped in code fences or prose, or with trailing commas,
+  before strict validation so these slips need no repair round trip.
 - Rejects unknown actions, bad args, and extra fields.
 
 Called from:
@@ -11,10 +13,13 @@ Called from:
 from __future__ import annotations
 
 import json
+import re
 from typing import Any
 
 from .gpt_semantic_types import ACTION_ARG_SPECS, GptSemanticPlan, GptSemanticStep
 
+FENCE = re.compile(r"```[a-zA-Z]*\s*\n([\s\S]*?)```")
+
 
 class GptSemanticParseError(ValueError):
     def __init__(self, errors: list[str]):
@@ -37,12 +42,53 @@ def parse_plan(raw_response: str) -> GptSemanticPlan:
     return GptSemanticPlan(steps=steps, summary=summary)
 
 
+def clean_json_text(raw: str) -> str:
+    """The first JSON object in raw, without code fences, prose or trailing commas"""
+    fenced = FENCE.search(raw)
+    text = fenced.group(1) if fenced else raw
+    start = text.find("{")
+    if start == -1:
+        return raw
+    out: list[str] = []
+    depth = 0
+    in_string = False
+    escaped = False
+    for char in text[start:]:
+        if escaped:
+            escaped = False
+        elif in_string:
+            escaped = char == "\\"
+            in_string = char != '"'
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            depth -= 1
+        out.append(char)
+        if depth == 0:
+            break
+    return "".join(out)
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    position = len(out) - 1
+    while position >= 0 and out[position].isspace():
+        position -= 1
+    if position >= 0 and out[position] == ",":
+        del out[position]
+
+
 def _load_json(raw: str, errors: list[str]) -> dict[str, Any] | None:
     try:
         payload = json.loads(raw)
     except json.JSONDecodeError as exc:
-        errors.append(f"Response is not valid JSON: {exc}")
-        return None
+        try:
+            payload = json.loads(clean_json_text(raw))
+        except json.JSONDecodeError:
+            errors.append(f"Response is not valid JSON: {exc}")
+            return None
     if not isinstance(payload, dict):
         errors.append("Root must be an object")
         return None
@@ -0,0 +1,227 @@
+"""Plan cache and learned templates for repeated semantic requests.
+
+Purpose:
+- Reuses plans for requests that were already planned and run successfully.
+- Learns parameterized templates so "go to X" variants reuse a known plan shape.
+- Evicts the least recently used plans and persists them to a JSON file.
+
+Called from:
+- `GPT/semantic/gpt_semantic_runtime.py` before asking the model for a plan and
+  after a plan has run successfully.
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+from .gpt_semantic_types import GptSemanticPlan, GptSemanticStep, plan_to_dict
+
+# Version 1 templates could hold slots inside longer words, so they are dropped
+CACHE_VERSION = 2
+# Marks a template slot inside stored argument strings
+SLOT = "\u0000{}\u0000"
+SLOT_PATTERN = re.compile("\u0000(\\d+)\u0000")
+MIN_SLOT_LENGTH = 3
+TEMPLATE_STOP_WORDS = {"and", "the", "then", "open", "launch", "switch", "tab", "new"}
+
+
+def normalize_request(text: str) -> str:
+    lowered = re.sub(r"[^\w\s./:-]", " ", text.lower())
+    # Keep dots and slashes inside words such as urls, but not sentence punctuation
+    return " ".join(word for word in (w.strip(".:-/") for w in lowered.split()) if word)
+
+
+class PlanCache:
+    def __init__(self, path: Path, capacity: int = 200):
+        self.path = path
+        self.capacity = capacity
+        self.stats = {"hits": 0, "template_hits": 0, "misses": 0}
+        # Normalized request -> {"plan": plan dict, "fingerprint": context fingerprint}
+        self._plans: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        # Request pattern with slots -> plan dict with slots
+        self._templates: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def lookup(
+        self, request: str, fingerprint: Callable[[GptSemanticPlan], str]
+    ) -> GptSemanticPlan | None:
+        """Return the stored plan if its context still matches, or a template match."""
+        key = normalize_request(request)
+        with self._lock:
+            self._load()
+            entry = self._plans.get(key)
+            if entry is not None:
+                plan = _plan_from_dict(entry["plan"])
+                if fingerprint(plan) == entry["fingerprint"]:
+                    self._plans.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return plan
+                # The apps it depends on changed, so the model has to plan it again
+                del self._plans[key]
+                self.stats["misses"] += 1
+                return None
+            plan = self._match_template(key.split())
+            self.stats["template_hits" if plan else "misses"] += 1
+            return plan
+
+    def store(self, request: str, plan: GptSemanticPlan, fingerprint: str) -> None:
+        """Remember a plan that ran successfully, and learn a template from it."""
+        key = normalize_request(request)
+        plan_dict = plan_to_dict(plan)
+        with self._lock:
+            self._load()
+            self._plans[key] = {"plan": plan_dict, "fingerprint": fingerprint}
+            self._plans.move_to_end(key)
+            template = _make_template(key.split(), plan_dict)
+            if template is not None:
+                self._templates[template[0]] = template[1]
+                self._templates.move_to_end(template[0])
+            self._evict()
+            self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self._templates.clear()
+            self._loaded = True
+            self._save()
+
+    def _match_template(self, tokens: list[str]) -> GptSemanticPlan | None:
+        for pattern in reversed(self._templates):
+            values = _match_pattern(pattern.split(), tokens)
+            if values is not None:
+                self._templates.move_to_end(pattern)
+                return _plan_from_dict(_fill_slots(self._templates[pattern], values))
+        return None
+
+    def _evict(self) -> None:
+        for table in (self._plans, self._templates):
+            while len(table) > max(0, self.capacity):
+                table.popitem(last=False)
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return
+        self._plans = OrderedDict(data.get("plans", {}))
+        self._templates = OrderedDict(data.get("templates", {}))
+
+    def _save(self) -> None:
+        data = {
+            "version": CACHE_VERSION,
+            "plans": self._plans,
+            "templates": self._templates,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(data), encoding="utf-8")
+            temp_path.replace(self.path)
+        except OSError:
+            pass
+
+
+def _plan_from_dict(payload: dict[str, Any]) -> GptSemanticPlan:
+    steps = [
+        GptSemanticStep(action=step["action"], args=dict(step["args"]))
+        for step in payload["steps"]
+    ]
+    return GptSemanticPlan(steps=steps, summary=payload.get("summary"))
+
+
+def _make_template(
+    tokens: list[str], plan_dict: dict[str, Any]
+) -> tuple[str, dict[str, Any]] | None:
+    """Turn request words that reappear in step arguments into slots.
+
+    A slot only replaces whole words, and a word that occurs in the arguments
+    more than once gives no template, since its occurrences could mean different
+    things.
+    """
+    strings = [
+        value
+        for step in plan_dict["steps"]
+        for value in step["args"].values()
+        if isinstance(value, str)
+    ]
+    slots = []
+    for token in dict.fromkeys(tokens):
+        if (
+            len(token) < MIN_SLOT_LENGTH
+            or token in TEMPLATE_STOP_WORDS
+            or tokens.count(token) != 1
+        ):
+            continue
+        matches = sum(len(_word_pattern(token).findall(value)) for value in strings)
+        if matches > 1:
+            return None
+        if matches == 1:
+            slots.append(token)
+    if not slots or len(tokens) - len(slots) < len(slots):
+        return None
+    pattern = " ".join(
+        SLOT.format(slots.index(token)) if token in slots else token for token in tokens
+    )
+    return pattern, _replace_in_args(plan_dict, slots)
+
+
+def _word_pattern(token: str) -> re.Pattern[str]:
+    return re.compile(rf"(?<!\w){re.escape(token)}(?!\w)", re.IGNORECASE)
+
+
+def _replace_in_args(plan_dict: dict[str, Any], slots: list[str]) -> dict[str, Any]:
+    def replace(value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        for index, token in enumerate(slots):
+            value = _word_pattern(token).sub(SLOT.format(index), value)
+        return value
+
+    steps = [
+        {
+            "action": step["action"],
+            "args": {name: replace(value) for name, value in step["args"].items()},
+        }
+        for step in plan_dict["steps"]
+    ]
+    return {**plan_dict, "steps": steps}
+
+
+def _match_pattern(pattern: list[str], tokens: list[str]) -> list[str] | None:
+    if len(pattern) != len(tokens):
+        return None
+    values: dict[int, str] = {}
+    for expected, token in zip(pattern, tokens):
+        slot = SLOT_PATTERN.fullmatch(expected)
+        if slot is None:
+            if expected != token:
+                return None
+        else:
+            values[int(slot.group(1))] = token
+    return [values[index] for index in sorted(values)]
+
+
+def _fill_slots(template: dict[str, Any], values: list[str]) -> dict[str, Any]:
+    def fill(value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        return SLOT_PATTERN.sub(lambda match: values[int(match.group(1))], value)
+
+    steps = [
+        {
+            "action": step["action"],
+            "args": {name: fill(value) for name, value in step["args"].items()},
+        }
+        for step in template["steps"]
+    ]
+    return {**template, "steps": steps}
@@ -0,0 +1,63 @@
+"""Speculative preparation of a previewed semantic plan.
+
+Purpose:
+- Resolves launch candidates, running app checks, and the plan cache fingerprint
+  while the preview is open, so running the plan can start immediately.
+- Records the running apps and launch catalog the results were computed from so
+  they are only used if both are unchanged at run time.
+
+Called from:
+- `GPT/semantic/gpt_semantic_runtime.py` after showing the preview and when
+  running the pending plan.
+- `GPT/semantic/gpt_semantic_step_executor.py` to use the prepared results.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .gpt_semantic_types import GptSemanticPlan
+
+APP_ACTIONS = ("switch_app", "launch_app")
+# Steps after which the set of running apps may differ from the prepared one
+APP_STATE_ACTIONS = ("switch_app", "launch_app", "key")
+
+
+@dataclass(frozen=True)
+class PreparedPlan:
+    plan: GptSemanticPlan
+    running_apps: tuple[str, ...]
+    catalog: Any
+    running: dict[str, bool]
+    candidates: dict[str, list[str]]
+    fingerprint: str
+
+    def is_current(
+        self, plan: GptSemanticPlan, running_apps: list[str], catalog: Any
+    ) -> bool:
+        """Whether this was prepared for plan with the same apps and catalog"""
+        return (
+            plan is self.plan
+            and tuple(running_apps) == self.running_apps
+            and catalog is self.catalog
+        )
+
+
+def prepare_plan(
+    plan: GptSemanticPlan,
+    running_apps: list[str],
+    catalog: Any,
+    is_running: Callable[[str], bool],
+    candidates: Callable[[str], list[str]],
+    fingerprint: Callable[[GptSemanticPlan], str],
+) -> PreparedPlan:
+    app_names = dict.fromkeys(
+        str(step.args["app_name"]) for step in plan.steps if step.action in APP_ACTIONS
+    )
+    return PreparedPlan(
+        plan=plan,
+        running_apps=tuple(running_apps),
+        catalog=catalog,
+        running={name: is_running(name) for name in app_names},
+        candidates={name: candidates(name) for name in app_names},
+        fingerprint=fingerprint(plan),
+    )
@@ -3,23 +3,54 @@
 Purpose:
 - Coordinates translation, parse/guardrail validation, preview state, and execution.
 - Handles retry-on-parse-failure and user notifications.
+- Plans trivial requests locally and reuses cached plans for repeated requests.
+- Prepares the pending plan while its preview is open so running it starts at once.
 
 Called from:
 - `GPT/semantic/gpt_semantic_actions.py` action entry points.
 """
 
-from talon import actions, clip, settings
+from pathlib import Path
 
-from .gpt_semantic_context import semantic_context_text
+from talon import actions, clip, cron, settings
+
+from .gpt_semantic_context import (
+    context_stats,
+    plan_context_fingerprint,
+    running_app_names,
+    semantic_contexts,
+)
 from .gpt_semantic_executor import GptSemanticExecutionError, execute_plan
+from .gpt_semantic_executor_helpers import is_running_app, launch_candidates
 from .gpt_semantic_guardrails import validate_guardrails
 from .gpt_semantic_gui import hide_preview, show_preview
+from .gpt_semantic_launch_catalog import (
+    exact_launch_command,
+    launch_entries,
+    refresh_launch_catalog,
+)
+from .gpt_semantic_local_planner import LocalPlanner
 from .gpt_semantic_parser import GptSemanticParseError, parse_plan
+from .gpt_semantic_plan_cache import PlanCache
+from .gpt_semantic_prepare import PreparedPlan, prepare_plan
 from .gpt_semantic_prompt import build_repair_prompt, build_user_prompt
+from .gpt_semantic_schema import response_format
 from .gpt_semantic_state import GptSemanticState
 from .gpt_semantic_transport import request_completion
 from .gpt_semantic_types import GptSemanticPlan, plan_to_json
 
+try:
+    from ...lib.modelSession import warm
+    from ...lib.modelTracing import tracer
+except ImportError:
+    from lib.modelSession import warm
+    from lib.modelTracing import tracer
+
+CACHE_PATH = Path(__file__).parents[2] / ".cache" / "semantic_plans.json"
+
+plan_cache = PlanCache(CACHE_PATH)
+local_planner = LocalPlanner(running_app_names, exact_launch_command)
+
 
 class GptSemanticRuntime:
     @staticmethod
@@ -28,7 +59,9 @@ class GptSemanticRuntime:
             return GptSemanticRuntime._notify("Semantic command is empty")
         try:
             count = GptSemanticRuntime._translate_and_store(text, model)
-            GptSemanticRuntime._notify(f"Semantic plan ready: {count} steps")
+            source = GptSemanticState.pending_source
+            note = f" ({source})" if source in ("local", "cache") else ""
+            GptSemanticRuntime._notify(f"Semantic plan ready: {count} steps{note}")
         except Exception as exc:
             GptSemanticState.set_error(str(exc))
             GptSemanticRuntime._notify(f"Semantic planning failed: {exc}")
@@ -39,7 +72,20 @@ class GptSemanticRuntime:
         if plan is None:
             return GptSemanticRuntime._notify("No semantic plan to run")
         try:
-            execute_plan(plan)
+            prepared = GptSemanticRuntime._current_preparation(plan)
+            # Taken before running since launching apps changes what is running
+            fingerprint = (
+                prepared.fingerprint if prepared else plan_context_fingerprint(plan)
+            )
+            with tracer.span("semantic_execute", steps=len(plan.steps)):
+                timings = execute_plan(plan, prepared=prepared)
+            if settings.get("user.gpt_semantic_debug"):
+                for timing in timings:
+                    print(
+                        f"Semantic step {timing.index} {timing.action}"
+                        f" x{timing.count}: {timing.ms:.1f}ms"
+                    )
+            GptSemanticRuntime._cache_plan(plan, fingerprint)
             GptSemanticState.confirm_pending()
             GptSemanticState.clear_pending()
             hide_preview()
@@ -67,44 +113,179 @@ class GptSemanticRuntime:
         plan_json = GptSemanticState.last_confirmed_plan_json
         if plan is None or plan_json is None:
             return GptSemanticRuntime._notify("No last semantic plan to repeat")
-        GptSemanticState.set_pending("Repeat last confirmed plan", plan, plan_json)
+        GptSemanticState.set_pending(
+            "Repeat last confirmed plan", plan, plan_json, "repeat"
+        )
         show_preview()
+        GptSemanticRuntime._prepare_later(plan)
+
+    @staticmethod
+    def refresh_launch_catalog() -> None:
+        count = refresh_launch_catalog()
+        GptSemanticRuntime._notify(f"Launch catalog refreshed: {count} apps")
+
+    @staticmethod
+    def clear_plan_cache() -> None:
+        plan_cache.clear()
+        GptSemanticRuntime._notify("Semantic plan cache cleared")
+
+    @staticmethod
+    def show_stats() -> None:
+        local = GptSemanticRuntime._hit_rate(
+            local_planner.stats["hits"], local_planner.stats["misses"]
+        )
+        cached = plan_cache.stats["hits"] + plan_cache.stats["template_hits"]
+        cache = GptSemanticRuntime._hit_rate(cached, plan_cache.stats["misses"])
+        pruned = f"{context_stats.saved_percent()}% saved"
+        retries = f"{context_stats.wide_retries} full context retries"
+        GptSemanticRuntime._notify(
+            f"Semantic plans local {local}, cached {cache}; context {pruned}, {retries}"
+        )
 
     @staticmethod
     def _translate_and_store(text: str, model: str) -> int:
-        plan = GptSemanticRuntime._translate_request(text, model)
-        plan_json = plan_to_json(plan)
-        GptSemanticState.set_pending(text, plan, plan_json)
-        show_preview()
+        with tracer.span("semantic_plan") as span:
+            plan = GptSemanticRuntime._local_plan(text)
+            source = "local"
+            if plan is None:
+                plan = GptSemanticRuntime._cached_plan(text)
+                source = "cache"
+            if plan is None:
+                plan = GptSemanticRuntime._translate_request(text, model)
+                source = "model"
+            span.set(source=source, steps=len(plan.steps))
+            plan_json = plan_to_json(plan)
+            GptSemanticState.set_pending(text, plan, plan_json, source)
+            with tracer.span("semantic_preview"):
+                show_preview()
+        GptSemanticRuntime._prepare_later(plan)
         return len(plan.steps)
 
+    @staticmethod
+    def _prepare_later(plan: GptSemanticPlan) -> None:
+        """Prepare the plan after the preview is drawn, while the user reads it"""
+        cron.after("0ms", lambda: GptSemanticRuntime._prepare(plan))
+
+    @staticmethod
+    def _prepare(plan: GptSemanticPlan) -> None:
+        if GptSemanticState.pending_plan is not plan:
+            return
+        if settings.get("user.model_http_prewarm"):
+            # Keeps the pooled connection open for the next request or repair
+            warm()
+        try:
+            GptSemanticState.pending_prepared = prepare_plan(
+                plan,
+                running_app_names(),
+                launch_entries(),
+                is_running_app,
+                launch_candidates,
+                plan_context_fingerprint,
+            )
+        except Exception as exc:
+            # Running the plan resolves everything itself if preparation fails
+            if settings.get("user.gpt_semantic_debug"):
+                print(f"Semantic plan preparation failed: {exc}")
+
+    @staticmethod
+    def _current_preparation(plan: GptSemanticPlan) -> PreparedPlan | None:
+        """The prepared results, if the running apps and catalog are unchanged"""
+        prepared = GptSemanticState.pending_prepared
+        if prepared is None:
+            return None
+        if not prepared.is_current(plan, running_app_names(), launch_entries()):
+            return None
+        return prepared
+
+    @staticmethod
+    def _local_plan(text: str) -> GptSemanticPlan | None:
+        if not settings.get("user.gpt_semantic_local_planner"):
+            return None
+        plan = local_planner.plan(text)
+        return GptSemanticRuntime._checked(plan) if plan else None
+
+    @staticmethod
+    def _cached_plan(text: str) -> GptSemanticPlan | None:
+        plan_cache.capacity = settings.get("user.gpt_semantic_plan_cache_size")
+        if plan_cache.capacity <= 0:
+            return None
+        plan = plan_cache.lookup(text, plan_context_fingerprint)
+        return GptSemanticRuntime._checked(plan) if plan else None
+
+    @staticmethod
+    def _checked(plan: GptSemanticPlan) -> GptSemanticPlan | None:
+        """Check plans made without the model like model output, None if invalid"""
+        try:
+            return GptSemanticRuntime._parse_and_validate(plan_to_json(plan))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _cache_plan(plan: GptSemanticPlan, fingerprint: str) -> None:
+        request = GptSemanticState.pending_request
+        if request is None or GptSemanticState.pending_source not in ("model", "cache"):
+            return
+        plan_cache.capacity = settings.get("user.gpt_semantic_plan_cache_size")
+        if plan_cache.capacity > 0:
+            plan_cache.store(request, plan, fingerprint)
+
     @staticmethod
     def _translate_request(text: str, model: str) -> GptSemanticPlan:
-        debug = settings.get("user.gpt_semantic_debug")
-        prompt = build_user_prompt(text, semantic_context_text(text))
-        raw = request_completion(
-            settings.get("user.gpt_semantic_system_prompt"), prompt, model, debug
-        )
+        prune = settings.get("user.gpt_semantic_prune_context")
+        with tracer.span("semantic_context", pruned=bool(prune)):
+            context, full_context = semantic_contexts(text, prune)
+        if full_context is None:
+            return GptSemanticRuntime._plan_with_context(text, model, context.text)
+        try:
+            plan = GptSemanticRuntime._plan_with_context(text, model, context.text)
+            if context.covers(plan, full_context):
+                return plan
+        except ValueError:
+            pass
+        # The pruned context may have left out what the request needed
+        context_stats.record_retry()
+        return GptSemanticRuntime._plan_with_context(text, model, full_context.text)
+
+    @staticmethod
+    def _plan_with_context(text: str, model: str, context_text: str) -> GptSemanticPlan:
+        prompt = build_user_prompt(text, context_text)
+        raw = GptSemanticRuntime._request_plan(prompt, model)
         try:
             return GptSemanticRuntime._parse_and_validate(raw)
         except GptSemanticParseError as exc:
             repair = build_repair_prompt(raw, exc.errors)
-            fixed = request_completion(
-                settings.get("user.gpt_semantic_system_prompt"), repair, model, debug
-            )
+            fixed = GptSemanticRuntime._request_plan(repair, model)
             return GptSemanticRuntime._parse_and_validate(fixed)
 
+    @staticmethod
+    def _request_plan(prompt: str, model: str) -> str:
+        with tracer.span("semantic_model_request"):
+            return request_completion(
+                settings.get("user.gpt_semantic_system_prompt"),
+                prompt,
+                model,
+                settings.get("user.gpt_semantic_debug"),
+                response_format(settings.get("user.gpt_semantic_response_format")),
+            )
+
     @staticmethod
     def _parse_and_validate(raw: str) -> GptSemanticPlan:
-        plan = parse_plan(raw)
-        validate_guardrails(
-            plan,
-            settings.get("user.gpt_semantic_max_steps"),
-            settings.get("user.gpt_semantic_max_total_sleep_ms"),
-            settings.get("user.gpt_semantic_max_insert_chars"),
-        )
+        with tracer.span("semantic_parse"):
+            plan = parse_plan(raw)
+            validate_guardrails(
+                plan,
+                settings.get("user.gpt_semantic_max_steps"),
+                settings.get("user.gpt_semantic_max_total_sleep_ms"),
+                settings.get("user.gpt_semantic_max_insert_chars"),
+            )
         return plan
 
+    @staticmethod
+    def _hit_rate(hits: int, misses: int) -> str:
+        total = hits + misses
+        percent = 100 * hits // total if total else 0
+        return f"{hits}/{total} ({percent}%)"
+
     @staticmethod
     def _notify(message: str) -> None:
         actions.app.notify(message)
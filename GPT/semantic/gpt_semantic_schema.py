@@ -0,0 +1,70 @@
+"""JSON schema and response formats for structured semantic planning output.
+
+Purpose:
+- Builds the plan JSON schema from `ACTION_ARG_SPECS`.
+- Builds provider `response_format` values for json_schema and JSON mode, and
+  the weaker format to fall back to when a provider rejects one.
+
+Called from:
+- `GPT/semantic/gpt_semantic_runtime.py` when requesting a plan.
+- `GPT/semantic/gpt_semantic_transport.py` to fall back on rejected formats.
+"""
+
+from typing import Any
+
+from .gpt_semantic_types import ACTION_ARG_SPECS
+
+RESPONSE_FORMATS = ("json_schema", "json_object", "off")
+JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+SCHEMA_NAME = "semantic_plan"
+
+
+def plan_json_schema() -> dict[str, Any]:
+    """Strict schema: every field is required and no other fields are allowed"""
+    steps = [_step_schema(action, spec) for action, spec in ACTION_ARG_SPECS.items()]
+    return _object(
+        {
+            "steps": {"type": "array", "items": {"anyOf": steps}},
+            "summary": {"type": "string"},
+        }
+    )
+
+
+def response_format(mode: str) -> dict[str, Any] | None:
+    """The response_format for a mode in RESPONSE_FORMATS, or None for off"""
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": SCHEMA_NAME,
+                "strict": True,
+                "schema": plan_json_schema(),
+            },
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def fallback_format(current: dict[str, Any] | None) -> dict[str, Any] | None:
+    """The next weaker response_format to try after current was rejected"""
+    if current is None:
+        return None
+    position = RESPONSE_FORMATS.index(current["type"])
+    return response_format(RESPONSE_FORMATS[position + 1])
+
+
+def _step_schema(action: str, spec: dict[str, type]) -> dict[str, Any]:
+    args = {name: {"type": JSON_TYPES[kind]} for name, kind in spec.items()}
+    return _object(
+        {"action": {"type": "string", "enum": [action]}, "args": _object(args)}
+    )
+
+
+def _object(properties: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
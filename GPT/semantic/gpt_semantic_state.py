@@ -2,12 +2,14 @@
 
 Purpose:
 - Stores pending plan, last confirmed plan, and last error for the current session.
+- Holds results prepared for the pending plan while its preview is open.
 
 Called from:
 - `GPT/semantic/gpt_semantic_runtime.py`
 - `GPT/semantic/gpt_semantic_gui.py`
 """
 
+from .gpt_semantic_prepare import PreparedPlan
 from .gpt_semantic_types import GptSemanticPlan
 
 
@@ -15,15 +17,23 @@ class GptSemanticState:
     pending_request: str | None = None
     pending_plan: GptSemanticPlan | None = None
     pending_plan_json: str | None = None
+    # "local", "cache", "model" or "repeat"; only model and cache plans are stored
+    pending_source: str | None = None
+    # Filled in while the preview is open
+    pending_prepared: PreparedPlan | None = None
     last_confirmed_plan: GptSemanticPlan | None = None
     last_confirmed_plan_json: str | None = None
     last_error: str | None = None
 
     @classmethod
-    def set_pending(cls, request: str, plan: GptSemanticPlan, plan_json: str) -> None:
+    def set_pending(
+        cls, request: str, plan: GptSemanticPlan, plan_json: str, source: str = "model"
+    ) -> None:
         cls.pending_request = request
         cls.pending_plan = plan
         cls.pending_plan_json = plan_json
+        cls.pending_source = source
+        cls.pending_prepared = None
         cls.last_error = None
 
     @classmethod
@@ -31,6 +41,8 @@ class GptSemanticState:
         cls.pending_request = None
         cls.pending_plan = None
         cls.pending_plan_json = None
+        cls.pending_source = None
+        cls.pending_prepared = None
 
     @classmethod
     def confirm_pending(cls) -> None:
@@ -0,0 +1,98 @@
+"""Compilation of semantic plans into resolved action calls.
+
+Purpose:
+- Resolves the Talon action for every step once, before anything runs.
+- Coalesces runs of adjacent `key`, `insert_text` and `sleep` steps into a
+  single action call each.
+- Reports an action that cannot be resolved as a failure of its step, before
+  any step has run.
+
+Called from:
+- `GPT/semantic/gpt_semantic_step_executor.py` before running a plan.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from itertools import groupby
+from typing import Any, Callable, Iterator
+
+from .gpt_semantic_executor_helpers import ARG_CALLS, NO_ARG_CALLS
+from .gpt_semantic_types import GptSemanticPlan, GptSemanticStep
+
+# Steps that need app state or fallbacks at run time, so they stay with the executor
+SPECIAL_ACTIONS = {"sleep", "focus_address", "switch_app", "launch_app", "go_url"}
+COALESCED_ACTIONS = {"key", "insert_text", "sleep"}
+
+
+class GptSemanticExecutionError(RuntimeError):
+    def __init__(self, step_index: int, action_name: str, error: Exception):
+        self.step_index = step_index
+        self.action_name = action_name
+        super().__init__(f"Step {step_index} ({action_name}) failed: {error}")
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    # 1-based index of the first plan step it covers
+    index: int
+    action: str
+    count: int
+    call: Callable[[], None]
+
+
+def compile_plan(
+    plan: GptSemanticPlan,
+    runner: Any,
+    special: Callable[[GptSemanticStep], None],
+) -> list[CompiledStep]:
+    compiled: list[CompiledStep] = []
+    numbered = enumerate(plan.steps, start=1)
+    for action, group in groupby(numbered, key=lambda item: item[1].action):
+        items = list(group)
+        if action in COALESCED_ACTIONS and len(items) > 1:
+            steps = [step for _, step in items]
+            with _resolving(items[0][0], action):
+                call = _coalesced_call(action, steps, runner)
+            compiled.append(CompiledStep(items[0][0], action, len(items), call))
+            continue
+        for index, step in items:
+            with _resolving(index, action):
+                call = _step_call(step, runner, special)
+            compiled.append(CompiledStep(index, action, 1, call))
+    return compiled
+
+
+@contextmanager
+def _resolving(index: int, action: str) -> Iterator[None]:
+    try:
+        yield
+    except Exception as exc:
+        raise GptSemanticExecutionError(index, action, exc) from exc
+
+
+def _coalesced_call(
+    action: str, steps: list[GptSemanticStep], runner: Any
+) -> Callable[[], None]:
+    if action == "key":
+        # Talon presses space separated key combos in order
+        return partial(runner.key, " ".join(str(s.args["combo"]) for s in steps))
+    if action == "insert_text":
+        return partial(runner.insert, "".join(str(s.args["text"]) for s in steps))
+    return partial(runner.sleep, f"{sum(int(s.args['ms']) for s in steps)}ms")
+
+
+def _step_call(
+    step: GptSemanticStep, runner: Any, special: Callable[[GptSemanticStep], None]
+) -> Callable[[], None]:
+    if step.action in SPECIAL_ACTIONS:
+        return partial(special, step)
+    if step.action in ARG_CALLS:
+        parent, method, arg_name = ARG_CALLS[step.action]
+        return partial(getattr(_target(runner, parent), method), step.args[arg_name])
+    parent, method = NO_ARG_CALLS[step.action]
+    return getattr(_target(runner, parent), method)
+
+
+def _target(runner: Any, parent: str | None) -> Any:
+    return getattr(runner, parent) if parent else runner
@@ -2,94 +2,109 @@
 
 Purpose:
 - Executes parsed steps against Talon actions with synchronization and fallbacks.
+- Runs compiled steps so adjacent keys, inserts and sleeps are one action call.
+- Records how long each compiled step took, including its settle delay, and
+  traces it as a span.
 - Raises a step-indexed error on the first failed action.
+- Uses prepared app checks until a step may have changed which apps are running.
 
 Called from:
 - `GPT/semantic/gpt_semantic_executor.py`.
 """
 
+import time
+from dataclasses import dataclass
 from typing import Any
 
 from .gpt_semantic_browser import call_focus_address, call_go_url
 from .gpt_semantic_executor_helpers import (
-    ARG_CALLS,
-    NO_ARG_CALLS,
     is_running_app,
     launch_candidates,
     validate_running_app,
 )
+from .gpt_semantic_prepare import APP_STATE_ACTIONS, PreparedPlan
+from .gpt_semantic_step_compiler import (
+    CompiledStep,
+    GptSemanticExecutionError,
+    compile_plan,
+)
 from .gpt_semantic_sync import settle_after_step, wait_for_app_focus
 from .gpt_semantic_types import GptSemanticPlan, GptSemanticStep
 
+try:
+    from ...lib.modelTracing import tracer
+except ImportError:
+    from lib.modelTracing import tracer
+
 
-class GptSemanticExecutionError(RuntimeError):
-    def __init__(self, step_index: int, action_name: str, error: Exception):
-        self.step_index = step_index
-        self.action_name = action_name
-        super().__init__(f"Step {step_index} ({action_name}) failed: {error}")
+@dataclass(frozen=True)
+class StepTiming:
+    index: int
+    action: str
+    count: int
+    ms: float
 
 
 class GptSemanticStepExecutor:
-    def __init__(self, runner: Any):
+    def __init__(self, runner: Any, prepared: PreparedPlan | None = None):
         self.runner = runner
-
-    def run(self, plan: GptSemanticPlan) -> None:
-        for index, step in enumerate(plan.steps, start=1):
-            self._run_step(index, step)
-
-    def _run_step(self, index: int, step: GptSemanticStep) -> None:
+        self.prepared = prepared
+        # Prepared running app checks hold until a step may have changed the apps
+        self.apps_changed = False
+        self.timings: list[StepTiming] = []
+
+    def run(self, plan: GptSemanticPlan) -> list[StepTiming]:
+        self.timings = []
+        for compiled in compile_plan(plan, self.runner, self._dispatch_special):
+            self._run_step(compiled)
+            if compiled.action in APP_STATE_ACTIONS:
+                self.apps_changed = True
+        return self.timings
+
+    def _run_step(self, compiled: CompiledStep) -> None:
+        started = time.perf_counter()
         try:
-            self._dispatch(step)
-            settle_after_step(step.action, self.runner)
+            with tracer.span(
+                "semantic_step",
+                index=compiled.index,
+                action=compiled.action,
+                count=compiled.count,
+            ):
+                compiled.call()
+                for _ in range(compiled.count):
+                    settle_after_step(compiled.action, self.runner)
         except Exception as exc:
-            raise GptSemanticExecutionError(index, step.action, exc) from exc
-
-    def _dispatch(self, step: GptSemanticStep) -> None:
-        if self._dispatch_special(step):
-            return
-        if step.action in ARG_CALLS:
-            return self._call_with_arg(step)
-        self._call_no_arg(step)
-
-    def _dispatch_special(self, step: GptSemanticStep) -> bool:
+            raise GptSemanticExecutionError(
+                compiled.index, compiled.action, exc
+            ) from exc
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.timings.append(
+            StepTiming(compiled.index, compiled.action, compiled.count, elapsed_ms)
+        )
+
+    def _dispatch_special(self, step: GptSemanticStep) -> None:
         if step.action == "sleep":
             self.runner.sleep(f"{step.args['ms']}ms")
-            return True
-        if step.action == "focus_address":
+        elif step.action == "focus_address":
             call_focus_address(self.runner)
-            return True
-        if step.action == "switch_app":
+        elif step.action == "go_url":
+            call_go_url(self.runner, str(step.args["url"]))
+        elif step.action == "switch_app":
             self._switch_app(str(step.args["app_name"]))
-            return True
-        if step.action == "launch_app":
+        elif step.action == "launch_app":
             self._launch_app(str(step.args["app_name"]))
-            return True
-        return False
 
     def _switch_app(self, app_name: str) -> None:
-        if not is_running_app(app_name):
+        if not self._is_running(app_name):
             return self._launch_app(app_name)
-        validate_running_app(app_name)
+        if self._prepared_running(app_name) is None:
+            validate_running_app(app_name)
         self.runner.user.switcher_focus(app_name)
         wait_for_app_focus(self.runner, app_name)
 
-    def _call_with_arg(self, step: GptSemanticStep) -> None:
-        parent, method, arg_name = ARG_CALLS[step.action]
-        value = step.args[arg_name]
-        if step.action == "go_url":
-            return call_go_url(self.runner, str(value))
-        getattr(self._target(parent), method)(value)
-
-    def _call_no_arg(self, step: GptSemanticStep) -> None:
-        parent, method = NO_ARG_CALLS[step.action]
-        getattr(self._target(parent), method)()
-
-    def _target(self, parent: str | None) -> Any:
-        return getattr(self.runner, parent) if parent else self.runner
-
     def _launch_app(self, app_name: str) -> None:
         last_error: Exception | None = None
-        for candidate in launch_candidates(app_name):
+        for candidate in self._launch_candidates(app_name):
             try:
                 self.runner.user.switcher_launch(candidate)
                 wait_for_app_focus(self.runner, app_name, candidate)
@@ -97,3 +112,16 @@ class GptSemanticStepExecutor:
             except Exception as exc:
                 last_error = exc
         raise last_error or RuntimeError(f"Unable to launch app: '{app_name}'")
+
+    def _is_running(self, app_name: str) -> bool:
+        running = self._prepared_running(app_name)
+        return is_running_app(app_name) if running is None else running
+
+    def _prepared_running(self, app_name: str) -> bool | None:
+        if self.prepared is None or self.apps_changed:
+            return None
+        return self.prepared.running.get(app_name)
+
+    def _launch_candidates(self, app_name: str) -> list[str]:
+        prepared = self.prepared.candidates.get(app_name) if self.prepared else None
+        return prepared if prepared is not None else launch_candidates(app_name)
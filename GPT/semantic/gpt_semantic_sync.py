@@ -2,11 +2,15 @@
 
 Purpose:
 - Waits for app focus after launch/switch and adds small settle delays between UI-sensitive steps.
+- Wakes on Talon `app_activate`/`win_focus` events and only polls, with growing
+  intervals, when those events are unavailable.
+- Learns a settle delay per app from how long it took to take focus.
 
 Called from:
 - `GPT/semantic/gpt_semantic_executor.py` during step execution.
 """
 
+import threading
 import time
 from pathlib import Path
 from shlex import split
@@ -20,19 +24,113 @@ except (ModuleNotFoundError, ImportError):  # pragma: no cover
     talon_ui = None
 
 SETTLE_ACTIONS = {"launch_app", "switch_app", "new_tab", "focus_address", "go_url"}
-POLL_INTERVAL_MS = 100
+APP_ACTIONS = {"launch_app", "switch_app"}
+FOCUS_EVENTS = ("app_activate", "win_focus")
+# Polling starts fast and backs off so quick switches are not rounded up to 100ms
+MIN_POLL_INTERVAL_MS = 10
+MAX_POLL_INTERVAL_MS = 160
+# Focus is still rechecked this often in case events are delivered late
+EVENT_RECHECK_MS = 250
+# The first wait is no longer than the old poll interval, so events that never wake
+# the waiter cost no more than polling did before they are detected
+FIRST_EVENT_WAIT_MS = 100
+# Learned settle delay as a fraction of the observed focus latency
+SETTLE_LATENCY_RATIO = 0.5
+MIN_SETTLE_MS = 30
+LATENCY_SMOOTHING = 0.3
+
+
+class FocusSignal:
+    """Set whenever Talon reports that the focused app or window changed."""
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.available = False
+        # Cleared if focus changed without waking a waiter, i.e. events are only
+        # delivered on the thread that is waiting
+        self.wakes_waiters = True
+
+    def subscribe(self, ui: Any) -> None:
+        if ui is None or self.available:
+            return
+        try:
+            for name in FOCUS_EVENTS:
+                ui.register(name, self.notify)
+        except Exception:
+            return
+        self.available = True
+
+    def notify(self, *_args: Any) -> None:
+        self.event.set()
+
+    def clear(self) -> None:
+        self.event.clear()
+
+    def usable(self) -> bool:
+        return self.available and self.wakes_waiters
+
+    def wait(self, timeout_s: float) -> bool:
+        return self.event.wait(timeout_s)
+
+
+class SettleLearner:
+    """Exponential moving average of focus latency per app."""
+
+    def __init__(self) -> None:
+        self.latency_ms: dict[str, float] = {}
+        self.last_app: str | None = None
+
+    def observe(self, app: str, latency_ms: float) -> None:
+        previous = self.latency_ms.get(app)
+        self.latency_ms[app] = (
+            latency_ms
+            if previous is None
+            else previous + LATENCY_SMOOTHING * (latency_ms - previous)
+        )
+        self.last_app = app
+
+    def settle_ms(self, app: str | None, configured_ms: int) -> int:
+        latency = self.latency_ms.get(app) if app else None
+        if latency is None:
+            return configured_ms
+        learned = max(MIN_SETTLE_MS, int(latency * SETTLE_LATENCY_RATIO))
+        return min(configured_ms, learned)
+
+
+focus_signal = FocusSignal()
+settle_learner = SettleLearner()
+focus_signal.subscribe(talon_ui)
 
 
 def wait_for_app_focus(runner: Any, app_name: str, command: str | None = None) -> None:
     timeout_ms = _int_setting("user.gpt_semantic_app_focus_timeout_ms", 3500)
+    settle_learner.last_app = None
     if talon_ui is None or timeout_ms <= 0:
         return
     hints = _focus_hints(app_name, command)
-    deadline = time.monotonic() + (timeout_ms / 1000.0)
-    while time.monotonic() < deadline:
+    started = time.monotonic()
+    deadline = started + (timeout_ms / 1000.0)
+    interval_ms = MIN_POLL_INTERVAL_MS
+    event_wait_ms = FIRST_EVENT_WAIT_MS
+    missed_event = False
+    while True:
+        focus_signal.clear()
         if _active_app_matches(hints):
+            if missed_event:
+                focus_signal.wakes_waiters = False
+            latency_ms = (time.monotonic() - started) * 1000
+            settle_learner.observe(hints[0] if hints else "", latency_ms)
             return
-        runner.sleep(f"{POLL_INTERVAL_MS}ms")
+        remaining_ms = (deadline - time.monotonic()) * 1000
+        if remaining_ms <= 0:
+            break
+        if focus_signal.usable():
+            timeout_s = min(event_wait_ms, remaining_ms) / 1000.0
+            missed_event = not focus_signal.wait(timeout_s)
+            event_wait_ms = EVENT_RECHECK_MS
+        else:
+            runner.sleep(f"{int(min(interval_ms, remaining_ms))}ms")
+            interval_ms = min(interval_ms * 2, MAX_POLL_INTERVAL_MS)
     raise RuntimeError(f"App did not become active in {timeout_ms}ms: '{app_name}'")
 
 
@@ -40,6 +138,8 @@ def settle_after_step(action: str, runner: Any) -> None:
     if action not in SETTLE_ACTIONS:
         return
     delay_ms = _int_setting("user.gpt_semantic_step_settle_ms", 180)
+    if action in APP_ACTIONS:
+        delay_ms = settle_learner.settle_ms(settle_learner.last_app, delay_ms)
     if delay_ms > 0:
         runner.sleep(f"{delay_ms}ms")
 
@@ -2,6 +2,9 @@
 
 Purpose:
 - Reuses talon-ai-tools model helper functions for API/LLM CLI routing.
+- API requests share the pooled keep-alive session in `lib/modelSession.py`.
+- Asks the API for structured output and falls back to weaker response formats
+  for models that reject them.
 - Returns normalized assistant message text to the semantic runtime.
 
 Called from:
@@ -12,13 +15,22 @@ from __future__ import annotations
 
 from typing import Any
 
+from .gpt_semantic_schema import fallback_format
+
+# Model name -> response_format types its endpoint rejected
+_rejected_formats: dict[str, set[str]] = {}
+
 
 class GptSemanticTransportError(RuntimeError):
     pass
 
 
 def request_completion(
-    system_prompt: str, user_prompt: str, model: str, debug: bool
+    system_prompt: str,
+    user_prompt: str,
+    model: str,
+    debug: bool,
+    response_format: dict[str, Any] | None = None,
 ) -> str:
     helpers = _helpers()
     model_name = helpers["resolve_model_name"](model)
@@ -32,13 +44,37 @@ def request_completion(
         )
     else:
         request = {"role": "user", "content": [prompt]}
-        response = helpers["send_request_to_api"](request, system_prompt, model_name)
+        response = _send_to_api(
+            helpers, request, system_prompt, model_name, response_format
+        )
     return helpers["extract_message"](response)
 
 
+def _send_to_api(
+    helpers: dict[str, Any],
+    request: dict[str, Any],
+    system_prompt: str,
+    model_name: str,
+    response_format: dict[str, Any] | None,
+) -> Any:
+    rejected = _rejected_formats.setdefault(model_name, set())
+    while response_format is not None and response_format["type"] in rejected:
+        response_format = fallback_format(response_format)
+    while response_format is not None:
+        try:
+            return helpers["send_request_to_api"](
+                request, system_prompt, model_name, response_format=response_format
+            )
+        except helpers["ResponseFormatError"]:
+            rejected.add(response_format["type"])
+            response_format = fallback_format(response_format)
+    return helpers["send_request_to_api"](request, system_prompt, model_name)
+
+
 def _helpers() -> dict[str, Any]:
     try:
         from ...lib.modelHelpers import (
+            ResponseFormatError,
             extract_message,
             format_message,
             resolve_model_name,
@@ -47,6 +83,7 @@ def _helpers() -> dict[str, Any]:
         )
     except ImportError:
         from lib.modelHelpers import (
+            ResponseFormatError,
             extract_message,
             format_message,
             resolve_model_name,
@@ -54,6 +91,7 @@ def _helpers() -> dict[str, Any]:
             send_request_to_llm_cli,
         )
     return {
+        "ResponseFormatError": ResponseFormatError,
         "extract_message": extract_message,
         "format_message": format_message,
         "resolve_model_name": resolve_model_name,
@@ -1,9 +1,9 @@
 import webbrowser
 
-import requests
 from talon import Module
 
 from ..lib.modelHelpers import get_token, notify
+from ..lib.modelSession import post
 
 mod = Module()
 
@@ -29,7 +29,7 @@ class Actions:
             "size": "1024x1024",
         }
 
-        response = requests.post(url, headers=headers, json=data)
+        response = post(url, headers=headers, json=data)
 
         match response.status_code:
             case 200:
@@ -0,0 +1,222 @@
+import base64
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Optional
+
+"""
+Preprocessing of clipboard images before they are sent to a model.
+
+A full resolution screenshot is a PNG of several megabytes, which is slow to
+upload and slow for the model to process. Images are downscaled so their longest
+side fits the model's limit and recompressed as JPEG or WebP. Inside Talon the
+pipeline is given an encoder that uses Talon's skia (lib/imageSkia.py); the
+encoder here uses the optional Pillow library and is the fallback. Without
+either, images are sent unchanged with their real mime type. Processed images are
+cached by a hash of their content, so a screenshot reused across prompts is only
+processed once.
+
+This file has no Talon dependencies so it can be tested outside of Talon.
+"""
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Pillow format name and mime type of each output format
+FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "png": ("PNG", "image/png"),
+}
+
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+@dataclass(frozen=True)
+class ImageOptions:
+    # Longest side in pixels after downscaling; 0 keeps the original size
+    max_dimension: int = 1568
+    # "jpeg", "webp", "png" or "original" to keep the format of the clipboard
+    format: str = "jpeg"
+    quality: int = 85
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    url: str
+    mime: str
+    original_bytes: int
+    bytes: int
+    size: tuple[int, int] = (0, 0)
+    cached: bool = False
+
+
+def image_mime(data: bytes) -> str:
+    """Detect the mime type of encoded image data from its first bytes"""
+    for signature, mime in SIGNATURES:
+        if data.startswith(signature):
+            return mime
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    # Talon encodes clipboard images as PNG
+    return "image/png"
+
+
+def data_url(data: bytes, mime: str = "") -> str:
+    encoded = base64.b64encode(data).decode("utf-8")
+    return f"data:{mime or image_mime(data)};base64,{encoded}"
+
+
+def unchanged(data: bytes, mime: str = "") -> EncodedImage:
+    """The image as it is, for when it cannot or should not be processed"""
+    mime = mime or image_mime(data)
+    return EncodedImage(data_url(data, mime), mime, len(data), len(data))
+
+
+def output_format(options: ImageOptions, mime: str) -> str:
+    """The key in FORMATS to encode to; "original" keeps the input format"""
+    if options.format in FORMATS:
+        return options.format
+    original = mime.removeprefix("image/")
+    return original if original in FORMATS else "png"
+
+
+def fitted_size(size: tuple[int, int], limit: int) -> tuple[int, int]:
+    """Scale a size down, keeping its aspect ratio, so its longest side fits limit"""
+    width, height = size
+    if not limit or max(width, height) <= limit:
+        return size
+    scale = limit / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _flatten(image: Any) -> Any:
+    """JPEG has no alpha channel, so transparent areas become white"""
+    rgba = image.convert("RGBA")
+    background = Image.new("RGB", rgba.size, "white")  # type: ignore
+    background.paste(rgba, mask=rgba.getchannel("A"))
+    return background
+
+
+def encode_image(data: bytes, options: ImageOptions) -> EncodedImage:
+    """
+    Downscale and recompress encoded image data. The original is kept if Pillow is
+    not installed, cannot read the data or the result would not be smaller.
+    """
+    mime = image_mime(data)
+    if Image is None or (options.format == "original" and not options.max_dimension):
+        return unchanged(data, mime)
+
+    pil_format, output_mime = FORMATS[output_format(options, mime)]
+
+    try:
+        with Image.open(io.BytesIO(data)) as opened:
+            image = opened
+            original_size = image.size
+            limit = options.max_dimension
+            if limit and max(image.size) > limit:
+                image = image.copy()
+                image.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+            if pil_format == "JPEG" and image.mode != "RGB":
+                image = _flatten(image)
+            output = io.BytesIO()
+            image.save(output, format=pil_format, quality=options.quality)
+    except (OSError, ValueError):
+        return unchanged(data, mime)
+
+    encoded = output.getvalue()
+    if image.size == original_size and len(encoded) >= len(data):
+        return replace(unchanged(data, mime), size=original_size)
+    return EncodedImage(
+        data_url(encoded, output_mime), output_mime, len(data), len(encoded), image.size
+    )
+
+
+class ImageStats:
+    """Counts the images sent and the bytes saved by processing them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.images = 0
+        self.cache_hits = 0
+        self.original_bytes = 0
+        self.sent_bytes = 0
+        self.encode_ms = 0.0
+
+    def record(self, image: EncodedImage, encode_ms: float) -> None:
+        with self._lock:
+            self.images += 1
+            self.cache_hits += image.cached
+            self.original_bytes += image.original_bytes
+            self.sent_bytes += image.bytes
+            self.encode_ms += encode_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "images": self.images,
+                "cache_hits": self.cache_hits,
+                "original_bytes": self.original_bytes,
+                "sent_bytes": self.sent_bytes,
+                "saved_bytes": self.original_bytes - self.sent_bytes,
+                "encode_ms": self.encode_ms,
+            }
+
+
+def upload_seconds(byte_count: int, upload_mbps: float) -> float:
+    """Estimate the time to upload image data, which is sent base64 encoded"""
+    if upload_mbps <= 0:
+        return 0.0
+    return byte_count * 4 / 3 * 8 / (upload_mbps * 1_000_000)
+
+
+class ImagePipeline:
+    """Processes image data URLs, caching the result by content and options"""
+
+    def __init__(
+        self,
+        max_entries: int = 16,
+        encoder: Callable[[bytes, ImageOptions], EncodedImage] = encode_image,
+    ):
+        self.max_entries = max_entries
+        self.encoder = encoder
+        self.stats = ImageStats()
+        self._cache: OrderedDict[tuple[str, ImageOptions], EncodedImage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prepare(self, url: str, options: ImageOptions) -> Optional[EncodedImage]:
+        """Process a base64 data URL. Returns None for any other URL"""
+        header, _, payload = url.partition(",")
+        if not header.startswith("data:") or not header.endswith(";base64"):
+            return None
+        digest = hashlib.blake2b(payload.encode("ascii"), digest_size=16).hexdigest()
+        key = (digest, options)
+
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+        if image is not None:
+            image = replace(image, cached=True)
+            self.stats.record(image, 0.0)
+            return image
+
+        started = time.perf_counter()
+        image = self.encoder(base64.b64decode(payload), options)
+        encode_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._cache[key] = image
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        self.stats.record(image, encode_ms)
+        return image
@@ -0,0 +1,106 @@
+from dataclasses import replace
+from typing import Any, Optional
+
+from talon import app
+
+from . import imagePipeline
+from .imagePipeline import (
+    EncodedImage,
+    ImageOptions,
+    data_url,
+    encode_image,
+    fitted_size,
+    image_mime,
+    output_format,
+    unchanged,
+)
+
+try:
+    from talon import skia
+except ImportError:
+    skia = None
+
+"""
+Image processing with the skia bindings that ship with Talon.
+
+Talon does not include Pillow, so this is the encoder the image pipeline uses
+inside Talon. Images are decoded, drawn onto a smaller surface and encoded with
+skia. If this version of Talon lacks any of the skia calls used here the Pillow
+encoder is tried instead, and if that is not installed either the user is told
+once that images are sent unchanged.
+"""
+
+_warned_unavailable = False
+
+
+def _decode(data: bytes) -> Any:
+    return skia.Image.from_bytes(data)  # type: ignore
+
+
+def _resize(image: Any, size: tuple[int, int]) -> Any:
+    surface = skia.Surface(*size)  # type: ignore
+    canvas = surface.canvas()
+    # JPEG has no alpha channel, so transparent areas become white
+    canvas.clear("ffffffff")
+    canvas.draw_image_rect(
+        image,
+        skia.Rect(0, 0, image.width, image.height),  # type: ignore
+        skia.Rect(0, 0, *size),  # type: ignore
+    )
+    return surface.snapshot()
+
+
+def _encode(image: Any, format: str, quality: int) -> bytes:
+    try:
+        encoded = image.encode(format, quality)
+    except TypeError:
+        # Older skia bindings only encode PNG
+        encoded = image.encode()
+    return bytes(encoded.data() if hasattr(encoded, "data") else encoded)
+
+
+def encode_with_skia(data: bytes, options: ImageOptions) -> Optional[EncodedImage]:
+    """
+    Downscale and recompress encoded image data with skia. Returns None if skia
+    cannot process it, so another encoder can be tried.
+    """
+    mime = image_mime(data)
+    if options.format == "original" and not options.max_dimension:
+        return unchanged(data, mime)
+    if skia is None:
+        return None
+    try:
+        image = _decode(data)
+        original_size = (image.width, image.height)
+        size = fitted_size(original_size, options.max_dimension)
+        if size != original_size:
+            image = _resize(image, size)
+        encoded = _encode(image, output_format(options, mime), options.quality)
+    except Exception as e:
+        print(f"Processing an image with skia failed: {e!r}")
+        return None
+
+    if size == original_size and len(encoded) >= len(data):
+        return replace(unchanged(data, mime), size=original_size)
+    # The encoder may not support the requested format, so detect what it produced
+    encoded_mime = image_mime(encoded)
+    return EncodedImage(
+        data_url(encoded, encoded_mime), encoded_mime, len(data), len(encoded), size
+    )
+
+
+def encode_talon_image(data: bytes, options: ImageOptions) -> EncodedImage:
+    """Encode with skia, falling back to Pillow, and warn once if neither works"""
+    global _warned_unavailable
+    image = encode_with_skia(data, options)
+    if image is not None:
+        return image
+    if imagePipeline.Image is not None:
+        return encode_image(data, options)
+    if not _warned_unavailable:
+        _warned_unavailable = True
+        app.notify(
+            "GPT: images are sent unchanged, since neither Talon's skia nor Pillow "
+            "could process them. The model_image settings have no effect"
+        )
+    return unchanged(data)
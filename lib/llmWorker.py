@@ -0,0 +1,249 @@
+import base64
+import json
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Optional
+
+from talon import app, cron, settings
+
+from .modelScheduler import check_cancelled, is_cancelled
+
+"""
+Client for the persistent llm worker process in lib/llmWorkerServer.py.
+
+Running the llm executable pays for Python startup and importing every llm
+plugin on each prompt. The worker does that once and then runs the same command
+line in-process for each request it receives over a pipe.
+"""
+
+SERVER_PATH = Path(__file__).parent / "llmWorkerServer.py"
+# The first ping includes importing llm and all of its plugins
+STARTUP_TIMEOUT_SECONDS = 60
+PING_TIMEOUT_SECONDS = 10
+REQUEST_TIMEOUT_SECONDS = 600
+
+
+class LLMWorkerError(Exception):
+    """The llm command failed inside the worker. The message matches the CLI error output"""
+
+
+class _WorkerUnavailable(Exception):
+    """The worker process could not be started or stopped responding"""
+
+
+def _interpreter_command() -> Optional[list[str]]:
+    """Find the Python interpreter that the llm executable is installed into"""
+    configured: str = settings.get("user.model_llm_python")  # type: ignore
+    if configured:
+        return [configured]
+    executable = shutil.which(settings.get("user.model_llm_path"))  # type: ignore
+    if executable is None:
+        return None
+    try:
+        with open(executable, "rb") as f:
+            first_line = f.readline(512)
+    except OSError:
+        return None
+    if not first_line.startswith(b"#!"):
+        # Windows launchers are binaries; user.model_llm_python must be set there
+        return None
+    parts = first_line[2:].decode("utf-8", errors="ignore").split()
+    if parts and Path(parts[0]).name == "env":
+        parts = parts[1:]
+    if not parts or "python" not in Path(parts[0]).name:
+        return None
+    return parts
+
+
+class LLMWorker:
+    _process: ClassVar[Optional[subprocess.Popen]] = None
+    _lines: ClassVar["queue.Queue[Optional[str]]"] = queue.Queue()
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def run(
+        cls,
+        args: list[str],
+        cmd_input: Optional[bytes],
+        on_chunk: Optional[Callable[[str], None]] = None,
+    ) -> Optional[str]:
+        """
+        Run the llm command line arguments in the worker and return its stdout.
+        Returns None if the worker is unavailable so the caller can fall back to
+        running the executable.
+        """
+        request = {
+            "op": "run",
+            "args": args,
+            "input": base64.b64encode(cmd_input or b"").decode("ascii"),
+            "stream": on_chunk is not None,
+        }
+        emitted = False
+
+        def forward(chunk: str) -> None:
+            nonlocal emitted
+            emitted = True
+            on_chunk(chunk)  # type: ignore
+
+        with cls._lock:
+            try:
+                cls._ensure_running()
+                cls._send(request)
+                reply = cls._read_reply(
+                    REQUEST_TIMEOUT_SECONDS, forward if on_chunk else None
+                )
+            except _WorkerUnavailable as e:
+                cls._stop()
+                if emitted:
+                    # Part of the response was already inserted, so don't run it twice
+                    raise RuntimeError(f"llm worker stopped responding: {e}") from e
+                print(f"llm worker unavailable, falling back to the executable: {e}")
+                return None
+        if not reply.get("ok"):
+            raise LLMWorkerError(reply.get("error", "Unknown llm worker error"))
+        return reply["text"]
+
+    @classmethod
+    def schedule_health_check(cls) -> None:
+        """Run the health check off Talon's main thread, since a restart can take a minute"""
+        threading.Thread(
+            target=cls.health_check, name="talon-ai-llm-health", daemon=True
+        ).start()
+
+    @classmethod
+    def health_check(cls) -> None:
+        """Ping the worker and restart it if it has died or stopped responding"""
+        if not cls._lock.acquire(blocking=False):
+            # A request is running, which is proof enough that the worker is alive
+            return
+        try:
+            if cls._process is None:
+                return
+            try:
+                if cls._process.poll() is not None:
+                    raise _WorkerUnavailable("process exited")
+                cls._send({"op": "ping"})
+                cls._read_reply(PING_TIMEOUT_SECONDS)
+            except _WorkerUnavailable as e:
+                print(f"Restarting llm worker: {e}")
+                cls._stop()
+                cls._ensure_running()
+        except _WorkerUnavailable as e:
+            print(f"Failed to restart llm worker: {e}")
+            cls._stop()
+        finally:
+            cls._lock.release()
+
+    @classmethod
+    def start(cls) -> None:
+        """Start the worker ahead of the first request"""
+        with cls._lock:
+            try:
+                cls._ensure_running()
+            except _WorkerUnavailable as e:
+                print(f"Failed to start llm worker: {e}")
+                cls._stop()
+
+    @classmethod
+    def _ensure_running(cls) -> None:
+        if cls._process is not None and cls._process.poll() is None:
+            return
+        cls._stop()
+        interpreter = _interpreter_command()
+        if interpreter is None:
+            raise _WorkerUnavailable(
+                "could not find the Python interpreter of llm. "
+                "Set user.model_llm_python to its path"
+            )
+        process_env = os.environ.copy()
+        if platform.system() == "Windows":
+            process_env["PYTHONUTF8"] = "1"
+        try:
+            cls._process = subprocess.Popen(
+                [*interpreter, str(SERVER_PATH)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                encoding="utf-8",
+                creationflags=(
+                    subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0  # type: ignore
+                ),
+                env=process_env,
+            )
+        except OSError as e:
+            raise _WorkerUnavailable(str(e)) from e
+        cls._lines = queue.Queue()
+        threading.Thread(
+            target=cls._read_lines, args=(cls._process, cls._lines), daemon=True
+        ).start()
+        cls._send({"op": "ping"})
+        cls._read_reply(STARTUP_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def _read_lines(process: subprocess.Popen, lines: "queue.Queue") -> None:
+        for line in process.stdout:  # type: ignore
+            lines.put(line)
+        lines.put(None)
+
+    @classmethod
+    def _send(cls, message: dict[str, Any]) -> None:
+        try:
+            cls._process.stdin.write(json.dumps(message) + "\n")  # type: ignore
+            cls._process.stdin.flush()  # type: ignore
+        except (OSError, AttributeError, ValueError) as e:
+            raise _WorkerUnavailable(f"failed to send request: {e}") from e
+
+    @classmethod
+    def _read_reply(
+        cls, timeout: float, on_chunk: Optional[Callable[[str], None]] = None
+    ) -> dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        while True:
+            if is_cancelled():
+                # The worker is still producing the cancelled response, so replace it
+                cls._stop()
+                check_cancelled()
+            if time.monotonic() > deadline:
+                raise _WorkerUnavailable(f"no reply within {timeout} seconds")
+            try:
+                line = cls._lines.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise _WorkerUnavailable("process exited")
+            try:
+                message = json.loads(line)
+            except ValueError as e:
+                # Something other than the worker wrote to its stdout, such as a plugin
+                raise _WorkerUnavailable(f"unreadable reply {line[:200]!r}") from e
+            if "chunk" not in message:
+                return message
+            if on_chunk is not None:
+                on_chunk(message["chunk"])
+
+    @classmethod
+    def _stop(cls) -> None:
+        if cls._process is None:
+            return
+        try:
+            cls._process.kill()
+        except OSError:
+            pass
+        cls._process = None
+
+
+def on_ready():
+    if not settings.get("user.model_llm_worker"):
+        return
+    if settings.get("user.model_endpoint") == "llm":
+        threading.Thread(target=LLMWorker.start, daemon=True).start()
+    cron.interval("60s", LLMWorker.schedule_health_check)
+
+
+app.register("ready", on_ready)
@@ -0,0 +1,93 @@
+import base64
+import io
+import json
+import sys
+from typing import Any, TextIO
+
+"""
+Long-lived worker process for the llm CLI tool.
+
+This script is started by lib/llmWorker.py with the Python interpreter that the
+llm tool is installed into. It imports llm and its plugins once and then runs the
+unmodified llm command line for every request it receives, so the output and
+thread continuation semantics are identical to running the executable.
+
+Protocol: one JSON object per line on stdin, one JSON object per line on stdout.
+    {"op": "ping"} -> {"ok": true}
+    {"op": "run", "args": [...], "input": "<base64>", "stream": bool}
+        -> zero or more {"chunk": "..."} followed by {"ok": true, "text": "..."}
+           or {"ok": false, "error": "..."}
+
+Talon also imports this file as a module, which is harmless since nothing runs
+unless it is executed as a script.
+"""
+
+
+class _ChunkWriter(io.StringIO):
+    """Captures the llm output and optionally forwards each write as a chunk"""
+
+    def __init__(self, protocol_out: TextIO | None):
+        super().__init__()
+        self.protocol_out = protocol_out
+
+    def write(self, text: str) -> int:
+        if self.protocol_out is not None and text:
+            _reply(self.protocol_out, {"chunk": text})
+        return super().write(text)
+
+    def isatty(self) -> bool:
+        return False
+
+
+def _reply(protocol_out: TextIO, message: dict[str, Any]) -> None:
+    protocol_out.write(json.dumps(message) + "\n")
+    protocol_out.flush()
+
+
+def _run(cli: Any, request: dict[str, Any], protocol_out: TextIO) -> dict[str, Any]:
+    import click
+
+    stdin_bytes = base64.b64decode(request.get("input") or "")
+    output = _ChunkWriter(protocol_out if request.get("stream") else None)
+    saved_stdin, saved_stdout = sys.stdin, sys.stdout
+    sys.stdin = io.TextIOWrapper(io.BytesIO(stdin_bytes), encoding="utf-8")
+    sys.stdout = output
+    try:
+        cli.main(args=request["args"], prog_name="llm", standalone_mode=False)
+    except click.ClickException as exc:
+        # Match the message the llm executable prints to stderr
+        return {"ok": False, "error": f"Error: {exc.format_message()}"}
+    except SystemExit as exc:
+        if exc.code not in (0, None):
+            return {"ok": False, "error": f"llm exited with status {exc.code}"}
+    except Exception as exc:
+        return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+    finally:
+        sys.stdin, sys.stdout = saved_stdin, saved_stdout
+    return {"ok": True, "text": output.getvalue()}
+
+
+def main() -> None:
+    protocol_in, protocol_out = sys.stdin, sys.stdout
+    # Importing the CLI loads every llm plugin, which is the cost the worker avoids.
+    # Anything the plugins print while loading must not end up in the protocol.
+    sys.stdout = sys.stderr
+    try:
+        from llm.cli import cli
+    finally:
+        sys.stdout = protocol_out
+
+    for line in protocol_in:
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as exc:
+            _reply(protocol_out, {"ok": False, "error": f"Bad request: {exc}"})
+            continue
+        if request.get("op") == "ping":
+            _reply(protocol_out, {"ok": True})
+        else:
+            _reply(protocol_out, _run(cli, request, protocol_out))
+
+
+if __name__ == "__main__":
+    main()
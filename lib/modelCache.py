@@ -0,0 +1,125 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+"""
+Content-addressed on-disk cache of model responses.
+
+This file has no Talon dependencies so it can be tested outside of Talon.
+"""
+
+
+class ResponseCache:
+    """
+    SQLite backed response cache with least-recently-used eviction, a time to
+    live and a cap on the total size of the stored responses
+    """
+
+    def __init__(self, path: Path, ttl_seconds: int = 86400, max_bytes: int = 0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(payload: dict[str, Any]) -> str:
+        """Hash a normalized request payload into a cache key"""
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for the key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                db.commit()
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Store a response and evict old entries to stay within the limits"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(db, now)
+            db.commit()
+
+    def clear(self) -> None:
+        """Remove every cached response and reset the counters"""
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM responses")
+            db.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Summarize the cache hit rate and the size of the stored responses"""
+        with self._lock:
+            entries, size = (
+                self._db()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses")
+                .fetchone()
+            )
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds > 0:
+            db.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)
+            )
+        if self.max_bytes <= 0:
+            return
+        (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        stale: list[str] = []
+        for key, size in db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ):
+            if total <= self.max_bytes:
+                break
+            stale.append(key)
+            total -= size
+        db.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in stale])
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT, size INTEGER, "
+                "created REAL, accessed REAL)"
+            )
+        return self._connection
@@ -0,0 +1,157 @@
+import re
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+from .tokenEstimator import estimate_tokens
+
+"""
+Splitting of large texts into chunks that can be sent to a model separately.
+
+This file has no Talon dependencies so it can be tested outside of Talon.
+"""
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Blank lines separate paragraphs in prose and top level definitions in code
+PARAGRAPH_BREAK = re.compile(r"(\n[ \t]*\n\s*)")
+FENCE = re.compile(r"^\s*(```|~~~)", re.MULTILINE)
+
+
+@dataclass
+class TextChunk:
+    text: str
+    # The whitespace that followed the chunk in the original text
+    separator: str = ""
+
+
+def _blocks(text: str) -> list[tuple[str, str]]:
+    """Split text into paragraphs, keeping fenced code blocks in one piece"""
+    parts = PARAGRAPH_BREAK.split(text)
+    blocks: list[tuple[str, str]] = []
+    pending = ""
+    for i in range(0, len(parts), 2):
+        separator = parts[i + 1] if i + 1 < len(parts) else ""
+        pending += parts[i]
+        if len(FENCE.findall(pending)) % 2 == 1 and separator:
+            # Inside an unterminated fence, so the blank line belongs to the code
+            pending += separator
+            continue
+        blocks.append((pending, separator))
+        pending = ""
+    if pending:
+        blocks.append((pending, ""))
+    return blocks
+
+
+def _split_oversized(
+    text: str, separator: str, max_tokens: int, estimate: Callable[[str], int]
+) -> list[tuple[str, str]]:
+    """Split a block that is larger than max_tokens on lines, or characters as a last resort"""
+    lines = text.split("\n")
+    pieces = [(line, "\n") for line in lines[:-1]] + [(lines[-1], separator)]
+    result: list[tuple[str, str]] = []
+    for line, line_separator in pieces:
+        tokens = estimate(line)
+        if tokens <= max_tokens:
+            result.append((line, line_separator))
+            continue
+        width = max(1, len(line) * max_tokens // tokens)
+        for start in range(0, len(line), width):
+            end = start + width
+            last = end >= len(line)
+            result.append((line[start:end], line_separator if last else ""))
+    return result
+
+
+def split_text(
+    text: str, max_tokens: int, estimate: Callable[[str], int] = estimate_tokens
+) -> list[TextChunk]:
+    """
+    Split text into chunks of at most max_tokens, preferring paragraph boundaries and
+    never splitting a fenced code block unless it is too large on its own.
+    Joining the chunks with their separators reproduces the original text.
+    """
+    pieces: list[tuple[str, str]] = []
+    for block, separator in _blocks(text):
+        if estimate(block) > max_tokens:
+            pieces.extend(_split_oversized(block, separator, max_tokens, estimate))
+        else:
+            pieces.append((block, separator))
+
+    chunks: list[TextChunk] = []
+    current: list[tuple[str, str]] = []
+    current_tokens = 0
+    for piece, separator in pieces:
+        tokens = estimate(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(_merge(current))
+            current, current_tokens = [], 0
+        current.append((piece, separator))
+        current_tokens += tokens
+    if current or not chunks:
+        chunks.append(_merge(current))
+    return chunks
+
+
+def _merge(pieces: list[tuple[str, str]]) -> TextChunk:
+    text = "".join(piece + separator for piece, separator in pieces[:-1])
+    if not pieces:
+        return TextChunk(text)
+    return TextChunk(text + pieces[-1][0], pieces[-1][1])
+
+
+def join_chunks(results: list[str], chunks: list[TextChunk]) -> str:
+    """Join the results for each chunk with the separators of the original text"""
+    joined = ""
+    for i, (result, chunk) in enumerate(zip(results, chunks)):
+        joined += result
+        if i < len(chunks) - 1:
+            # Keep at least a line break so results do not run into each other
+            joined += chunk.separator if "\n" in chunk.separator else "\n"
+    return joined
+
+
+def group_for_reduce(
+    texts: list[str], max_tokens: int, estimate: Callable[[str], int] = estimate_tokens
+) -> list[list[str]]:
+    """Group consecutive partial results so that each group fits in max_tokens"""
+    groups: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate(text)
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def map_in_order(items: list[T], work: Callable[[T], R], max_workers: int) -> list[R]:
+    """
+    Run work on every item with a bounded pool and return the results in item order.
+    The first failure cancels the items that have not started and is re-raised.
+    """
+    results: dict[int, R] = {}
+
+    def run(index: int, item: T) -> None:
+        results[index] = work(item)
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(items))),
+        thread_name_prefix="talon-ai-chunk",
+    ) as executor:
+        futures = [executor.submit(run, i, item) for i, item in enumerate(items)]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            error = future.exception()
+            if error is not None:
+                for pending in futures:
+                    pending.cancel()
+                raise error
+    return [results[i] for i in range(len(items))]
@@ -0,0 +1,95 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+from .modelTypes import GPTMessageItem
+from .tokenEstimator import estimate_tokens
+
+"""
+Bounded store for the context that is added to every model request.
+
+This file has no Talon dependencies so it can be tested outside of Talon.
+"""
+
+
+def _words(text: str) -> set[str]:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+@dataclass
+class ContextEntry:
+    message: GPTMessageItem
+    tokens: int
+    # Entries which summarize evicted context are dropped instead of summarized again
+    summary: bool = False
+
+
+class ContextStore:
+    """
+    Ordered list of context messages with an estimated token count per item.
+    Iterating over the store yields the messages from oldest to newest.
+    """
+
+    def __init__(self, estimate: Callable[[str], int] = estimate_tokens):
+        self.entries: list[ContextEntry] = []
+        self.estimate = estimate
+        # Incremented whenever the stored context changes so cached prompts can be rebuilt
+        self.version = 0
+        # Called with the messages that were evicted to stay within a budget
+        self.on_evict: Optional[Callable[[list[GPTMessageItem]], None]] = None
+
+    def __iter__(self) -> Iterator[GPTMessageItem]:
+        return (entry.message for entry in self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(entry.tokens for entry in self.entries)
+
+    def add(self, message: GPTMessageItem, summary: bool = False) -> None:
+        """Append a message to the context"""
+        tokens = self.estimate(message.get("text", ""))
+        self.entries.append(ContextEntry(message, tokens, summary))
+        self.version += 1
+
+    def clear(self) -> None:
+        """Remove every message from the context"""
+        self.entries = []
+        self.version += 1
+
+    def enforce_budget(
+        self, budget: int, policy: str = "oldest", query: str = ""
+    ) -> list[GPTMessageItem]:
+        """
+        Evict messages until the context fits within the token budget and return them.
+        The "oldest" policy evicts in insertion order; the "relevance" policy evicts the
+        messages which share the fewest words with the query first. The newest message
+        is never evicted so that freshly pushed context is always kept.
+        """
+        if budget <= 0 or self.total_tokens <= budget:
+            return []
+        candidates = self.entries[:-1]
+        if policy == "relevance":
+            query_words = _words(query)
+            candidates = sorted(
+                candidates,
+                key=lambda entry: len(
+                    query_words & _words(entry.message.get("text", ""))
+                ),
+            )
+        total = self.total_tokens
+        evicted: list[ContextEntry] = []
+        for entry in candidates:
+            if total <= budget:
+                break
+            evicted.append(entry)
+            total -= entry.tokens
+        evicted_ids = {id(entry) for entry in evicted}
+        self.entries = [entry for entry in self.entries if id(entry) not in evicted_ids]
+        self.version += 1
+        to_summarize = [entry.message for entry in evicted if not entry.summary]
+        if to_summarize and self.on_evict is not None:
+            self.on_evict(to_summarize)
+        return [entry.message for entry in evicted]
@@ -0,0 +1,200 @@
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+"""
+Hedged model requests for tail latency control.
+
+A hedged request starts the primary attempt and, if it has neither finished nor
+streamed its first token within a delay, starts a secondary attempt as well. The
+first attempt to produce a result or a first token wins and the other attempt is
+cancelled through its cancel event. The delay is a percentile of the latencies
+recently observed for the primary.
+
+Cancelling is cooperative: a cancelled attempt stops when it next checks its
+event, which for a model request is when the response arrives or between streamed
+chunks. An attempt that is still waiting for the server keeps its connection open
+until then.
+
+This file has no Talon dependencies so it can be tested outside of Talon.
+"""
+
+# Each attempt gets its own cancel event and a claim function. Streaming attempts
+# call claim before passing on their first chunk and drop the chunk if it is False.
+Attempt = Callable[[threading.Event, Callable[[], bool]], Any]
+
+PRIMARY = 0
+SECONDARY = 1
+
+
+@dataclass(frozen=True)
+class HedgeOutcome:
+    result: Any
+    winner: int
+    hedged: bool
+    # Seconds until the winner finished or streamed its first token
+    elapsed: float
+
+
+class LatencyTracker:
+    """Recent latencies per key, used to pick the hedge delay"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[Hashable, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key: Hashable, percent: float) -> Optional[float]:
+        """Nearest rank percentile, or None until there are min_samples samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, self.min_samples):
+            return None
+        rank = math.ceil(percent / 100 * len(samples))
+        return samples[min(len(samples), max(1, rank)) - 1]
+
+    def delay(
+        self,
+        key: Hashable,
+        percent: float,
+        default: float,
+        minimum: float,
+        maximum: float,
+    ) -> float:
+        value = self.percentile(key, percent)
+        return min(maximum, max(minimum, default if value is None else value))
+
+
+class HedgeStats:
+    """Counters for tuning hedge thresholds"""
+
+    def __init__(self):
+        self.requests = 0
+        self.hedged = 0
+        self.secondary_wins = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: Optional[HedgeOutcome]) -> None:
+        """Count a finished request; None means every attempt failed"""
+        with self._lock:
+            self.requests += 1
+            if outcome is None:
+                self.failures += 1
+                return
+            self.hedged += outcome.hedged
+            self.secondary_wins += outcome.winner == SECONDARY
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "secondary_wins": self.secondary_wins,
+                "failures": self.failures,
+            }
+
+
+class _Race:
+    def __init__(self, started: float):
+        self.started = started
+        self.cancel_events = [threading.Event(), threading.Event()]
+        self.condition = threading.Condition(threading.RLock())
+        self.winner: Optional[int] = None
+        self.claimed_at = 0.0
+        self.results: dict[int, Any] = {}
+        self.errors: dict[int, BaseException] = {}
+
+    def claim(self, index: int, clock: Callable[[], float]) -> bool:
+        with self.condition:
+            if self.winner is None:
+                self.winner = index
+                self.claimed_at = clock()
+                for other, event in enumerate(self.cancel_events):
+                    if other != index:
+                        event.set()
+                self.condition.notify_all()
+            return self.winner == index
+
+    def cancel_all(self) -> None:
+        for event in self.cancel_events:
+            event.set()
+
+
+def hedged_call(
+    primary: Attempt,
+    secondary: Attempt,
+    delay: float,
+    check_cancelled: Callable[[], None] = lambda: None,
+    clock: Callable[[], float] = time.monotonic,
+    poll_interval: float = 0.1,
+) -> HedgeOutcome:
+    """
+    Run primary, and secondary as well if primary has not claimed the race after
+    delay seconds. Returns the outcome of the winner. If primary fails before the
+    hedge is started, or every started attempt fails, the primary error is raised.
+    check_cancelled is polled and cancels both attempts when it raises.
+    """
+    race = _Race(clock())
+    attempts = [primary, secondary]
+
+    def run(index: int) -> None:
+        def claim() -> bool:
+            return race.claim(index, clock)
+
+        try:
+            result = attempts[index](race.cancel_events[index], claim)
+        except BaseException as e:
+            with race.condition:
+                race.errors[index] = e
+                race.condition.notify_all()
+            return
+        with race.condition:
+            if claim():
+                race.results[index] = result
+            race.condition.notify_all()
+
+    def start(index: int) -> None:
+        name = "talon-ai-hedge" if index else "talon-ai-primary"
+        threading.Thread(target=run, args=(index,), name=name, daemon=True).start()
+
+    start(PRIMARY)
+    started = 1
+    hedge_at = race.started + delay
+    with race.condition:
+        while True:
+            if race.winner in race.results:
+                winner: int = race.winner  # type: ignore
+                return HedgeOutcome(
+                    race.results[winner],
+                    winner,
+                    started > 1,
+                    race.claimed_at - race.started,
+                )
+            if race.winner in race.errors:
+                # The winner failed after it had started streaming
+                raise race.errors[race.winner]  # type: ignore
+            if len(race.errors) == started:
+                raise race.errors[PRIMARY]
+            now = clock()
+            if started == 1 and race.winner is None and now >= hedge_at:
+                start(SECONDARY)
+                started = 2
+            wait = poll_interval if started > 1 else min(poll_interval, hedge_at - now)
+            race.condition.wait(max(0.0, wait))
+            try:
+                check_cancelled()
+            except BaseException:
+                race.cancel_all()
+                raise
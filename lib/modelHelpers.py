@@ -1,24 +1,88 @@
 import base64
+import hashlib
 import json
 import logging
 import os
 import platform
+import re
 import subprocess
+import tempfile
+import threading
+import time
+from contextlib import closing, contextmanager
 from pathlib import Path
-from typing import IO, Any, Literal, NotRequired, Optional, TypedDict
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Iterator,
+    Literal,
+    NotRequired,
+    Optional,
+    TypedDict,
+)
 
-import requests
 from talon import actions, app, clip, resource, settings
 
-from ..lib.pureHelpers import strip_markdown
+from ..lib.imagePipeline import (
+    EncodedImage,
+    ImageOptions,
+    ImagePipeline,
+    data_url,
+    upload_seconds,
+)
+from ..lib.imageSkia import encode_talon_image
+from ..lib.llmWorker import LLMWorker, LLMWorkerError
+from ..lib.modelCache import ResponseCache
+from ..lib.modelChunking import group_for_reduce, join_chunks, map_in_order, split_text
+from ..lib.modelHedging import (
+    PRIMARY,
+    HedgeOutcome,
+    HedgeStats,
+    LatencyTracker,
+    hedged_call,
+)
+from ..lib.modelRateLimit import DeadlineExceeded, RateLimiter, call_with_retries
+from ..lib.modelRouter import ModelRouter
+from ..lib.modelTracing import TraceWriter, tracer
+from ..lib.pureHelpers import MarkdownStreamStripper, parse_sse_delta, strip_markdown
+from .modelScheduler import (
+    RequestCancelled,
+    RequestScheduler,
+    bind_cancel,
+    cancellable_sleep,
+    check_cancelled,
+    is_cancelled,
+    run_with_cancel,
+)
+from .modelSession import TRANSIENT_ERRORS, post
 from .modelState import GPTState
+from .modelSystemPrompt import SystemPromptBuilder
 from .modelTypes import GPTMessage, GPTMessageItem
+from .tokenEstimator import count_message_tokens, count_tokens
 
 """"
 All functions in this this file have impure dependencies on either the model or the talon APIs
 """
 
 
+# Duplicate a slow request to a secondary model or endpoint
+class HedgeConfig(TypedDict):
+    model: NotRequired[str]
+    endpoint: NotRequired[str]
+    percentile: NotRequired[float]
+    delay_ms: NotRequired[int]
+    min_delay_ms: NotRequired[int]
+    max_delay_ms: NotRequired[int]
+
+
+# Downscaling and recompression of images sent to the model
+class ImageConfig(TypedDict):
+    max_dimension: NotRequired[int]
+    format: NotRequired[str]
+    quality: NotRequired[int]
+
+
 # TypedDict definition for model configuration
 class ModelConfig(TypedDict):
     name: str
@@ -26,6 +90,12 @@ class ModelConfig(TypedDict):
     system_prompt: NotRequired[str]
     llm_options: NotRequired[dict[str, Any]]
     api_options: NotRequired[dict[str, Any]]
+    cache: NotRequired[bool]
+    context_token_budget: NotRequired[int]
+    context_window: NotRequired[int]
+    max_output_tokens: NotRequired[int]
+    hedge: NotRequired[HedgeConfig]
+    image: NotRequired[ImageConfig]
 
 
 # Path to the models.json file
@@ -34,6 +104,31 @@ MODELS_PATH = Path(__file__).parent.parent / "models.json"
 # Store loaded model configurations
 model_configs: dict[str, ModelConfig] = {}
 
+# On-disk cache of model responses keyed by the normalized request
+CACHE_PATH = Path(__file__).parent.parent / ".cache" / "responses.sqlite3"
+_response_cache = ResponseCache(CACHE_PATH)
+
+# Shared by every API request so concurrent requests respect the same limits
+_rate_limiter = RateLimiter(sleep=cancellable_sleep)
+
+# Latency to the first token or full response, keyed by model and streaming
+_hedge_latencies = LatencyTracker()
+_hedge_stats = HedgeStats()
+
+# Rolling latency and error history of every model, used to route "auto"
+ROUTER_PATH = Path(__file__).parent.parent / ".cache" / "model_latency.json"
+_model_router = ModelRouter(ROUTER_PATH)
+
+# Hedged attempts run with notifications muted, so a request notifies only once
+_notifications = threading.local()
+
+# Processed clipboard images, so a screenshot reused across prompts is encoded once
+_image_pipeline = ImagePipeline(encoder=encode_talon_image)
+
+# Timing spans of recent requests, rotated so the file stays small
+TRACE_PATH = Path(__file__).parent.parent / ".cache" / "traces.jsonl"
+tracer.writer = TraceWriter(TRACE_PATH)
+
 
 def load_model_config(f: IO) -> None:
     """
@@ -65,9 +160,18 @@ def on_update(f: IO):
     load_model_config(f)
 
 
-def resolve_model_name(model: str) -> str:
+def resolve_model_name(model: str, prompt_tokens: int = 0) -> str:
+    """
+    Get the actual model name from the model list value. "auto" is routed for a
+    prompt of prompt_tokens tokens.
+    """
+    return resolve_models(model, prompt_tokens)[0]
+
+
+def resolve_models(model: str, prompt_tokens: int) -> list[str]:
     """
-    Get the actual model name from the model list value.
+    Get the model to use for a model list value, followed by the models to fail
+    over to. Only "auto", spoken or set as user.model_default, has fallbacks.
     """
     if model == "model":
         # Check for deprecated setting first for backward compatibility
@@ -79,7 +183,27 @@ def resolve_model_name(model: str) -> str:
             model = openai_model
         else:
             model = settings.get("user.model_default")  # type: ignore
-    return model
+    if model == "auto":
+        return route_models(prompt_tokens)
+    return [model]
+
+
+def route_models(prompt_tokens: int) -> list[str]:
+    """
+    Order the configured models for a prompt of the given size, best first. The
+    first model that is not degraded and meets user.model_auto_latency_slo is
+    preferred, in the order of models.json.
+    """
+    candidates = [name for name in model_configs if name != "auto"]
+    if not candidates:
+        return [settings.get("user.model_default")]  # type: ignore
+    slo: float = settings.get("user.model_auto_latency_slo")  # type: ignore
+    return _model_router.choose(candidates, prompt_tokens, slo)
+
+
+def model_latency_report() -> list[str]:
+    """Get the observed latency and error rate of each model"""
+    return _model_router.report()
 
 
 def get_model_config(model_name: str) -> Optional[ModelConfig]:
@@ -89,6 +213,181 @@ def get_model_config(model_name: str) -> Optional[ModelConfig]:
     return model_configs.get(model_name)
 
 
+def response_cache(model: str) -> Optional[ResponseCache]:
+    """Get the response cache if caching is enabled both globally and for the model"""
+    if not settings.get("user.model_cache_enabled"):
+        return None
+    config = get_model_config(model)
+    if config and not config.get("cache", True):
+        return None
+    _response_cache.ttl_seconds = settings.get("user.model_cache_ttl")  # type: ignore
+    max_mb: int = settings.get("user.model_cache_max_mb")  # type: ignore
+    _response_cache.max_bytes = max_mb * 1024 * 1024
+    return _response_cache
+
+
+def clear_response_cache() -> None:
+    """Remove all cached model responses"""
+    _response_cache.clear()
+
+
+def response_cache_stats() -> dict[str, int]:
+    """Get the hit/miss counters and size of the response cache"""
+    return _response_cache.stats()
+
+
+def hedge_stats() -> dict[str, int]:
+    """Get the counters of hedged requests"""
+    return _hedge_stats.snapshot()
+
+
+def image_options(model: str) -> ImageOptions:
+    """Get the image processing settings, which can be overridden per model"""
+    config = get_model_config(model)
+    overrides = config.get("image", {}) if config else {}
+    return ImageOptions(
+        max_dimension=overrides.get(
+            "max_dimension", settings.get("user.model_image_max_dimension")
+        ),
+        format=overrides.get("format", settings.get("user.model_image_format")),
+        quality=overrides.get("quality", settings.get("user.model_image_quality")),
+    )
+
+
+def prepare_image(content: GPTMessageItem, model: str) -> GPTMessageItem:
+    """Downscale and recompress an image for the model. Other content is unchanged"""
+    if content["type"] != "image_url":
+        return content
+    with tracer.span("prepare_image") as span:
+        image: Optional[EncodedImage] = _image_pipeline.prepare(
+            content["image_url"]["url"], image_options(model)
+        )
+        if image is None:
+            return content
+        span.set(
+            original_bytes=image.original_bytes, bytes=image.bytes, cached=image.cached
+        )
+    return {"type": "image_url", "image_url": {"url": image.url}}
+
+
+def image_stats() -> dict[str, Any]:
+    """Get the bytes and estimated upload time saved by processing images"""
+    stats = _image_pipeline.stats.snapshot()
+    upload_mbps: float = settings.get("user.model_upload_mbps")  # type: ignore
+    stats["saved_seconds"] = upload_seconds(stats["saved_bytes"], upload_mbps)
+    return stats
+
+
+def context_token_budget(model: str) -> int:
+    """Get the token budget for stored context, which can be overridden per model"""
+    config = get_model_config(model)
+    if config and "context_token_budget" in config:
+        return config["context_token_budget"]
+    return settings.get("user.model_context_token_budget")  # type: ignore
+
+
+CONTEXT_SUMMARY_PROMPT = "Summarize the following context in a few sentences. Keep names, numbers and any details that would be needed to answer later questions about it."
+
+
+def summarize_evicted_context(messages: list[GPTMessageItem]) -> None:
+    """Add a summary of evicted context back to the context using a cheap model"""
+    model: str = settings.get("user.model_context_summary_model")  # type: ignore
+    if not model:
+        return
+    prompt = format_message(
+        f'{CONTEXT_SUMMARY_PROMPT}\n\n"""{messages_to_string(messages)}"""'
+    )
+    prepared = PreparedRequest(
+        prompt=prompt,
+        content_to_process=None,
+        system_message="",
+        model=model,
+        continue_thread=False,
+        request=GPTMessage(role="user", content=[prompt]),
+        chunk_mode="",
+    )
+    RequestScheduler.submit(
+        lambda: dispatch_request(prepared),
+        lambda summary: GPTState.context.add(summary, summary=True),
+    )
+
+
+def token_limits(model: str) -> tuple[str, int, int]:
+    """Return the model id, context window and maximum response tokens of a model"""
+    config = get_model_config(model) or {}
+    context_window: int = config.get(
+        "context_window", settings.get("user.model_context_window")
+    )  # type: ignore
+    max_output: int = config.get(
+        "max_output_tokens", settings.get("user.model_max_output_tokens")
+    )  # type: ignore
+    return config.get("model_id", model), context_window, max_output
+
+
+class PromptTooLargeError(Exception):
+    """The prompt does not fit in the context window of the model"""
+
+    def __init__(self, prompt_tokens: int, context_window: int):
+        self.prompt_tokens = prompt_tokens
+        self.context_window = context_window
+        super().__init__(
+            f"GPT Failure: The prompt is about {prompt_tokens} tokens, which does not fit in the {context_window} token context window of the model"
+        )
+
+
+class ResponseFormatError(Exception):
+    """The endpoint rejected a request that asked for a response_format"""
+
+
+class ModelUnavailableError(Exception):
+    """
+    The model could not answer because of a connection error, a timeout, a server
+    error or rate limiting. Only these count against the health of a model and
+    make an "auto" request fail over to the next model.
+    """
+
+
+# Status codes of responses that mean the model is unavailable, not the request bad
+UNAVAILABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+
+@contextmanager
+def observe_model_call(model: str, content: list[GPTMessageItem]) -> Iterator[None]:
+    """Record the latency of a call that reached the model, for routing "auto" requests"""
+    prompt_tokens = count_tokens(" ".join(extract_message(item) for item in content))
+    started = time.monotonic()
+    try:
+        yield
+    except ModelUnavailableError:
+        elapsed = time.monotonic() - started
+        _model_router.record(model, prompt_tokens, elapsed, ok=False)
+        raise
+    _model_router.record(model, prompt_tokens, time.monotonic() - started, ok=True)
+
+
+# Refuse prompts that would leave less than this many tokens for the response
+MIN_RESPONSE_TOKENS = 256
+
+
+def check_prompt_size(
+    model: str, system_message: str, content: list[GPTMessageItem]
+) -> int:
+    """
+    Estimate the size of a prompt before any network I/O and return how many tokens
+    can be requested for the response. Raises PromptTooLargeError if it cannot fit.
+    """
+    model_id, context_window, max_output = token_limits(model)
+    texts = [system_message] + [item["text"] for item in content if "text" in item]
+    images = sum(1 for item in content if item.get("type") == "image_url")
+    prompt_tokens = count_message_tokens(texts, images, model_id)
+    available = context_window - prompt_tokens
+    if available < min(MIN_RESPONSE_TOKENS, max_output):
+        error = PromptTooLargeError(prompt_tokens, context_window)
+        notify(str(error))
+        raise error
+    return min(max_output, available)
+
+
 def messages_to_string(messages: list[GPTMessageItem]) -> str:
     """Format messages as a string"""
     formatted_messages = []
@@ -102,6 +401,9 @@ def messages_to_string(messages: list[GPTMessageItem]) -> str:
 
 def notify(message: str):
     """Send a notification to the user. Defaults the Andreas' notification system if you have it installed"""
+    if getattr(_notifications, "muted", False):
+        print(message)
+        return
     try:
         actions.user.notify(message)
     except Exception:
@@ -140,12 +442,9 @@ def extract_message(content: GPTMessageItem) -> str:
 def format_clipboard() -> GPTMessageItem:
     clipped_image = clip.image()
     if clipped_image:
+        # Kept at full size here; prepare_image shrinks it once the model is known
         data = clipped_image.encode().data()
-        base64_image = base64.b64encode(data).decode("utf-8")
-        return {
-            "type": "image_url",
-            "image_url": {"url": f"data:image/;base64,{base64_image}"},
-        }
+        return {"type": "image_url", "image_url": {"url": data_url(data)}}
     else:
         if not clip.text():
             raise RuntimeError(
@@ -155,17 +454,78 @@ def format_clipboard() -> GPTMessageItem:
         return format_message(clip.text())  # type: ignore Unclear why this is not narrowing the type
 
 
+class PreparedRequest(TypedDict):
+    prompt: GPTMessageItem
+    content_to_process: Optional[GPTMessageItem]
+    system_message: str
+    model: str
+    continue_thread: bool
+    request: GPTMessage
+    # "map" or "reduce" if the content is processed in chunks, otherwise empty
+    chunk_mode: str
+    # Models to fail over to, in order, if the model fails. Only set for "auto"
+    fallback_models: NotRequired[list[str]]
+
+
 def send_request(
     prompt: GPTMessageItem,
     content_to_process: Optional[GPTMessageItem],
     model: str,
     thread: str,
     destination: str = "",
+    on_chunk: Optional[Callable[[str], None]] = None,
+    chunk_mode: str = "",
 ) -> GPTMessageItem:
-    """Generate run a GPT request and return the response"""
-    model = resolve_model_name(model)
+    """Generate run a GPT request and return the response
+
+    If on_chunk is provided, the response is streamed and each fence-stripped chunk
+    is passed to it as it arrives. The full response is still returned at the end.
+    """
+    with tracer.span("prepare_request"):
+        prepared = prepare_request(
+            prompt, content_to_process, model, thread, destination, chunk_mode
+        )
+    return dispatch_request(prepared, on_chunk)
+
+
+def resolve_chunk_mode(
+    content_to_process: Optional[GPTMessageItem], model: str, requested: str
+) -> str:
+    """
+    Decide whether text should be processed in chunks. A requested mode is used when
+    the text is larger than one chunk; otherwise user.model_chunk_auto_mode is used
+    when the text would not fit in the context window of the model.
+    """
+    if content_to_process is None or content_to_process["type"] != "text":
+        return ""
+    text = content_to_process["text"]  # type: ignore
+    chunk_tokens: int = settings.get("user.model_chunk_tokens")  # type: ignore
+    if requested:
+        return requested if count_tokens(text) > chunk_tokens else ""
+    model_id, context_window, max_output = token_limits(model)
+    if count_tokens(text, model_id) > context_window - max_output:
+        return settings.get("user.model_chunk_auto_mode")  # type: ignore
+    return ""
+
+
+def prepare_request(
+    prompt: GPTMessageItem,
+    content_to_process: Optional[GPTMessageItem],
+    model: str,
+    thread: str,
+    destination: str = "",
+    chunk_mode: str = "",
+) -> PreparedRequest:
+    """Build the messages for a request. This calls Talon actions, so it must run on the main thread"""
+    query = extract_message(prompt)
+    if content_to_process is not None:
+        query += "\n" + extract_message(content_to_process)
+
+    model, *fallback_models = resolve_models(model, count_tokens(query))
 
-    continue_thread = thread == "continueLast"
+    chunk_mode = resolve_chunk_mode(content_to_process, model, chunk_mode)
+    # Chunks are independent requests, so they cannot continue a single thread
+    continue_thread = thread == "continueLast" and not chunk_mode
 
     notification = "GPT Task Started"
     if len(GPTState.context) > 0:
@@ -181,38 +541,36 @@ def send_request(
     # Get model configuration if available
     config = get_model_config(model)
 
-    language = actions.code.language()
-    language_context = (
-        f"The user is currently in a code editor for the programming language: {language}."
-        if language != ""
-        else None
-    )
-    application_context = f"The following describes the currently focused application:\n\n{actions.user.talon_get_active_context()}"
-    snippet_context = (
-        "\n\nPlease return the response as a snippet with placeholders. A snippet can control cursors and text insertion using constructs like tabstops ($1, $2, etc., with $0 as the final position). Linked tabstops update together. Placeholders, such as ${1:foo}, allow easy changes and can be nested (${1:another ${2:}}). Choices, using ${1|one,two,three|}, prompt user selection."
-        if destination == "snip"
-        else None
-    )
+    GPTState.enforce_context_budget(context_token_budget(model), query)
 
-    system_message = "\n\n".join(
-        [
-            item
-            for item in [
-                (
-                    config["system_prompt"]
-                    if config and "system_prompt" in config
-                    else settings.get("user.model_system_prompt")
-                ),
-                language_context,
-                application_context,
-                snippet_context,
-            ]
-            + actions.user.gpt_additional_user_context()
-            + [context.get("text") for context in GPTState.context]
-            if item
-        ]
+    with tracer.span("system_prompt"):
+        system_message = SystemPromptBuilder.build(
+            config["system_prompt"] if config and "system_prompt" in config else None,
+            destination,
+        )
+
+    if chunk_mode:
+        # The request for each chunk is built on the worker by dispatch_chunked_request
+        request = build_request(format_message(extract_message(prompt)), None)
+    else:
+        request = build_request(prompt, content_to_process)
+
+    return PreparedRequest(
+        prompt=prompt,
+        content_to_process=content_to_process,
+        system_message=system_message,
+        model=model,
+        continue_thread=continue_thread,
+        request=request,
+        chunk_mode=chunk_mode,
+        fallback_models=fallback_models,
     )
 
+
+def build_request(
+    prompt: GPTMessageItem, content_to_process: Optional[GPTMessageItem]
+) -> GPTMessage:
+    """Build the user message. Text content is appended to the text of the prompt"""
     content: list[GPTMessageItem] = [prompt]
     if content_to_process is not None:
         if content_to_process["type"] == "image_url":
@@ -229,36 +587,182 @@ def send_request(
             )
             content = [prompt]
 
-    request = GPTMessage(
+    return GPTMessage(
         role="user",
         content=content,
     )
 
+
+def dispatch_request(
+    prepared: PreparedRequest,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> GPTMessageItem:
+    """
+    Send a prepared request to the configured endpoint, failing over to the fallback
+    models of an "auto" request. This is safe to call from a worker thread
+    """
+    if prepared["chunk_mode"]:
+        return dispatch_chunked_request(prepared, on_chunk)
+
+    models = [prepared["model"], *prepared.get("fallback_models", [])]
+    prompt_tokens = count_tokens(
+        " ".join(extract_message(item) for item in prepared["request"]["content"])
+    )
+    streamed = False
+
+    def forward(chunk: str) -> None:
+        nonlocal streamed
+        streamed = True
+        on_chunk(chunk)  # type: ignore
+
+    for index, model in enumerate(models):
+        attempt: PreparedRequest = {**prepared, "model": model}  # type: ignore
+        try:
+            with tracer.span("model_request", model=model, tokens=prompt_tokens):
+                attempt = with_prepared_images(attempt)
+                response = send_to_endpoint(attempt, forward if on_chunk else None)
+        except ModelUnavailableError:
+            # A partly streamed response cannot be replaced by another model
+            if streamed or index + 1 == len(models):
+                raise
+            notify(f"GPT Failure: {model} failed, trying {models[index + 1]}")
+            continue
+        break
+
+    return response
+
+
+def with_prepared_images(prepared: PreparedRequest) -> PreparedRequest:
+    """
+    Shrink the images of a request for its model. This runs on the worker, once the
+    model is known, so the main thread never waits for an image to be encoded
+    """
+    content = prepared["content_to_process"]
+    if content is None or content["type"] != "image_url":
+        return prepared
+    image = prepare_image(content, prepared["model"])
+    items = prepared["request"]["content"]
+    request: GPTMessage = {
+        **prepared["request"],
+        "content": [image if item == content else item for item in items],
+    }
+    return {**prepared, "content_to_process": image, "request": request}  # type: ignore
+
+
+def send_to_endpoint(
+    prepared: PreparedRequest,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> GPTMessageItem:
+    """Send a prepared request to the llm CLI or the API, depending on user.model_endpoint"""
     model_endpoint: str = settings.get("user.model_endpoint")  # type: ignore
     if model_endpoint == "llm":
-        response = send_request_to_llm_cli(
-            prompt, content_to_process, system_message, model, continue_thread
+        with tracer.span("llm_cli"):
+            return send_request_to_llm_cli(
+                prepared["prompt"],
+                prepared["content_to_process"],
+                prepared["system_message"],
+                prepared["model"],
+                prepared["continue_thread"],
+                on_chunk,
+            )
+    if prepared["continue_thread"]:
+        notify(
+            "Warning: Thread continuation is only supported when using setting user.model_endpoint = 'llm'"
         )
+    return send_request_to_api(
+        prepared["request"], prepared["system_message"], prepared["model"], on_chunk
+    )
+
+
+CHUNK_REDUCE_PROMPT = 'The following are the results of applying an instruction to consecutive parts of a longer text, separated by blank lines. Combine them into a single response that applies the instruction to the whole text. The instruction was:\n\n"""{instruction}"""'
+
+
+def dispatch_chunked_request(
+    prepared: PreparedRequest,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> GPTMessageItem:
+    """
+    Split the content into chunks and apply the prompt to each chunk concurrently.
+    In "map" mode the results are joined in order; in "reduce" mode they are combined
+    with further requests until a single response remains.
+    """
+    chunk_tokens: int = settings.get("user.model_chunk_tokens")  # type: ignore
+    workers: int = settings.get("user.model_chunk_workers")  # type: ignore
+    instruction = extract_message(prepared["prompt"])
+    text = extract_message(prepared["content_to_process"])  # type: ignore
+    chunks = split_text(text, chunk_tokens)
+    if settings.get("user.model_verbose_notifications"):
+        notify(f"GPT Task: Processing {len(chunks)} chunks")
+
+    def apply(prompt_text: str) -> Callable[[str], str]:
+        def run(text: str) -> str:
+            if not text.strip():
+                return text
+            prompt = format_message(prompt_text)
+            content = format_message(text)
+            chunk_request = PreparedRequest(
+                prompt=prompt,
+                content_to_process=content,
+                system_message=prepared["system_message"],
+                model=prepared["model"],
+                continue_thread=False,
+                request=build_request(prompt, content),
+                chunk_mode="",
+            )
+            return extract_message(dispatch_request(chunk_request))
+
+        return bind_cancel(tracer.bind(run))
+
+    results = map_in_order(
+        [chunk.text for chunk in chunks], apply(instruction), workers
+    )
+    if prepared["chunk_mode"] == "map":
+        response = join_chunks(results, chunks)
     else:
-        if continue_thread:
-            notify(
-                "Warning: Thread continuation is only supported when using setting user.model_endpoint = 'llm'"
+        reduce = apply(CHUNK_REDUCE_PROMPT.format(instruction=instruction))
+        results = [result for result in results if result.strip()]
+        while len(results) > 1:
+            groups = group_for_reduce(results, chunk_tokens)
+            if len(groups) == len(results):
+                # Every partial result is large on its own, so combine them in pairs
+                groups = [results[i : i + 2] for i in range(0, len(results), 2)]
+            results = map_in_order(
+                ["\n\n".join(group) for group in groups], reduce, workers
             )
-        response = send_request_to_api(request, system_message, model)
+        response = results[0] if results else ""
 
-    return response
+    if on_chunk is not None:
+        on_chunk(response)
+    return format_message(response)
 
 
 def send_request_to_api(
-    request: GPTMessage, system_message: str, model: str
+    request: GPTMessage,
+    system_message: str,
+    model: str,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    response_format: Optional[dict[str, Any]] = None,
+    endpoint: Optional[str] = None,
 ) -> GPTMessageItem:
-    """Send a request to the model API endpoint and return the response"""
+    """
+    Send a request to the model API endpoint and return the response. A
+    response_format asks for structured output, such as JSON mode or a JSON schema.
+    Requests to a model with a hedge configuration are hedged unless an endpoint
+    is given.
+    """
     # Get model configuration if available
     config = get_model_config(model)
 
+    if endpoint is None and config and "hedge" in config:
+        return send_hedged_request(
+            request, system_message, model, config["hedge"], on_chunk, response_format
+        )
+
     # Use model_id from configuration if available
     model_id = config["model_id"] if config and "model_id" in config else model
 
+    max_tokens = check_prompt_size(model, system_message, request["content"])
+
     data = {
         "messages": (
             [
@@ -271,7 +775,7 @@ def send_request_to_api(
             else []
         )
         + [request],
-        "max_tokens": 2024,
+        "max_tokens": max_tokens,
         "n": 1,
         "model": model_id,
     }
@@ -288,10 +792,28 @@ def send_request_to_api(
     if config and "api_options" in config:
         data.update(config["api_options"])
 
+    if response_format is not None:
+        data["response_format"] = response_format
+
     if GPTState.debug_enabled:
         print(data)
 
-    url: str = settings.get("user.model_endpoint")  # type: ignore
+    url: str = endpoint or settings.get("user.model_endpoint")  # type: ignore
+
+    cache = response_cache(model)
+    cache_key = ResponseCache.make_key({"endpoint": url, **data}) if cache else ""
+    cached = cache.get(cache_key) if cache else None
+    if cached is not None:
+        current = tracer.current()
+        if current is not None:
+            current.set(cached=True)
+        if on_chunk is not None:
+            on_chunk(cached)
+        return format_message(cached)
+
+    if on_chunk is not None:
+        data["stream"] = True
+
     headers = {"Content-Type": "application/json"}
     token = get_token()
     # If the model endpoint is Azure, we need to use a different header
@@ -300,18 +822,204 @@ def send_request_to_api(
     else:
         headers["Authorization"] = f"Bearer {token}"
 
-    raw_response = requests.post(url, headers=headers, data=json.dumps(data))
+    with tracer.span("encode_json"):
+        body = json.dumps(data)
+    # Only a response, or a failure of the model, is recorded for routing
+    with observe_model_call(model, request["content"]):
+        with tracer.span("network", url=url, stream=on_chunk is not None) as span:
+            raw_response = post_with_retries(
+                url, headers, body, model_id, stream=on_chunk is not None
+            )
+            span.set(status=raw_response.status_code)
+        # Closing a streamed response also returns its session to the idle pool
+        with closing(raw_response):
+            # A hedged attempt that lost the race while waiting for the response
+            check_cancelled()
+
+            match raw_response.status_code:
+                case 200:
+                    with tracer.span("read_response"):
+                        resp = read_response(raw_response, on_chunk)
+                    if settings.get("user.model_verbose_notifications"):
+                        notify("GPT Task Completed")
+                    resp = resp.strip()
+                    with tracer.span("strip_markdown"):
+                        formatted_resp = strip_markdown(resp)
+                    if cache:
+                        cache.put(cache_key, formatted_resp)
+                    return format_message(formatted_resp)
+                case 400 if response_format is not None and rejects_response_format(
+                    raw_response
+                ):
+                    # Callers fall back to a weaker format, so this is not a failure yet
+                    raise ResponseFormatError(error_details(raw_response))
+                case status if status in UNAVAILABLE_STATUS_CODES:
+                    notify("GPT Failure: Check the Talon Log")
+                    raise ModelUnavailableError(error_details(raw_response))
+                case _:
+                    notify("GPT Failure: Check the Talon Log")
+                    raise Exception(error_details(raw_response))
+
+
+def send_hedged_request(
+    request: GPTMessage,
+    system_message: str,
+    model: str,
+    hedge: HedgeConfig,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    response_format: Optional[dict[str, Any]] = None,
+) -> GPTMessageItem:
+    """
+    Send a request and, if it has not completed or streamed its first token after
+    the hedge delay, send a duplicate to the secondary model or endpoint. The first
+    attempt to respond is used and the other one is cancelled. Attempts don't
+    notify, so a failure is only reported once every attempt has failed.
+    """
+    primary_endpoint: str = settings.get("user.model_endpoint")  # type: ignore
+    targets = [
+        (model, primary_endpoint),
+        (hedge.get("model", model), hedge.get("endpoint", primary_endpoint)),
+    ]
+    key = (model, on_chunk is not None)
+    delay = _hedge_latencies.delay(
+        key,
+        hedge.get("percentile", 95),
+        hedge.get("delay_ms", 2000) / 1000,
+        hedge.get("min_delay_ms", 250) / 1000,
+        hedge.get("max_delay_ms", 10000) / 1000,
+    )
+
+    def attempt(index: int) -> Callable[[Any, Callable[[], bool]], GPTMessageItem]:
+        target_model, target_endpoint = targets[index]
+
+        def run(cancel_event: Any, claim: Callable[[], bool]) -> GPTMessageItem:
+            forward = None
+            if on_chunk is not None:
+
+                def forward(chunk: str) -> None:
+                    # Only the attempt that streamed first reaches the caller
+                    if claim():
+                        on_chunk(chunk)
+
+            _notifications.muted = True
+            try:
+                with tracer.span("hedge_attempt", model=target_model, index=index):
+                    return run_with_cancel(
+                        cancel_event,
+                        lambda: send_request_to_api(
+                            request,
+                            system_message,
+                            target_model,
+                            forward,
+                            response_format,
+                            target_endpoint,
+                        ),
+                    )
+            finally:
+                _notifications.muted = False
+
+        # Attempts run on their own threads, so carry the trace over to them
+        return tracer.bind(run)
 
-    match raw_response.status_code:
-        case 200:
-            if settings.get("user.model_verbose_notifications"):
-                notify("GPT Task Completed")
-            resp = raw_response.json()["choices"][0]["message"]["content"].strip()
-            formatted_resp = strip_markdown(resp)
-            return format_message(formatted_resp)
-        case _:
+    try:
+        outcome: HedgeOutcome = hedged_call(
+            attempt(0), attempt(1), delay, check_cancelled
+        )
+    except RequestCancelled:
+        raise
+    except Exception as e:
+        _hedge_stats.record(None)
+        if not isinstance(e, ResponseFormatError):
             notify("GPT Failure: Check the Talon Log")
-            raise Exception(raw_response.json())
+        raise
+    _hedge_stats.record(outcome)
+    if settings.get("user.model_verbose_notifications"):
+        notify("GPT Task Completed")
+    # A secondary win still bounds the primary latency from below
+    _hedge_latencies.record(key, outcome.elapsed)
+    if outcome.hedged and GPTState.debug_enabled:
+        winner = "primary" if outcome.winner == PRIMARY else "secondary"
+        print(f"Hedged request to {model}: {winner} won after {outcome.elapsed:.2f}s")
+    return outcome.result
+
+
+def post_with_retries(
+    url: str, headers: dict[str, str], data: str, model_id: str, stream: bool
+) -> Any:
+    """
+    Post a request to the model endpoint, waiting for the client side rate limit and
+    retrying rate limited, transient server and connection failures with backoff
+    """
+    requests_per_minute: int = settings.get("user.model_requests_per_minute")  # type: ignore
+    _rate_limiter.requests_per_minute = requests_per_minute
+    timeout: float = settings.get("user.model_request_timeout")  # type: ignore
+    max_retries: int = settings.get("user.model_max_retries")  # type: ignore
+    attempts = 0
+
+    def send(remaining: float) -> Any:
+        nonlocal attempts
+        attempts += 1
+        if attempts > 1 and GPTState.debug_enabled:
+            print(f"Retrying model request, attempt {attempts}")
+        return post(url, headers=headers, data=data, stream=stream, timeout=remaining)
+
+    try:
+        return call_with_retries(
+            send,
+            _rate_limiter,
+            (url, model_id),
+            timeout,
+            max_retries,
+            lambda error: isinstance(error, TRANSIENT_ERRORS),
+        )
+    except (DeadlineExceeded, *TRANSIENT_ERRORS) as e:
+        notify(f"GPT Failure: The request did not complete after {attempts} attempts")
+        raise ModelUnavailableError(f"Model request failed: {e}") from e
+
+
+def error_details(raw_response: Any) -> Any:
+    """Get the error from a failed response, which is not always JSON"""
+    try:
+        return raw_response.json()
+    except ValueError:
+        return f"HTTP {raw_response.status_code}: {raw_response.text[:1000]}"
+
+
+def rejects_response_format(raw_response: Any) -> bool:
+    """Whether a bad request response is about the requested response_format"""
+    details = str(error_details(raw_response)).lower()
+    return "response_format" in details or "json_schema" in details
+
+
+def read_response(raw_response: Any, on_chunk: Optional[Callable[[str], None]]) -> str:
+    """Read the text of a successful response. A dropped connection is a failure"""
+    try:
+        if on_chunk is not None:
+            return read_streamed_response(raw_response, on_chunk)
+        return raw_response.json()["choices"][0]["message"]["content"]
+    except TRANSIENT_ERRORS as e:
+        raise ModelUnavailableError(f"Reading the model response failed: {e}") from e
+
+
+def read_streamed_response(raw_response: Any, on_chunk: Callable[[str], None]) -> str:
+    """Read a server-sent event chat completion, passing each stripped chunk to on_chunk"""
+    stripper = MarkdownStreamStripper()
+    parts: list[str] = []
+    for line in raw_response.iter_lines(decode_unicode=True):
+        if is_cancelled():
+            raw_response.close()
+            check_cancelled()
+        delta = parse_sse_delta(line) if line else None
+        if delta is None:
+            continue
+        parts.append(delta)
+        chunk = stripper.feed(delta)
+        if chunk:
+            on_chunk(chunk)
+    tail = stripper.finish()
+    if tail:
+        on_chunk(tail)
+    return "".join(parts)
 
 
 def send_request_to_llm_cli(
@@ -320,6 +1028,7 @@ def send_request_to_llm_cli(
     system_message: str,
     model: str,
     continue_thread: bool,
+    on_chunk: Optional[Callable[[str], None]] = None,
 ) -> GPTMessageItem:
     """Send a request to the LLM CLI tool and return the response"""
     # Get model configuration if available
@@ -328,6 +1037,13 @@ def send_request_to_llm_cli(
     # Use model_id from configuration if available
     model_id = config["model_id"] if config and "model_id" in config else model
 
+    # build_request has already appended text content to the prompt, so only an
+    # image is counted separately
+    content = [prompt]
+    if content_to_process and content_to_process["type"] == "image_url":
+        content.append(content_to_process)
+    check_prompt_size(model, system_message, content)
+
     # Build command
     command: list[str] = [settings.get("user.model_llm_path")]  # type: ignore
     if continue_thread:
@@ -376,10 +1092,45 @@ def send_request_to_llm_cli(
     process_env = os.environ.copy()
     if platform.system() == "Windows":
         process_env["PYTHONUTF8"] = "1"  # For Python 3.7+ to enable UTF-8 mode
-    # On other platforms, UTF-8 is also the common/expected encoding.
-    output_encoding = "utf-8"
+
+    # Continued threads depend on the conversation history so they are never cached
+    cache = None if continue_thread else response_cache(model)
+    cache_key = ""
+    if cache:
+        input_digest = hashlib.sha256(cmd_input).hexdigest() if cmd_input else ""
+        cache_key = ResponseCache.make_key(
+            {"command": command[1:], "input": input_digest}
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            if on_chunk is not None:
+                on_chunk(cached)
+            return format_message(cached)
+
+    with observe_model_call(model, [prompt]):
+        response = run_llm_command(command, cmd_input, process_env, on_chunk)
+    if cache:
+        cache.put(cache_key, extract_message(response))
+    return response
+
+
+def run_llm_command(
+    command: list[str],
+    cmd_input: bytes | None,
+    process_env: dict[str, str],
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> GPTMessageItem:
+    """Run the LLM CLI command in the worker or the executable and return the response"""
+    if settings.get("user.model_llm_worker"):
+        response = run_llm_worker(command, cmd_input, on_chunk)
+        if response is not None:
+            return response
+
+    if on_chunk is not None:
+        return stream_llm_cli(command, cmd_input, process_env, on_chunk)
 
     # Execute command and capture output.
+    output_encoding = "utf-8"
     try:
         result = subprocess.run(
             command,
@@ -394,12 +1145,116 @@ def send_request_to_llm_cli(
         if settings.get("user.model_verbose_notifications"):
             notify("GPT Task Completed")
         resp = result.stdout.decode(output_encoding).strip()
-        formatted_resp = strip_markdown(resp)
-        return format_message(formatted_resp)
+        return format_message(strip_markdown(resp))
     except subprocess.CalledProcessError as e:
         error_msg = e.stderr.decode(output_encoding).strip() if e.stderr else str(e)
         notify(f"GPT Failure: {error_msg}")
+        raise llm_failure(error_msg) from e
+    except Exception as e:
+        notify("GPT Failure: Check the Talon Log")
         raise e
+
+
+# llm reports errors of the model API as text, so they are recognized by message
+UNAVAILABLE_LLM_ERROR = re.compile(
+    r"\b(?:429|5\d\d)\b|rate.?limit|overloaded|timed? ?out|connection",
+    re.IGNORECASE,
+)
+
+
+def llm_failure(error_msg: str) -> Exception:
+    """The exception for a failed llm command: unavailable if the model API failed"""
+    if UNAVAILABLE_LLM_ERROR.search(error_msg):
+        return ModelUnavailableError(error_msg)
+    return Exception(error_msg)
+
+
+def run_llm_worker(
+    command: list[str],
+    cmd_input: bytes | None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> Optional[GPTMessageItem]:
+    """Run the LLM CLI command in the persistent worker, or return None to fall back to the executable"""
+    stripper = MarkdownStreamStripper()
+
+    def forward(chunk: str) -> None:
+        text = stripper.feed(chunk)
+        if text:
+            on_chunk(text)  # type: ignore
+
+    try:
+        output = LLMWorker.run(command[1:], cmd_input, forward if on_chunk else None)
+    except LLMWorkerError as e:
+        notify(f"GPT Failure: {e}")
+        raise llm_failure(str(e)) from e
+    if output is None:
+        return None
+    if on_chunk is not None:
+        tail = stripper.finish()
+        if tail:
+            on_chunk(tail)
+    if settings.get("user.model_verbose_notifications"):
+        notify("GPT Task Completed")
+    return format_message(strip_markdown(output.strip()))
+
+
+def stream_llm_cli(
+    command: list[str],
+    cmd_input: bytes | None,
+    process_env: dict[str, str],
+    on_chunk: Callable[[str], None],
+) -> GPTMessageItem:
+    """Run the LLM CLI tool and pass its output to on_chunk line by line as it is printed"""
+    output_encoding = "utf-8"
+    stripper = MarkdownStreamStripper()
+    lines: list[str] = []
+    try:
+        # stderr goes to a file since it is only read once stdout is done, and a full
+        # pipe would block the process
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE if cmd_input is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                creationflags=(
+                    subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0  # type: ignore
+                ),
+                env=process_env if platform.system() == "Windows" else None,
+            )
+            if cmd_input is not None:
+                process.stdin.write(cmd_input)  # type: ignore
+                process.stdin.close()  # type: ignore
+            for raw_line in iter(process.stdout.readline, b""):  # type: ignore
+                if is_cancelled():
+                    process.kill()
+                    check_cancelled()
+                line = raw_line.decode(output_encoding)
+                lines.append(line)
+                chunk = stripper.feed(line)
+                if chunk:
+                    on_chunk(chunk)
+            if process.wait() != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read()
+                raise subprocess.CalledProcessError(
+                    process.returncode, command, "".join(lines), stderr
+                )
+        tail = stripper.finish()
+        if tail:
+            on_chunk(tail)
+        if settings.get("user.model_verbose_notifications"):
+            notify("GPT Task Completed")
+        return format_message(strip_markdown("".join(lines).strip()))
+    except RequestCancelled:
+        raise
+    except subprocess.CalledProcessError as e:
+        error_msg = e.stderr.decode(output_encoding).strip() if e.stderr else str(e)
+        notify(f"GPT Failure: {error_msg}")
+        raise llm_failure(error_msg) from e
     except Exception as e:
         notify("GPT Failure: Check the Talon Log")
         raise e
+
+
+GPTState.context.on_evict = summarize_evicted_context
@@ -0,0 +1,232 @@
+import email.utils
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Hashable, Mapping, Optional
+
+"""
+Client side rate limiting and retries for model API requests.
+
+Each endpoint and model pair gets a token bucket which is refilled at the rate
+the provider reports in its x-ratelimit-* headers. Retryable failures are retried
+with jittered exponential backoff, or after the delay the provider asked for,
+until a per-request deadline passes.
+
+This file has no Talon dependencies so it can be tested outside of Talon.
+"""
+
+# Timeouts, conflicts, rate limits and transient server errors
+RETRYABLE_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# Matches durations such as "1s", "6m0s", "20ms" and "1h2m3.5s"
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class DeadlineExceeded(Exception):
+    """The request could not be sent or retried before its deadline"""
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a duration like "1s", "6m0s" or "250ms", or a plain number of seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def parse_retry_after(
+    headers: Mapping[str, str], now: Callable[[], float] = time.time
+) -> Optional[float]:
+    """Return the number of seconds the server asked us to wait, if any"""
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    seconds = parse_duration(retry_after)
+    if seconds is not None:
+        return seconds
+    try:
+        date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - now())
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 0.5,
+    cap: float = 30.0,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """Exponential backoff with full jitter for the given zero based retry attempt"""
+    return rng() * min(cap, base * 2**attempt)
+
+
+class TokenBucket:
+    """Allows up to capacity requests at once, refilled at rate requests per second"""
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+        # Set when the server reports that no requests or tokens are left
+        self.blocked_until = 0.0
+
+    def refill(self, now: float) -> None:
+        if self.rate > 0:
+            elapsed = max(0.0, now - self.updated)
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take a token and return how long to wait before using it"""
+        self.refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.rate <= 0:
+            return wait
+        self.tokens -= 1
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / self.rate)
+        return wait
+
+
+class RateLimiter:
+    """Token buckets keyed by endpoint and model, updated from response headers"""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        # 0 means unlimited until the server reports its limits
+        self.requests_per_minute = requests_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate = self.requests_per_minute / 60
+            bucket = TokenBucket(max(1.0, rate), rate, self.clock())
+            self._buckets[key] = bucket
+        return bucket
+
+    def acquire(self, key: Hashable, deadline: float = float("inf")) -> None:
+        """Wait until a request may be sent, or raise DeadlineExceeded if that is too late"""
+        with self._lock:
+            now = self.clock()
+            wait = self._bucket(key).reserve(now)
+        if now + wait > deadline:
+            with self._lock:
+                # Give the token back since the request will not be sent
+                self._bucket(key).tokens += 1
+            raise DeadlineExceeded(f"Rate limited for another {wait:.1f} seconds")
+        if wait > 0:
+            self.sleep(wait)
+
+    def defer(self, key: Hashable, seconds: float) -> None:
+        """Hold back every request for the key, e.g. after a 429 response"""
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.blocked_until = max(bucket.blocked_until, self.clock() + seconds)
+
+    def observe(self, key: Hashable, headers: Mapping[str, str]) -> None:
+        """Update the bucket from the x-ratelimit-* headers of a response"""
+        limit = _header_number(headers, "x-ratelimit-limit-requests")
+        remaining = _header_number(headers, "x-ratelimit-remaining-requests")
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+        reset_tokens = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        with self._lock:
+            now = self.clock()
+            bucket = self._bucket(key)
+            bucket.refill(now)
+            if limit:
+                # Providers report request limits per minute
+                bucket.capacity = limit
+                bucket.rate = limit / 60
+            if remaining is not None:
+                bucket.tokens = min(bucket.tokens, remaining)
+                if remaining <= 0 and reset is not None:
+                    bucket.blocked_until = max(bucket.blocked_until, now + reset)
+            if remaining_tokens is not None and remaining_tokens <= 0:
+                if reset_tokens is not None:
+                    bucket.blocked_until = max(bucket.blocked_until, now + reset_tokens)
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def call_with_retries(
+    send: Callable[[float], Any],
+    limiter: RateLimiter,
+    key: Hashable,
+    timeout: float,
+    max_retries: int,
+    is_transient: Callable[[Exception], bool],
+    rng: Callable[[], float] = random.random,
+) -> Any:
+    """
+    Call send(remaining_seconds) until it returns a response with a status that is not
+    retryable, retrying transient exceptions and retryable statuses with backoff.
+    The last response is returned, or the last exception raised, once the retries or
+    the timeout run out. The response must have status_code, headers and close().
+    """
+    deadline = limiter.clock() + timeout
+    attempt = 0
+    while True:
+        limiter.acquire(key, deadline)
+        error: Optional[Exception] = None
+        response = None
+        delay: Optional[float] = None
+        try:
+            response = send(max(0.1, deadline - limiter.clock()))
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            error = e
+        if response is not None:
+            limiter.observe(key, response.headers)
+            if response.status_code not in RETRYABLE_STATUSES:
+                return response
+            delay = parse_retry_after(response.headers)
+        if delay is None:
+            delay = backoff_delay(attempt, rng=rng)
+        if attempt >= max_retries or limiter.clock() + delay > deadline:
+            if error is not None:
+                raise error
+            return response
+        if response is not None:
+            if response.status_code == 429:
+                # Concurrent requests to the same model wait for the limit as well
+                limiter.defer(key, delay)
+                delay = 0
+            response.close()
+        attempt += 1
+        if delay > 0:
+            limiter.sleep(delay)
@@ -0,0 +1,168 @@
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+"""
+Rolling latency and error history per model, used to route the "auto" model.
+
+Latencies are kept per prompt size bucket, because a model that answers short
+prompts quickly can still be slow for long ones. The history is persisted to a
+JSON file so routing works right after a restart.
+
+This file has no Talon dependencies so it can be tested outside of Talon.
+"""
+
+ROUTER_VERSION = 1
+# Upper prompt token limits of the size buckets; larger prompts use the last bucket
+BUCKET_LIMITS = (500, 2000, 8000)
+# Latency percentile compared against the SLO
+SLO_PERCENTILE = 90
+MIN_SAMPLES = 3
+# A model is degraded if this many of its latest requests failed recently
+DEGRADED_WINDOW = 5
+DEGRADED_FAILURES = 3
+
+
+def size_bucket(prompt_tokens: int) -> int:
+    for bucket, limit in enumerate(BUCKET_LIMITS):
+        if prompt_tokens <= limit:
+            return bucket
+    return len(BUCKET_LIMITS)
+
+
+class ModelRouter:
+    """
+    Orders candidate models for a prompt: healthy models that meet the latency SLO
+    in the order they were given, then the other healthy models from fastest to
+    slowest, then degraded models. Models without enough samples are assumed to
+    meet the SLO so that they get measured.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        window: int = 50,
+        cooldown_seconds: float = 300,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.window = window
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        # Model -> bucket -> [timestamp, seconds, ok] samples, oldest first
+        self._samples: dict[str, dict[str, list[list[Any]]]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def record(self, model: str, prompt_tokens: int, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._load()
+            buckets = self._samples.setdefault(model, {})
+            samples = buckets.setdefault(str(size_bucket(prompt_tokens)), [])
+            samples.append([self.clock(), round(seconds, 3), ok])
+            del samples[: -self.window]
+            self._save()
+
+    def estimate(self, model: str, prompt_tokens: int) -> Optional[float]:
+        """The SLO percentile of successful latencies, or None without enough samples"""
+        with self._lock:
+            self._load()
+            bucket = str(size_bucket(prompt_tokens))
+            samples = self._samples.get(model, {}).get(bucket, [])
+            latencies = sorted(seconds for _, seconds, ok in samples if ok)
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        rank = math.ceil(SLO_PERCENTILE / 100 * len(latencies))
+        return latencies[max(1, rank) - 1]
+
+    def is_degraded(self, model: str) -> bool:
+        with self._lock:
+            self._load()
+            latest = self._model_samples(model)[-DEGRADED_WINDOW:]
+        failures = [timestamp for timestamp, _, ok in latest if not ok]
+        return (
+            len(failures) >= DEGRADED_FAILURES
+            and self.clock() - failures[-1] < self.cooldown_seconds
+        )
+
+    def choose(
+        self, candidates: list[str], prompt_tokens: int, slo_seconds: float
+    ) -> list[str]:
+        healthy = [model for model in candidates if not self.is_degraded(model)]
+        degraded = [model for model in candidates if model not in healthy]
+        estimates = {model: self.estimate(model, prompt_tokens) for model in healthy}
+        meeting = [
+            model
+            for model in healthy
+            if (estimate := estimates[model]) is None or estimate <= slo_seconds
+        ]
+        slow = sorted(
+            (model for model in healthy if model not in meeting),
+            key=lambda model: estimates[model],  # type: ignore
+        )
+        return meeting + slow + degraded
+
+    def report(self) -> list[str]:
+        """One line per model with its latency per size bucket and its error rate"""
+        with self._lock:
+            self._load()
+            models = sorted(self._samples)
+        lines = []
+        for model in models:
+            parts = []
+            for bucket in range(len(BUCKET_LIMITS) + 1):
+                estimate = self.estimate(model, _bucket_tokens(bucket))
+                if estimate is not None:
+                    parts.append(f"{_bucket_name(bucket)} {estimate:.1f}s")
+            with self._lock:
+                samples = self._model_samples(model)
+            errors = sum(1 for _, _, ok in samples if not ok)
+            status = ", degraded" if self.is_degraded(model) else ""
+            latency = ", ".join(parts) or "no latency yet"
+            lines.append(f"{model}: {latency}; {errors}/{len(samples)} failed{status}")
+        return lines
+
+    def _model_samples(self, model: str) -> list[list[Any]]:
+        """Samples of every bucket, oldest first. The caller holds the lock"""
+        buckets = self._samples.get(model, {}).values()
+        return sorted(
+            (sample for samples in buckets for sample in samples),
+            key=lambda sample: sample[0],
+        )
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != ROUTER_VERSION:
+            return
+        self._samples = data.get("models", {})
+
+    def _save(self) -> None:
+        data = {"version": ROUTER_VERSION, "models": self._samples}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(data), encoding="utf-8")
+            temp_path.replace(self.path)
+        except OSError:
+            pass
+
+
+def _bucket_tokens(bucket: int) -> int:
+    if bucket < len(BUCKET_LIMITS):
+        return BUCKET_LIMITS[bucket]
+    return BUCKET_LIMITS[-1] + 1
+
+
+def _bucket_name(bucket: int) -> str:
+    if bucket < len(BUCKET_LIMITS):
+        return f"<={BUCKET_LIMITS[bucket]} tokens"
+    return f">{BUCKET_LIMITS[-1]} tokens"
@@ -0,0 +1,163 @@
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, ClassVar, Optional
+
+from talon import cron, settings
+
+from .modelTracing import tracer
+
+"""
+Runs model requests on worker threads so the Talon action thread stays responsive
+"""
+
+
+class RequestCancelled(Exception):
+    """Raised inside a running request after the user cancelled it"""
+
+
+_local = threading.local()
+
+
+def is_cancelled() -> bool:
+    """Check whether the request running on this thread has been cancelled"""
+    event: Optional[threading.Event] = getattr(_local, "cancel_event", None)
+    return event is not None and event.is_set()
+
+
+def check_cancelled() -> None:
+    """Raise RequestCancelled if the request running on this thread has been cancelled"""
+    if is_cancelled():
+        raise RequestCancelled()
+
+
+def bind_cancel(work: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap work so that it sees the cancellation of the request running on this thread"""
+    event: Optional[threading.Event] = getattr(_local, "cancel_event", None)
+
+    def bound(*args: Any) -> Any:
+        _local.cancel_event = event
+        try:
+            check_cancelled()
+            return work(*args)
+        finally:
+            _local.cancel_event = None
+
+    return bound
+
+
+def cancellable_sleep(seconds: float) -> None:
+    """Sleep, but wake up and raise RequestCancelled if the request is cancelled"""
+    event: Optional[threading.Event] = getattr(_local, "cancel_event", None)
+    if event is None:
+        time.sleep(seconds)
+    else:
+        event.wait(seconds)
+    check_cancelled()
+
+
+def run_with_cancel(event: threading.Event, work: Callable[[], Any]) -> Any:
+    """Run work on this thread as a request that is cancelled by setting event"""
+    _local.cancel_event = event
+    try:
+        check_cancelled()
+        return work()
+    finally:
+        _local.cancel_event = None
+
+
+def run_on_main(callback: Callable[..., None]) -> Callable[..., None]:
+    """Wrap a callback so that calling it from a worker runs it on the main thread"""
+
+    def scheduled(*args: Any) -> None:
+        cron.after("0ms", lambda: callback(*args))
+
+    return scheduled
+
+
+class RequestScheduler:
+    _executor: ClassVar[Optional[ThreadPoolExecutor]] = None
+    _max_workers: ClassVar[int] = 0
+    _in_flight: ClassVar[dict[Future, threading.Event]] = {}
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def submit(
+        cls,
+        work: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> Future:
+        """Run work on a worker thread and pass its result to on_done on the main thread"""
+        event = threading.Event()
+        # The worker and on_done continue the trace of the caller
+        work, on_done = tracer.bind(work), tracer.bind(on_done)
+        with cls._lock:
+            future = cls._get_executor().submit(cls._run, work, event)
+            cls._in_flight[future] = event
+        future.add_done_callback(
+            lambda done: cls._complete(done, event, on_done, on_error)
+        )
+        return future
+
+    @classmethod
+    def cancel_all(cls) -> int:
+        """Cancel every queued or running request and return how many were cancelled"""
+        with cls._lock:
+            pending = list(cls._in_flight.items())
+        for future, event in pending:
+            event.set()
+            future.cancel()
+        return len(pending)
+
+    @classmethod
+    def in_flight(cls) -> int:
+        with cls._lock:
+            return len(cls._in_flight)
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        max_workers = _max_workers_setting()
+        if cls._executor is None or cls._max_workers != max_workers:
+            if cls._executor is not None:
+                # Requests already running on the old pool are allowed to finish
+                cls._executor.shutdown(wait=False)
+            cls._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="talon-ai-request"
+            )
+            cls._max_workers = max_workers
+        return cls._executor
+
+    @staticmethod
+    def _run(work: Callable[[], Any], event: threading.Event) -> Any:
+        return run_with_cancel(event, work)
+
+    @classmethod
+    def _complete(
+        cls,
+        future: Future,
+        event: threading.Event,
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]],
+    ) -> None:
+        with cls._lock:
+            cls._in_flight.pop(future, None)
+        if future.cancelled() or event.is_set():
+            return
+        error = future.exception()
+        if error is None:
+            result = future.result()
+            cron.after("0ms", lambda: on_done(result))
+        elif not isinstance(error, RequestCancelled):
+            handler = on_error or _log_error
+            cron.after("0ms", lambda: handler(error))  # type: ignore
+
+
+def _max_workers_setting() -> int:
+    workers: int = settings.get("user.model_max_concurrent_requests")  # type: ignore
+    return max(1, workers)
+
+
+def _log_error(error: BaseException) -> None:
+    traceback.print_exception(error)
@@ -0,0 +1,187 @@
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from talon import app, cron, settings
+
+"""
+Process-wide pooled HTTP transport for all model API requests.
+
+Every caller goes through `post` so that consecutive voice commands reuse an
+open keep-alive connection instead of paying a new TCP and TLS handshake.
+"""
+
+
+class _PooledSession:
+    """A keep-alive session for a single endpoint origin"""
+
+    def __init__(self, pool_size: int):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.last_used = time.monotonic()
+        # Requests whose response has not been read yet, which keep the session open
+        self.active = 0
+        # Replaced by a new session, so it is closed once its last response is read
+        self.retired = False
+
+    def touch(self) -> requests.Session:
+        self.last_used = time.monotonic()
+        return self.session
+
+
+_lock = threading.Lock()
+_sessions: dict[str, _PooledSession] = {}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _pool_size() -> int:
+    size: int = settings.get("user.model_http_pool_size")  # type: ignore
+    return max(1, size)
+
+
+def _pooled_for(url: str) -> _PooledSession:
+    origin = _origin(url)
+    pooled = _sessions.get(origin)
+    if pooled is None:
+        pooled = _PooledSession(_pool_size())
+        _sessions[origin] = pooled
+    pooled.touch()
+    return pooled
+
+
+def session_for(url: str) -> requests.Session:
+    """Get the pooled session for the origin of the given url, creating it if needed"""
+    with _lock:
+        return _pooled_for(url).session
+
+
+def _release(pooled: _PooledSession) -> None:
+    with _lock:
+        pooled.active -= 1
+        pooled.touch()
+        if pooled.retired and pooled.active == 0:
+            pooled.session.close()
+
+
+def _retire(pooled: _PooledSession) -> None:
+    """Close a session removed from the pool now if idle, or once its last response is read"""
+    if pooled.active == 0:
+        pooled.session.close()
+    else:
+        pooled.retired = True
+
+
+# Failures to connect or to get a reply in time, which are worth retrying
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+
+def post(
+    url: str,
+    headers: dict[str, str],
+    data: Optional[str] = None,
+    json: Optional[Any] = None,
+    stream: bool = False,
+    timeout: Optional[float] = None,
+) -> requests.Response:
+    """
+    Send a POST request over the pooled keep-alive session for the url. A streamed
+    response keeps the session in use until it is closed.
+    """
+    with _lock:
+        pooled = _pooled_for(url)
+        pooled.active += 1
+    try:
+        response = pooled.session.post(
+            url, headers=headers, data=data, json=json, stream=stream, timeout=timeout
+        )
+    except BaseException:
+        _release(pooled)
+        raise
+    if not stream:
+        _release(pooled)
+        return response
+
+    close = response.close
+    released = False
+
+    def close_and_release() -> None:
+        nonlocal released
+        try:
+            close()
+        finally:
+            if not released:
+                released = True
+                _release(pooled)
+
+    response.close = close_and_release  # type: ignore
+    return response
+
+
+def evict_idle() -> None:
+    """Close sessions which are not reading a response and have been idle too long"""
+    idle_timeout: int = settings.get("user.model_http_idle_timeout")  # type: ignore
+    if idle_timeout <= 0:
+        return
+    now = time.monotonic()
+    with _lock:
+        expired = [
+            origin
+            for origin, pooled in _sessions.items()
+            if pooled.active == 0 and now - pooled.last_used > idle_timeout
+        ]
+        for origin in expired:
+            _sessions.pop(origin).session.close()
+
+
+def close_all() -> None:
+    """
+    Close every pooled session. They will be recreated on the next request, and
+    sessions with a response still being read are closed once it has been read.
+    """
+    with _lock:
+        for pooled in _sessions.values():
+            _retire(pooled)
+        _sessions.clear()
+
+
+def warm(url: Optional[str] = None) -> None:
+    """Open a connection to the model endpoint in the background so the first request skips the handshake"""
+    target = url or settings.get("user.model_endpoint")
+    if not isinstance(target, str) or not target.startswith(("http://", "https://")):
+        return
+
+    def connect():
+        try:
+            session_for(target).head(_origin(target), timeout=5)
+        except requests.RequestException:
+            # Warming is best effort; the real request will surface any errors
+            pass
+
+    threading.Thread(target=connect, daemon=True).start()
+
+
+def rebuild(*_args) -> None:
+    """Drop all pooled connections and pre-connect to the current endpoint"""
+    close_all()
+    if settings.get("user.model_http_prewarm"):
+        warm()
+
+
+def on_ready():
+    settings.register("user.model_endpoint", rebuild)
+    settings.register("user.model_http_pool_size", rebuild)
+    cron.interval("30s", evict_idle)
+    if settings.get("user.model_http_prewarm"):
+        warm()
+
+
+app.register("ready", on_ready)
@@ -1,7 +1,8 @@
 from typing import ClassVar
 
-from talon import actions
+from talon import actions, settings
 
+from .modelContext import ContextStore
 from .modelTypes import GPTMessageItem
 
 
@@ -9,7 +10,7 @@ class GPTState:
     text_to_confirm: ClassVar[str] = ""
     last_response: ClassVar[str] = ""
     last_was_pasted: ClassVar[bool] = False
-    context: ClassVar[list[GPTMessageItem]] = []
+    context: ClassVar[ContextStore] = ContextStore()
     debug_enabled: ClassVar[bool] = False
 
     @classmethod
@@ -27,7 +28,7 @@ class GPTState:
     @classmethod
     def clear_context(cls):
         """Reset the stored context"""
-        cls.context = []
+        cls.context.clear()
         actions.app.notify("Cleared user context")
 
     @classmethod
@@ -38,12 +39,29 @@ class GPTState:
                 "Only text can be added to context. To add images, try using a prompt to summarize or otherwise describe the image to the context."
             )
             return
-        cls.context += [context]
-        actions.app.notify("Appended user context")
+        cls.context.add(context)
+        evicted = cls.enforce_context_budget(
+            settings.get("user.model_context_token_budget"),  # type: ignore
+            context.get("text", ""),
+        )
+        if evicted:
+            actions.app.notify(
+                f"Appended user context, evicted {len(evicted)} older item(s) to stay within the token budget"
+            )
+        else:
+            actions.app.notify("Appended user context")
+
+    @classmethod
+    def enforce_context_budget(
+        cls, budget: int, query: str = ""
+    ) -> list[GPTMessageItem]:
+        """Evict stored context until it fits in the token budget and return the evicted items"""
+        policy: str = settings.get("user.model_context_eviction")  # type: ignore
+        return cls.context.enforce_budget(budget, policy, query)
 
     @classmethod
     def reset_all(cls):
         cls.text_to_confirm = ""
         cls.last_response = ""
         cls.last_was_pasted = False
-        cls.context = []
+        cls.context.clear()
@@ -0,0 +1,82 @@
+import re
+from typing import Optional
+
+from talon import actions, settings
+
+from .modelHelpers import extract_message, notify
+from .modelState import GPTState
+from .modelTypes import GPTMessageItem
+
+"""
+Incremental insertion of streamed model responses into a destination
+"""
+
+# Text to speech is flushed once a full sentence has arrived so it sounds natural
+SENTENCE_END = re.compile(r"[.!?:;](\s|$)|\n")
+
+
+class ResponseStream:
+    """Insert chunks of a streamed response into a destination as they arrive"""
+
+    STREAMABLE_DESTINATIONS = {"paste", "window", "textToSpeech"}
+
+    def __init__(self, destination: str):
+        self.destination = destination
+        self.text = ""
+        self._buffer = ""
+
+    @classmethod
+    def for_destination(cls, destination: str) -> Optional["ResponseStream"]:
+        """Create a stream for the destination, or None if it should not be streamed"""
+        if not settings.get("user.model_stream_responses"):
+            return None
+        if destination == "":
+            destination = settings.get("user.model_default_destination")  # type: ignore
+        if destination not in cls.STREAMABLE_DESTINATIONS:
+            return None
+        return cls(destination)
+
+    def feed(self, chunk: str) -> None:
+        """Buffer a chunk and flush everything up to the last safe boundary"""
+        self._buffer += chunk
+        boundary = self._boundary()
+        if boundary > 0:
+            self._flush(self._buffer[:boundary])
+            self._buffer = self._buffer[boundary:]
+
+    def finish(self, response: GPTMessageItem) -> None:
+        """Flush the remaining text once the full response has been received"""
+        if self._buffer:
+            self._flush(self._buffer)
+            self._buffer = ""
+        if self.destination == "window":
+            # Show the final response in case fence stripping differed mid stream
+            self.text = extract_message(response)
+            GPTState.text_to_confirm = self.text
+            actions.user.confirmation_gui_append(self.text)
+
+    def _boundary(self) -> int:
+        match self.destination:
+            case "window":
+                return len(self._buffer)
+            case "textToSpeech":
+                ends = [match.end() for match in SENTENCE_END.finditer(self._buffer)]
+                return ends[-1] if ends else 0
+            case _:
+                # Paste whole lines to avoid a clipboard round trip for every token
+                return self._buffer.rfind("\n") + 1
+
+    def _flush(self, text: str) -> None:
+        self.text += text
+        match self.destination:
+            case "window":
+                GPTState.text_to_confirm = self.text
+                actions.user.confirmation_gui_append(self.text)
+            case "textToSpeech":
+                try:
+                    actions.user.tts(text)
+                except KeyError:
+                    notify("GPT Failure: text to speech is not installed")
+            case _:
+                GPTState.last_was_pasted = True
+                actions.user.paste(text)
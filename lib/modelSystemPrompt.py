@@ -0,0 +1,114 @@
+import time
+from typing import Any, Callable, ClassVar, Hashable, Optional
+
+from talon import actions, app, settings, ui
+
+from .modelState import GPTState
+
+"""
+Assembles the system message for model requests.
+
+Each segment of the system message is memoized so that repeated requests do not
+call every context provider and re-join the stored context. The language segment
+is keyed by the active language. The application segment is keyed by the focused
+app and window title and is also invalidated when the focus, window title or
+settings change. The stored context segment is invalidated when context is pushed
+or cleared. The additional user context is not memoized, since overrides of
+gpt_additional_user_context may read anything, such as the clipboard or the time.
+"""
+
+SNIPPET_CONTEXT = "\n\nPlease return the response as a snippet with placeholders. A snippet can control cursors and text insertion using constructs like tabstops ($1, $2, etc., with $0 as the final position). Linked tabstops update together. Placeholders, such as ${1:foo}, allow easy changes and can be nested (${1:another ${2:}}). Choices, using ${1|one,two,three|}, prompt user selection."
+
+
+class SystemPromptBuilder:
+    # Segment name -> (cache key, value)
+    _segments: ClassVar[dict[str, tuple[Hashable, Any]]] = {}
+    # Segment name -> milliseconds spent computing it the last time it was not cached
+    timings: ClassVar[dict[str, float]] = {}
+    # Segment name -> [hits, misses]
+    counts: ClassVar[dict[str, list[int]]] = {}
+    # Bumped whenever something that the focus dependent segments read may have changed
+    _generation: ClassVar[int] = 0
+
+    @classmethod
+    def invalidate(cls, *_args) -> None:
+        """Invalidate the segments which depend on the focused window or settings"""
+        cls._generation += 1
+
+    @classmethod
+    def build(cls, system_prompt: Optional[str], destination: str = "") -> str:
+        """Build the system message. system_prompt overrides user.model_system_prompt"""
+        # The inputs of each segment are part of its key, in case a change of them
+        # was not reported by an event
+        language = actions.code.language()
+        focus = (cls._generation, actions.app.name(), actions.win.title())
+        context_version = GPTState.context.version
+        return "\n\n".join(
+            [
+                item
+                for item in [
+                    (
+                        system_prompt
+                        if system_prompt is not None
+                        else settings.get("user.model_system_prompt")
+                    ),
+                    cls._segment(
+                        "language", language, lambda: cls._language_context(language)
+                    ),
+                    cls._segment("application", focus, cls._application_context),
+                    SNIPPET_CONTEXT if destination == "snip" else None,
+                ]
+                + actions.user.gpt_additional_user_context()
+                + cls._segment("context", context_version, cls._stored_context)
+                if item
+            ]
+        )
+
+    @classmethod
+    def report(cls) -> list[str]:
+        """Describe the cost and cache hit counts of each segment"""
+        return [
+            f"{name}: {cls.timings.get(name, 0):.1f}ms, {hits} hits, {misses} misses"
+            for name, (hits, misses) in cls.counts.items()
+        ]
+
+    @classmethod
+    def _segment(cls, name: str, key: Hashable, producer: Callable[[], Any]) -> Any:
+        counts = cls.counts.setdefault(name, [0, 0])
+        cached = cls._segments.get(name)
+        if cached is not None and cached[0] == key:
+            counts[0] += 1
+            return cached[1]
+        counts[1] += 1
+        start = time.perf_counter()
+        value = producer()
+        cls.timings[name] = (time.perf_counter() - start) * 1000
+        cls._segments[name] = (key, value)
+        if GPTState.debug_enabled:
+            print(f"System prompt segment {name} took {cls.timings[name]:.1f}ms")
+        return value
+
+    @staticmethod
+    def _language_context(language: str) -> Optional[str]:
+        return (
+            f"The user is currently in a code editor for the programming language: {language}."
+            if language != ""
+            else None
+        )
+
+    @staticmethod
+    def _application_context() -> str:
+        return f"The following describes the currently focused application:\n\n{actions.user.talon_get_active_context()}"
+
+    @staticmethod
+    def _stored_context() -> list[Optional[str]]:
+        return [context.get("text") for context in GPTState.context]
+
+
+def on_ready():
+    for event in ("app_activate", "win_focus", "win_title"):
+        ui.register(event, SystemPromptBuilder.invalidate)
+    settings.register("", SystemPromptBuilder.invalidate)
+
+
+app.register("ready", on_ready)
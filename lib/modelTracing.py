@@ -0,0 +1,230 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+"""
+Lightweight request tracing with nested timing spans.
+
+A span times one phase of a request, such as building the system prompt or the
+network round trip. Spans opened while another span is open on the same thread
+become its children, and bind carries the open span over to work that runs on
+another thread, so a request keeps one trace from the Talon action to the worker
+and back. Finished spans are kept in memory for the timings page and written to
+a rotating JSONL file by a background thread.
+
+This file has no Talon dependencies so it can be tested outside of Talon.
+"""
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    # Wall clock start in seconds, so spans from different threads line up
+    start: float
+    attrs: dict[str, Any] = field(default_factory=dict)
+    ms: float = 0.0
+    error: str = ""
+
+    def set(self, **attrs: Any) -> None:
+        """Add attributes that are only known once the phase has run"""
+        self.attrs.update(attrs)
+
+    def record(self) -> dict[str, Any]:
+        return {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "ms": round(self.ms, 3),
+            "thread": threading.current_thread().name,
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class TraceWriter:
+    """Appends span records to a JSONL file on a background thread"""
+
+    def __init__(self, path: Path, max_bytes: int = 1_000_000, backups: int = 2):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._queue.put(record)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="talon-ai-trace-writer", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self) -> None:
+        """Wait until every record written so far is on disk"""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            records = [self._queue.get()]
+            while not self._queue.empty():
+                records.append(self._queue.get())
+            try:
+                self._append(records)
+            except OSError:
+                pass
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+    def _append(self, records: list[dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+        if self.path.stat().st_size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        for index in range(self.backups, 0, -1):
+            source = self._backup(index - 1) if index > 1 else self.path
+            if source.exists():
+                os.replace(source, self._backup(index))
+
+    def _backup(self, index: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{index}")
+
+
+class Tracer:
+    def __init__(
+        self, writer: Optional[TraceWriter] = None, max_recent_spans: int = 2000
+    ):
+        self.writer = writer
+        self._recent: deque[dict[str, Any]] = deque(maxlen=max_recent_spans)
+        self._local = threading.local()
+        # Ids restart with Talon, so the prefix keeps them unique in the trace file
+        self._prefix = os.urandom(3).hex()
+        self._ids = iter(range(1, 1 << 62))
+        self._ids_lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """Time the body as a child of the span open on this thread"""
+        parent = self.current()
+        span_id = self._next_id()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else span_id,
+            span_id=span_id,
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attrs=attrs,
+        )
+        stack = self._stack()
+        stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.ms = (time.perf_counter() - started) * 1000
+            stack.pop()
+            self._finish(span)
+
+    def current(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def bind(self, work: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap work so that spans it opens on another thread join the current trace"""
+        parent = self.current()
+
+        def bound(*args: Any) -> Any:
+            previous = getattr(self._local, "stack", None)
+            self._local.stack = [parent] if parent else []
+            try:
+                return work(*args)
+            finally:
+                self._local.stack = previous if previous is not None else []
+
+        return bound
+
+    def recent_traces(self, count: int = 10) -> list[list[dict[str, Any]]]:
+        """The spans of the latest traces, oldest trace first, each sorted by start"""
+        traces: dict[str, list[dict[str, Any]]] = {}
+        for record in list(self._recent):
+            traces.setdefault(record["trace"], []).append(record)
+        latest = sorted(traces.values(), key=lambda spans: _trace_start(spans))
+        return [sorted(spans, key=lambda r: r["start"]) for spans in latest[-count:]]
+
+    def _finish(self, span: Span) -> None:
+        record = span.record()
+        self._recent.append(record)
+        if self.writer is not None:
+            self.writer.write(record)
+
+    def _stack(self) -> list[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _next_id(self) -> str:
+        with self._ids_lock:
+            return f"{self._prefix}-{next(self._ids):x}"
+
+
+# Shared by every part of the request path. Talon code attaches a writer to it
+tracer = Tracer()
+
+
+def _trace_start(spans: list[dict[str, Any]]) -> float:
+    return min(record["start"] for record in spans)
+
+
+def waterfall(spans: list[dict[str, Any]], width: int = 40) -> list[dict[str, Any]]:
+    """
+    Rows for a waterfall view of one trace: each span with its depth, its offset
+    from the start of the trace in milliseconds, and its bar position in columns
+    """
+    start = _trace_start(spans)
+    end = max(record["start"] + record["ms"] / 1000 for record in spans)
+    total_ms = max((end - start) * 1000, 0.001)
+    by_id = {record["span"]: record for record in spans}
+
+    def depth(record: dict[str, Any]) -> int:
+        level = 0
+        while record["parent"] in by_id:
+            record = by_id[record["parent"]]
+            level += 1
+        return level
+
+    rows = []
+    for record in spans:
+        offset_ms = (record["start"] - start) * 1000
+        column = min(width - 1, int(offset_ms / total_ms * width))
+        length = max(1, round(record["ms"] / total_ms * width))
+        rows.append(
+            {
+                **record,
+                "depth": depth(record),
+                "offset_ms": offset_ms,
+                "bar": (column, min(length, width - column)),
+            }
+        )
+    return rows
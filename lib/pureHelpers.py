@@ -1,5 +1,7 @@
+import json
 import platform
 import re
+from typing import Optional
 
 """
 Everything in this file are functions which do not interact with the
@@ -33,3 +35,94 @@ def strip_markdown(text: str) -> str:
     stripped_code = re.sub(pattern, r"\1", text)
 
     return stripped_code.strip()
+
+
+def _trailing_backticks(text: str) -> int:
+    """Count trailing backticks which could be the start of a fence split across chunks"""
+    return min(len(text) - len(text.rstrip("`")), 2)
+
+
+class MarkdownStreamStripper:
+    """
+    Incrementally remove markdown code fences from text that arrives in chunks.
+
+    This is the streaming counterpart of strip_markdown: fences are removed even if
+    they are split across chunk boundaries, and whitespace at the start and end of
+    the whole response is trimmed. Unlike strip_markdown, an opening fence that is
+    never closed is still removed since its content has already been emitted.
+    """
+
+    FENCE = "```"
+
+    def __init__(self):
+        self._pending = ""
+        self._in_fence = False
+        self._started = False
+        self._held_whitespace = ""
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of text and return the text that is safe to output so far"""
+        self._pending += chunk
+        return self._emit(self._drain(final=False))
+
+    def finish(self) -> str:
+        """Flush any remaining text once the stream has ended"""
+        text = self._emit(self._drain(final=True))
+        # Trailing whitespace of the whole response is dropped like str.strip()
+        self._held_whitespace = ""
+        return text
+
+    def _drain(self, final: bool) -> str:
+        output: list[str] = []
+        while True:
+            index = self._pending.find(self.FENCE)
+            if index == -1:
+                keep = 0 if final else _trailing_backticks(self._pending)
+                split_at = len(self._pending) - keep
+                output.append(self._pending[:split_at])
+                self._pending = self._pending[split_at:]
+                return "".join(output)
+
+            output.append(self._pending[:index])
+            rest = self._pending[index + len(self.FENCE) :]
+            if self._in_fence:
+                self._in_fence = False
+                self._pending = rest
+                continue
+
+            header = re.match(r"[a-zA-Z]*[ \t\r]*\n", rest)
+            if header:
+                self._in_fence = True
+                self._pending = rest[header.end() :]
+                continue
+            if not final and re.fullmatch(r"[a-zA-Z]*[ \t\r]*", rest):
+                # The language identifier of the fence has not fully arrived yet
+                self._pending = self._pending[index:]
+                return "".join(output)
+
+            output.append(self.FENCE)
+            self._pending = rest
+
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        text = self._held_whitespace + text
+        body = text.rstrip()
+        self._held_whitespace = text[len(body) :]
+        return body
+
+
+def parse_sse_delta(line: str) -> Optional[str]:
+    """Extract the content delta from one server-sent event line of a streamed chat completion"""
+    if not line.startswith("data:"):
+        return None
+    payload = line.removeprefix("data:").strip()
+    if not payload or payload == "[DONE]":
+        return None
+    choices = json.loads(payload).get("choices") or []
+    if not choices:
+        return None
+    return (choices[0].get("delta") or {}).get("content") or None
@@ -11,6 +11,7 @@ mod.list("model", desc="The name of the model")
 mod.list("modelDestination", desc="What to do after returning the model response")
 mod.list("modelSource", desc="Where to get the text from for the GPT")
 mod.list("modelThread", desc="Which conversation thread to continue")
+mod.list("modelChunkMode", desc="How to process text that is split into chunks")
 
 
 # model prompts can be either static and predefined by this repo or custom outside of it
@@ -97,3 +98,192 @@ mod.setting(
     default=80,
     desc="The default window width (in characters) for showing model output",
 )
+
+mod.setting(
+    "model_http_pool_size",
+    type=int,
+    default=4,
+    desc="The maximum number of keep-alive connections kept open per model API endpoint",
+)
+
+mod.setting(
+    "model_http_idle_timeout",
+    type=int,
+    default=120,
+    desc="Close pooled model API connections after this many seconds without a request. Set to 0 to keep them open indefinitely.",
+)
+
+mod.setting(
+    "model_http_prewarm",
+    type=bool,
+    default=True,
+    desc="If true, open a connection to user.model_endpoint on startup and whenever the endpoint changes so the first request skips the handshake",
+)
+
+mod.setting(
+    "model_stream_responses",
+    type=bool,
+    default=False,
+    desc="If true, stream model responses and insert them as they arrive when the destination is paste, window or textToSpeech",
+)
+
+mod.setting(
+    "model_async_requests",
+    type=bool,
+    default=False,
+    desc="If true, model prompts run on a background thread so voice commands stay responsive while the model answers. The response is inserted when it arrives, so user.gpt_apply_prompt returns nothing in this mode.",
+)
+
+mod.setting(
+    "model_max_concurrent_requests",
+    type=int,
+    default=2,
+    desc="The maximum number of background model requests that can run at once. Additional requests wait in a queue.",
+)
+
+mod.setting(
+    "model_cache_enabled",
+    type=bool,
+    default=False,
+    desc='If true, identical model requests are answered from an on-disk response cache instead of calling the model again. Prompts and responses are stored in .cache/responses.sqlite3. Individual models can opt out with "cache": false in models.json.',
+)
+
+mod.setting(
+    "model_cache_ttl",
+    type=int,
+    default=86400,
+    desc="The number of seconds a cached model response stays valid. Set to 0 to never expire responses.",
+)
+
+mod.setting(
+    "model_cache_max_mb",
+    type=int,
+    default=20,
+    desc="The maximum size of the response cache in megabytes. The least recently used responses are evicted first.",
+)
+
+mod.setting(
+    "model_llm_worker",
+    type=bool,
+    default=False,
+    desc='If true and model_endpoint is "llm", keep one llm process running and send prompts to it instead of starting the llm executable for every request. Falls back to the executable if the worker cannot be started.',
+)
+
+mod.setting(
+    "model_llm_python",
+    type=str,
+    default="",
+    desc="The Python interpreter that llm is installed into, used to run the llm worker. If empty, it is read from the shebang line of model_llm_path.",
+)
+
+mod.setting(
+    "model_context_token_budget",
+    type=int,
+    default=16000,
+    desc="The approximate number of tokens the stored context may use. Older context is evicted once it is exceeded. Can be overridden per model with context_token_budget in models.json. Set to 0 for no limit.",
+)
+
+mod.setting(
+    "model_context_eviction",
+    type=str,
+    default="oldest",
+    desc='Which stored context to evict first when it exceeds its token budget: "oldest" or "relevance" (the items least related to the current prompt)',
+)
+
+mod.setting(
+    "model_context_summary_model",
+    type=str,
+    default="",
+    desc="If set, evicted context is summarized with this model and the summary is kept in the context. Use a cheap, fast model.",
+)
+
+mod.setting(
+    "model_context_window",
+    type=int,
+    default=128000,
+    desc="The number of tokens the model accepts for the prompt and response combined. Prompts that do not fit are rejected before they are sent. Can be overridden per model with context_window in models.json.",
+)
+
+mod.setting(
+    "model_max_output_tokens",
+    type=int,
+    default=2024,
+    desc="The maximum number of tokens to request for a response. Lowered automatically when the prompt leaves less room in the context window. Can be overridden per model with max_output_tokens in models.json.",
+)
+
+mod.setting(
+    "model_chunk_tokens",
+    type=int,
+    default=4000,
+    desc="The approximate number of tokens in each chunk when text is processed in chunks",
+)
+
+mod.setting(
+    "model_chunk_workers",
+    type=int,
+    default=3,
+    desc="The number of chunks that are sent to the model at the same time. Lower this if you hit rate limits.",
+)
+
+mod.setting(
+    "model_chunk_auto_mode",
+    type=str,
+    default="map",
+    desc='How to process text that does not fit in the context window of the model when no chunk mode is given: "map" to join the result for each chunk, "reduce" to combine them with another request, or "" to send it unchunked',
+)
+
+mod.setting(
+    "model_requests_per_minute",
+    type=int,
+    default=0,
+    desc="The maximum number of requests per minute to send to each model. Set to 0 to only follow the limits reported by the endpoint.",
+)
+
+mod.setting(
+    "model_request_timeout",
+    type=int,
+    default=120,
+    desc="The number of seconds a model request may take, including waiting for rate limits and retries",
+)
+
+mod.setting(
+    "model_auto_latency_slo",
+    type=float,
+    default=8.0,
+    desc='The number of seconds the "auto" model should take to respond. It uses the first model in models.json whose recent 90th percentile latency for prompts of the same size is within this, and fails over to the next model if a request fails.',
+)
+
+mod.setting(
+    "model_max_retries",
+    type=int,
+    default=4,
+    desc="How many times to retry a model request that was rate limited or failed with a temporary error",
+)
+
+mod.setting(
+    "model_image_max_dimension",
+    type=int,
+    default=1568,
+    desc="Images are downscaled so their longest side is at most this many pixels before they are sent to a model. 0 keeps the original size.",
+)
+
+mod.setting(
+    "model_image_format",
+    type=str,
+    default="jpeg",
+    desc='The format images are recompressed to before they are sent to a model: "jpeg", "webp", "png" or "original"',
+)
+
+mod.setting(
+    "model_image_quality",
+    type=int,
+    default=85,
+    desc="The JPEG or WebP quality, from 1 to 100, of images sent to a model",
+)
+
+mod.setting(
+    "model_upload_mbps",
+    type=float,
+    default=20.0,
+    desc="Your upload bandwidth in megabits per second, used to estimate the upload time saved by shrinking images",
+)
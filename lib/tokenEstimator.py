@@ -0,0 +1,82 @@
+import math
+import re
+from functools import lru_cache
+from typing import Any, Optional
+
+"""
+Token counting for prompts before they are sent to a model.
+
+Like pureHelpers, nothing in this file interacts with Talon or the model APIs.
+Counts are exact when the optional tiktoken library is importable and the model
+is known to it; otherwise a fast approximation of byte pair encoding is used.
+"""
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Splits text the same way as GPT tokenizers do before merging byte pairs:
+# contractions, words with an optional leading space, digit groups, punctuation
+# runs and whitespace.
+PRETOKENIZE_PATTERN = re.compile(
+    r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+",
+    re.IGNORECASE,
+)
+
+# Images are billed per tile; this is a typical cost for a screenshot
+IMAGE_TOKENS = 765
+
+
+@lru_cache(maxsize=65536)
+def _piece_tokens(piece: str) -> int:
+    """Approximate the number of tokens for one pre-tokenized piece"""
+    word = piece.strip()
+    if not word:
+        return 1
+    if not word.isascii():
+        # Non latin scripts take roughly one token per two UTF-8 bytes
+        return max(1, math.ceil(len(word.encode("utf-8")) / 2))
+    if word.isalpha():
+        # Vocabularies hold most whole words up to about eight letters
+        if len(word) <= 8:
+            return 1
+        return math.ceil(len(word) / 6)
+    if word.isdigit():
+        return 1
+    # Punctuation runs are usually merged in pairs
+    return math.ceil(len(word) / 2)
+
+
+def estimate_tokens(text: str) -> int:
+    """Quickly approximate the number of tokens in the text"""
+    return sum(_piece_tokens(piece) for piece in PRETOKENIZE_PATTERN.findall(text))
+
+
+@lru_cache(maxsize=16)
+def _encoding(model_id: str) -> Optional[Any]:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_id)
+    except (KeyError, ValueError):
+        return None
+
+
+def count_tokens(text: str, model_id: str = "") -> int:
+    """Count the tokens in the text, exactly if a tokenizer for the model is available"""
+    encoding = _encoding(model_id) if model_id else None
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(texts: list[str], images: int = 0, model_id: str = "") -> int:
+    """Count the tokens for a chat request made of the given texts and images"""
+    # Every message carries a few tokens of role and formatting overhead
+    overhead = 4 * len(texts) + 3
+    return (
+        sum(count_tokens(text, model_id) for text in texts)
+        + images * IMAGE_TOKENS
+        + overhead
+    )